@@ -1,3 +1,4 @@
-from pysepal.scripts.utils import init_ee
+from component.scripts.ee_init import start_ee
 
-init_ee()
+# Earth Engine is initialized in the background, see scripts.ee_init.wait_ee
+start_ee()
@@ -0,0 +1,13 @@
+"""Batch processing of the indicator for many countries, see ``python -m component.batch --help``"""
+
+from .manifest import STATES, Manifest
+from .runner import DEFAULT_CONFIG, build_report, read_config, run_batch
+
+__all__ = [
+    "STATES",
+    "Manifest",
+    "DEFAULT_CONFIG",
+    "read_config",
+    "run_batch",
+    "build_report",
+]
@@ -0,0 +1,66 @@
+"""Command line entry point of the batch processing.
+
+Usage:
+    python -m component.batch config.json [--retry-failed] [--combine]
+
+See component.batch.runner.DEFAULT_CONFIG for the configuration keys.
+"""
+
+import argparse
+import asyncio
+import logging
+from pathlib import Path
+
+from pysepal.scripts.drive_interface import GDriveInterface
+from pysepal.scripts.gee_interface import GEEInterface
+
+from component.batch.runner import get_report_files, read_config, run_batch
+from component.scripts.consolidate import consolidate_reports
+from component.scripts.ee_init import wait_ee
+
+NUM_SHEETS = {"sub_a": 3, "sub_b": 2}
+"dict: number of sheets of the country reports of every indicator"
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m component.batch",
+        description="Export, download and report the indicator for many countries.",
+    )
+    parser.add_argument("config", type=Path, help="JSON batch configuration")
+    parser.add_argument(
+        "--retry-failed", action="store_true", help="submit failed countries again"
+    )
+    parser.add_argument(
+        "--combine",
+        action="store_true",
+        help="combine the country reports in output_dir/final_report.xlsx",
+    )
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    config = read_config(args.config)
+
+    # The countries are filtered with ee objects, built once EE is initialized
+    wait_ee()
+
+    with GEEInterface() as gee_interface:
+        manifest = asyncio.run(
+            run_batch(config, gee_interface, GDriveInterface(), args.retry_failed)
+        )
+
+    print(manifest.summary())
+
+    if args.combine:
+        output_file = Path(config["output_dir"]) / "final_report.xlsx"
+        consolidate_reports(
+            get_report_files(config).values(),
+            output_file,
+            num_sheets=NUM_SHEETS[config["indicator"]],
+            n_workers=config["n_workers"],
+        )
+        print(f"Combined report: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Local manifest of a batch run: the state of the task of every country.
+
+The manifest is a JSON file saved after every change, so an interrupted run can
+be resumed without resubmitting the countries already exported or reported.
+"""
+
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+from component.types import Pathlike
+
+__all__ = ["Manifest", "STATES"]
+
+STATES = ["pending", "submitted", "downloaded", "reported", "failed"]
+"""list: states of a country, in the order they are reached"""
+
+
+class Manifest:
+    """Countries of a batch run and the state of their export task.
+
+    Every entry holds the state, the GEE task id and name, the code of the
+    country, the downloaded csv, the report, the last error and the time of the
+    last update.
+
+    Args:
+        path: JSON file of the manifest, loaded if it exists
+    """
+
+    def __init__(self, path: Pathlike):
+        self.path = Path(path)
+        self.entries: Dict[str, dict] = {}
+
+        if self.path.exists():
+            self.entries = json.loads(self.path.read_text())
+
+    def add(self, names: Iterable[str]) -> List[str]:
+        """Add the countries that are not in the manifest yet as pending.
+
+        Return:
+            the names of the added countries
+        """
+
+        added = [name for name in names if name not in self.entries]
+        for name in added:
+            self.entries[name] = {"state": "pending"}
+
+        if added:
+            self.save()
+
+        return added
+
+    def update(self, name: str, **fields) -> dict:
+        """Update the fields of a country entry and save the manifest"""
+
+        if fields.get("state", "pending") not in STATES:
+            raise ValueError(f"Unknown state '{fields['state']}', use one of {STATES}")
+
+        entry = self.entries[name]
+        entry.update(fields, updated=datetime.now().isoformat(timespec="seconds"))
+        self.save()
+
+        return entry
+
+    def with_state(self, *states: str) -> List[str]:
+        """Return the countries in any of the given states"""
+
+        return [
+            name for name, entry in self.entries.items() if entry["state"] in states
+        ]
+
+    def save(self) -> Path:
+        """Write the manifest, atomically so an interruption can't corrupt it"""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(self.entries, indent=4))
+        os.replace(tmp_path, self.path)
+
+        return self.path
+
+    def summary(self) -> Dict[str, int]:
+        """Return the number of countries in every state"""
+
+        return {state: len(self.with_state(state)) for state in STATES}
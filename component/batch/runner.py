@@ -0,0 +1,347 @@
+"""Run the indicator for many countries of an admin asset.
+
+Replaces the serial loops of the Sepal_Global notebooks: export tasks are
+submitted with a bounded number of running tasks, their state is tracked in a
+Manifest, results are downloaded as soon as they complete and the reports are
+built in a process pool.
+"""
+
+import asyncio
+import json
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import ee
+from pysepal.scripts.drive_interface import GDriveInterface
+from pysepal.scripts.gee_interface import GEEInterface
+
+import component.parameter.module_parameter as param
+import component.scripts.scripts as cs
+from component.batch.manifest import Manifest
+from component.scripts.colab_combining_files import sanitize_description
+from component.scripts.gee import reduce_regions, to_long_collection
+from component.scripts.task_store import COMPLETED_STATES, FAILED_STATES
+from component.types import LONG_COLUMNS, Pathlike, SUB_B_CATEGORIES
+
+log = logging.getLogger("MGCI.batch")
+
+__all__ = ["DEFAULT_CONFIG", "read_config", "run_batch", "build_report"]
+
+DEFAULT_CONFIG = {
+    "admin_asset": "projects/ee-xavidelamo/assets/M49Countries",
+    "name_property": "M49Name",
+    "code_property": "M49Code",
+    "filter_names": None,
+    "filter_codes": None,
+    "indicator": "sub_a",
+    "years": None,
+    "remap_matrix": str(param.LC_MAP_MATRIX),
+    "transition_matrix": str(param.TRANSITION_MATRIX_FILE),
+    "dem": param.DEM_DEFAULT,
+    "rsa": False,
+    "rsa_source": "on_the_fly",
+    "rsa_asset": None,
+    "scale": None,
+    "layout": "nested",
+    "parquet_store": False,
+    "output_dir": "results/sdg1542",
+    "drive_folder": None,
+    "max_running": 20,
+    "poll_interval": 60,
+    "n_workers": None,
+}
+"""dict: batch configuration, years is required: the sub A years ({1: {"asset":
+..., "year": ...}, ...}) or the sub B years ({"baseline": {"base": ..., "report":
+...}, 2: ...}) as in the notebooks. layout "long" exports one row per reduced
+group (see gee.to_long_collection). rsa_source "precomputed" reads the real
+surface area from the tiles of rsa_asset (see gee.precompute_real_surface_area)
+instead of computing it for every country. parquet_store also writes the
+reports in the Parquet store of every report folder (see
+report_writer.get_store_files), --combine then reads them from it"""
+
+
+def read_config(config_file: Pathlike) -> dict:
+    """Read a JSON batch configuration and fill it with the defaults"""
+
+    config = {**DEFAULT_CONFIG, **json.loads(Path(config_file).read_text())}
+
+    if config["indicator"] not in ["sub_a", "sub_b"]:
+        raise ValueError("indicator must be 'sub_a' or 'sub_b'")
+
+    if not config["years"]:
+        raise ValueError("The years to calculate are missing from the configuration")
+
+    return config
+
+
+def get_years(config: dict) -> list:
+    """Return the years (assets) to reduce for every country"""
+
+    if config["indicator"] == "sub_a":
+        return cs.get_a_years(config["years"])
+
+    return cs.get_b_years(config["years"])
+
+
+def get_country_process(
+    aoi: ee.FeatureCollection, years: list, remap_matrix: dict, config: dict
+) -> ee.FeatureCollection:
+    """Return the collection exported for a country, one feature per year"""
+
+    return ee.FeatureCollection(
+        [
+            ee.Feature(
+                None,
+                reduce_regions(
+                    aoi,
+                    remap_matrix,
+                    config["rsa"],
+                    config["dem"],
+                    year,
+                    config["transition_matrix"],
+                    config["scale"],
+                    rsa_asset=config["rsa_asset"],
+                    rsa_source=config["rsa_source"],
+                ),
+            ).set("process_id", cs.years_from_dict(year))
+            for year in years
+        ]
+    )
+
+
+async def get_countries(gee_interface: GEEInterface, config: dict) -> Dict[str, str]:
+    """Return the codes of the countries to process by name"""
+
+    admin = ee.FeatureCollection(config["admin_asset"])
+
+    if config["filter_names"]:
+        admin = admin.filter(
+            ee.Filter.inList(config["name_property"], config["filter_names"])
+        )
+    elif config["filter_codes"]:
+        admin = admin.filter(
+            ee.Filter.inList(config["code_property"], config["filter_codes"])
+        )
+
+    names = admin.aggregate_array(config["name_property"])
+    codes = admin.aggregate_array(config["code_property"])
+    names, codes = await gee_interface.get_info_async(ee.List([names, codes]))
+
+    return {name: str(code) for name, code in zip(names, codes)}
+
+
+def build_report(
+    csv_file: Pathlike, report_folder: Pathlike, config: dict, ref_area: str
+) -> str:
+    """Parse the results of a country and write its report, runs in a worker.
+
+    Args:
+        ref_area: code of the country (code_property), the REF_AREA of the
+            tables and of the partitions of the Parquet store
+    """
+
+    Path(report_folder).mkdir(parents=True, exist_ok=True)
+
+    results = cs.read_from_csv(csv_file)
+    years = config["years"]
+    indicator = config["indicator"]
+
+    return cs.export_reports(
+        results,
+        cs.get_reporting_years(years, "sub_a") if indicator == "sub_a" else None,
+        years if indicator == "sub_b" else None,
+        geo_area_name=Path(report_folder).name,
+        ref_area=ref_area,
+        source_detail=" ",
+        transition_matrix=config["transition_matrix"],
+        report_folder=report_folder,
+        session_id="",
+        which=indicator,
+        save_store=config["parquet_store"],
+    )
+
+
+async def run_batch(
+    config: dict,
+    gee_interface: GEEInterface,
+    drive_interface: GDriveInterface,
+    retry_failed: bool = False,
+    on_change: Optional[Callable[[str, dict], None]] = None,
+    executor: Optional[Executor] = None,
+) -> Manifest:
+    """Export, download and report the indicator of all the countries.
+
+    The manifest (output_dir/manifest.json) is read first: reported countries
+    are skipped, submitted ones are only polled and downloaded ones are only
+    reported, so an interrupted run can be started again with the same config.
+
+    Args:
+        config: see DEFAULT_CONFIG and read_config
+        retry_failed: submit the failed countries again
+        on_change: called with the name and the entry of a country every time
+            its state changes
+        executor: executor building the reports, left open for the caller. A
+            process pool of n_workers is created by default
+    """
+
+    output_dir = Path(config["output_dir"])
+    stats_dir = output_dir / "raw_stats"
+    reports_dir = output_dir / "raw_reports"
+    stats_dir.mkdir(parents=True, exist_ok=True)
+    reports_dir.mkdir(parents=True, exist_ok=True)
+
+    manifest = Manifest(output_dir / "manifest.json")
+    countries = await get_countries(gee_interface, config)
+    manifest.add(countries)
+
+    if retry_failed:
+        for name in manifest.with_state("failed"):
+            manifest.update(name, state="pending", error=None)
+
+    years = get_years(config)
+    remap_matrix = cs.map_matrix_to_dict(config["remap_matrix"])
+    selectors = ["process_id"]
+    selectors += ["sub_a"] if config["indicator"] == "sub_a" else SUB_B_CATEGORIES
+    if config["layout"] == "long":
+        selectors = LONG_COLUMNS
+
+    def update(name: str, **fields) -> None:
+        entry = manifest.update(name, **fields)
+        log.info(f"{name}: {entry['state']}")
+
+        if on_change:
+            on_change(name, entry)
+
+    async def submit(name: str) -> None:
+        aoi = ee.FeatureCollection(config["admin_asset"]).filter(
+            ee.Filter.eq(config["name_property"], name)
+        )
+        task_name = sanitize_description(f"{config['indicator']}_{name}")
+
+        process = get_country_process(aoi, years, remap_matrix, config)
+        if config["layout"] == "long":
+            process = to_long_collection(process)
+
+        try:
+            task = await gee_interface.export_table_to_drive_async(
+                collection=process,
+                description=task_name,
+                filename_prefix=task_name,
+                folder=config["drive_folder"],
+                file_format="CSV",
+                selectors=selectors,
+            )
+        except Exception as e:
+            update(name, state="failed", error=f"Export failed: {e}")
+            return
+
+        update(
+            name,
+            state="submitted",
+            task_id=task.id,
+            task_name=task_name,
+            code=countries[name],
+            submitted=datetime.now().isoformat(timespec="seconds"),
+        )
+
+    async def check(name: str) -> None:
+        entry = manifest.entries[name]
+
+        try:
+            task = await gee_interface.get_task_async(entry["task_id"])
+        except Exception as e:
+            # keep the task submitted, it will be checked again
+            log.warning(f"{name}: the task state can't be read: {e}")
+            return
+
+        state = task.metadata.state if task else "FAILED"
+
+        if state in FAILED_STATES:
+            error = getattr(task, "error", None) or f"The task is {state}"
+            update(name, state="failed", error=str(error))
+            return
+
+        if state not in COMPLETED_STATES:
+            return
+
+        csv_file = stats_dir / f"{entry['task_name']}.csv"
+        try:
+            await asyncio.to_thread(
+                drive_interface.download_file, csv_file.name, csv_file
+            )
+        except Exception as e:
+            log.warning(f"{name}: the results can't be downloaded: {e}")
+            return
+
+        if not csv_file.exists():
+            # the file can take a while to appear in Drive
+            log.warning(f"{name}: {csv_file.name} is not in Drive yet")
+            return
+
+        update(name, state="downloaded", csv=str(csv_file))
+        start_report(name)
+
+    async def report(name: str) -> None:
+        entry = manifest.entries[name]
+        report_folder = reports_dir / sanitize_description(name)
+        csv_file = entry["csv"]
+        # manifests written before the codes were kept only have the names
+        code = entry.get("code") or countries.get(name, "")
+
+        try:
+            report_file = await loop.run_in_executor(
+                executor, build_report, csv_file, report_folder, config, code
+            )
+        except Exception as e:
+            update(name, state="failed", error=f"Report failed: {e}")
+            return
+
+        update(name, state="reported", report=report_file)
+
+    loop = asyncio.get_running_loop()
+    reports: List[asyncio.Task] = []
+
+    def start_report(name: str) -> None:
+        reports.append(asyncio.ensure_future(report(name)))
+
+    # Only the pool created here is shut down, a given executor is left open
+    pool = (
+        nullcontext(executor) if executor else ProcessPoolExecutor(config["n_workers"])
+    )
+    with pool as executor:
+        for name in manifest.with_state("downloaded"):
+            start_report(name)
+
+        while manifest.with_state("pending", "submitted"):
+            # Keep at most max_running tasks on the GEE servers
+            n_free = config["max_running"] - len(manifest.with_state("submitted"))
+            pending = manifest.with_state("pending")[: max(n_free, 0)]
+            await asyncio.gather(*[submit(name) for name in pending])
+
+            await asyncio.gather(
+                *[check(name) for name in manifest.with_state("submitted")]
+            )
+
+            if manifest.with_state("pending", "submitted"):
+                await asyncio.sleep(config["poll_interval"])
+
+        await asyncio.gather(*reports)
+
+    log.info(f"Batch finished: {manifest.summary()}")
+
+    return manifest
+
+
+def get_report_files(config: dict) -> Dict[str, str]:
+    """Return the reports of the countries reported so far"""
+
+    manifest = Manifest(Path(config["output_dir"]) / "manifest.json")
+
+    return {
+        name: manifest.entries[name]["report"]
+        for name in manifest.with_state("reported")
+    }
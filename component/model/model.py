@@ -152,6 +152,9 @@ class MgciModel(Model):
         """
         self.sepal_client = sepal_client
         self.results: Dict = {}
+
+        # Parsed results shared by the dashboard and the reports
+        self.results_cache = cs.ResultsCache(self.results)
         self.aoi_view = aoi_view
         self.aoi_model = aoi_view.model
 
@@ -167,6 +170,12 @@ class MgciModel(Model):
 
         self.aoi_view.observe(self.on_aoi_change, "updated")
 
+    @observe("results")
+    def on_results_change(self, change):
+        """Drop the parsed results when new results are loaded"""
+
+        self.results_cache = cs.ResultsCache(change["new"])
+
     def on_aoi_change(self, *args):
         """Callback to update the model when the AOI changes"""
 
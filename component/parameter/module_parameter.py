@@ -90,10 +90,22 @@ UNITS = {
     "sqkm": [1000000, "square kilometers"],
 }
 
+# Simplified GAUL 2024 admin units, used by the administrative AOI selection
+GAUL_DATABASE = Path(__file__).parent / "gaul_2024_database.csv"
 
-LC_COLOR = pd.read_csv(LC_CLASSES, index_col=0)
 
-transition_degradation_matrix = pd.read_csv(TRANSITION_DEGRADATION_MATRIX_FILE)
+def __getattr__(name: str):
+    """Read the former import time tables on first access, see parameter.tables"""
+
+    from component.parameter import tables
+
+    if name == "LC_COLOR":
+        return tables.get_lc_color()
+
+    if name == "transition_degradation_matrix":
+        return tables.get_transition_degradation_matrix()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 DECODE = {
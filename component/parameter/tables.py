@@ -0,0 +1,108 @@
+"""Default parameter tables, read on first use.
+
+The csv files of the parameter folder used to be read when their modules were
+imported. They are now read by the first call of their getter and cached for
+the process. Every getter returns its own copy of the table, so a session
+changing it (e.g. adding a column) never changes the table of the others. The
+lookups built from the tables are read-only mappings, computed once.
+"""
+
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping
+
+import pandas as pd
+
+import component.parameter.module_parameter as param
+
+__all__ = [
+    "get_belt_table",
+    "get_lc_classes",
+    "get_lc_color",
+    "get_lc_map_matrix",
+    "get_transition_degradation_matrix",
+    "get_gaul_table",
+    "get_belt_desc",
+    "get_lc_desc",
+    "get_green_lookup",
+    "get_degradation_impacts",
+]
+
+
+@lru_cache(maxsize=None)
+def read_table(path: str, index_col=None) -> pd.DataFrame:
+    """Read a parameter csv once, the cached table must never be returned as is"""
+
+    return pd.read_csv(path, index_col=index_col)
+
+
+def get_belt_table() -> pd.DataFrame:
+    """Return the bioclimatic belts classes and description"""
+
+    return read_table(str(param.BIOBELTS_DESC)).copy()
+
+
+def get_lc_classes() -> pd.DataFrame:
+    """Return the fixed land cover classes, description and colors"""
+
+    return read_table(str(param.LC_CLASSES)).copy()
+
+
+def get_lc_color() -> pd.DataFrame:
+    """Return the fixed land cover classes indexed by their code"""
+
+    return read_table(str(param.LC_CLASSES), index_col=0).copy()
+
+
+def get_lc_map_matrix() -> pd.DataFrame:
+    """Return the default translation matrix between ESA and MGCI classes"""
+
+    return read_table(str(param.LC_MAP_MATRIX)).copy()
+
+
+def get_transition_degradation_matrix() -> pd.DataFrame:
+    """Return the impact of the transitions between degradation states"""
+
+    return read_table(str(param.TRANSITION_DEGRADATION_MATRIX_FILE)).copy()
+
+
+def get_gaul_table() -> pd.DataFrame:
+    """Return the GAUL 2024 admin units names and codes"""
+
+    return read_table(str(param.GAUL_DATABASE)).copy()
+
+
+@lru_cache(maxsize=None)
+def get_belt_desc() -> Mapping[int, str]:
+    """Return the bioclimatic belt description by belt_class"""
+
+    table = read_table(str(param.BIOBELTS_DESC))
+
+    return MappingProxyType(dict(zip(table.belt_class, table.desc)))
+
+
+@lru_cache(maxsize=None)
+def get_lc_desc() -> Mapping[int, str]:
+    """Return the land cover description by lc_class"""
+
+    table = read_table(str(param.LC_CLASSES))
+
+    return MappingProxyType(dict(zip(table.lc_class, table.desc)))
+
+
+@lru_cache(maxsize=None)
+def get_green_lookup() -> Mapping[int, int]:
+    """Return the green (1) / non-green (0) flag by target land cover class"""
+
+    table = read_table(str(param.LC_MAP_MATRIX)).drop_duplicates("to_code")
+
+    return MappingProxyType(dict(zip(table.to_code, table.green)))
+
+
+@lru_cache(maxsize=None)
+def get_degradation_impacts() -> Mapping[int, int]:
+    """Return the impact_code of every transition between degradation states"""
+
+    table = read_table(str(param.TRANSITION_DEGRADATION_MATRIX_FILE))
+
+    return MappingProxyType(dict(zip(table.transition, table.impact_code)))
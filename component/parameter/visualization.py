@@ -1,7 +1,4 @@
-from component.parameter.module_parameter import LC_CLASSES
-import pandas as pd
-
-df = pd.read_csv(LC_CLASSES, header=0)
+import component.parameter.tables as tables
 
 
 degradation = {
@@ -20,18 +17,24 @@ degradation_legend = {
     label: color for label, color in zip(degrad_label.values(), degradation["palette"])
 }
 
-land_cover = {"max": len(df), "min": 1, "palette": list(df.color.tolist())}
-land_cover_legend = {
-    label: color for label, color in zip(df.desc.tolist(), df.color.tolist())
-}
 
+def get_vis_params(layer: str) -> dict:
+    """Return the visualization parameters of a layer: land_cover or degradation"""
 
-VIS_PARAMS = {
-    "land_cover": land_cover,
-    "degradation": degradation,
-}
+    if layer == "land_cover":
+        df = tables.get_lc_classes()
+        return {"max": len(df), "min": 1, "palette": list(df.color.tolist())}
 
-LEGENDS = {
-    "land_cover": land_cover_legend,
-    "degradation": degradation_legend,
-}
+    return dict(degradation)
+
+
+def get_legend(layer: str) -> dict:
+    """Return the legend (label: color) of a layer: land_cover or degradation"""
+
+    if layer == "land_cover":
+        df = tables.get_lc_classes()
+        return {
+            label: color for label, color in zip(df.desc.tolist(), df.color.tolist())
+        }
+
+    return dict(degradation_legend)
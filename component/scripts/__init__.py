@@ -1 +1,16 @@
-from .scripts import *
+from importlib import import_module
+
+
+def __getattr__(name: str):
+    """Expose the helpers of scripts.py, imported on first access so importing a
+    single module of the package stays cheap"""
+
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    scripts = import_module("component.scripts.scripts")
+
+    try:
+        return getattr(scripts, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
@@ -0,0 +1,418 @@
+"""Streaming accumulation of grouped areas over the internal blocks of rasters.
+
+Rasters are read block by block (see iter_block_windows), every block is
+remapped/coded and reduced to a small (biobelt, class) histogram that is merged
+in an AreaAccumulator. Peak memory only depends on the block size, not on the
+size of the area of interest.
+"""
+
+import threading
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from os import cpu_count
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import rasterio as rio
+from rasterio.enums import Resampling
+from rasterio.windows import Window
+
+from component.types import Pathlike, SubItem
+
+__all__ = [
+    "AreaAccumulator",
+    "get_block_shape",
+    "get_unique_values",
+    "Lookup",
+    "iter_block_windows",
+    "iter_blocks",
+    "preview_unique_values",
+    "snap_window",
+]
+
+MIN_ROWS = 256
+"""int: minimum number of rows read at once from rasters stored in strips"""
+
+MAX_DENSE_BINS = 1 << 22
+"""int: largest number of bins reduced with a dense np.bincount, above np.unique
+is used to find the groups first"""
+
+PREVIEW_SIZE = 1024
+"""int: largest side (pixels) of the decimated read used to preview the classes"""
+
+Sums = Dict[Tuple[int, int], float]
+"""Area grouped by (biobelt, class)"""
+
+
+def get_block_shape(src, min_rows: int = MIN_ROWS) -> Tuple[int, int]:
+    """Return the (rows, cols) of the windows used to read a raster by blocks.
+
+    Tiled rasters are read tile by tile, rasters stored in strips are read by
+    groups of strips of at least min_rows rows.
+
+    Args:
+        src (rio.DatasetReader): open raster
+        min_rows: minimum height of the windows of striped rasters
+    """
+
+    rows, cols = src.block_shapes[0]
+
+    if cols >= src.width and rows < min_rows:
+        rows *= int(np.ceil(min_rows / rows))
+
+    return rows, cols
+
+
+def iter_block_windows(
+    height: int,
+    width: int,
+    block_shape: Tuple[int, int],
+    window: Optional[Window] = None,
+) -> Iterator[Window]:
+    """Yield the blocks of a raster that intersect the window.
+
+    Blocks are aligned on the internal blocks of the raster, so every read
+    decodes whole blocks, and clipped to the window.
+
+    Args:
+        height, width: shape of the raster
+        block_shape: (rows, cols) of the blocks, see get_block_shape
+        window: area to read, the whole raster by default
+    """
+
+    window = window or Window(0, 0, width, height)
+    rows, cols = block_shape
+
+    row_start, col_start = int(window.row_off), int(window.col_off)
+    row_stop = min(int(window.row_off + window.height), height)
+    col_stop = min(int(window.col_off + window.width), width)
+
+    for row in range(row_start // rows * rows, row_stop, rows):
+        for col in range(col_start // cols * cols, col_stop, cols):
+            row_off, col_off = max(row, row_start), max(col, col_start)
+            yield Window(
+                col_off,
+                row_off,
+                min(col + cols, col_stop) - col_off,
+                min(row + rows, row_stop) - row_off,
+            )
+
+
+def iter_blocks(
+    paths: List[Pathlike],
+    window: Optional[Window] = None,
+    block_shape: Optional[Tuple[int, int]] = None,
+) -> Iterator[Tuple[Window, List[np.ma.MaskedArray]]]:
+    """Read rasters sharing the same grid block by block.
+
+    Args:
+        paths: rasters to read, the blocks are the ones of the first raster
+        window: area to read, the whole raster by default
+        block_shape: (rows, cols) of the blocks, see get_block_shape
+
+    Yield:
+        the window of the block and the masked first band of every raster
+    """
+
+    srcs = [rio.open(path) for path in paths]
+
+    try:
+        src = srcs[0]
+        block_shape = block_shape or get_block_shape(src)
+
+        for block in iter_block_windows(src.height, src.width, block_shape, window):
+            yield block, [src.read(1, window=block, masked=True) for src in srcs]
+    finally:
+        for src in srcs:
+            src.close()
+
+
+def snap_window(window: Window, height: int, width: int) -> Window:
+    """Return the whole pixels window covering a (float) window, clipped to the
+    raster, so it can be read without resampling"""
+
+    col_off, row_off = int(np.floor(window.col_off)), int(np.floor(window.row_off))
+    col_stop = int(np.ceil(window.col_off + window.width))
+    row_stop = int(np.ceil(window.row_off + window.height))
+
+    return Window(
+        col_off, row_off, col_stop - col_off, row_stop - row_off
+    ).intersection(Window(0, 0, width, height))
+
+
+class Lookup:
+    """Remap blocks of a raster with a dense lookup array.
+
+    The output has the narrowest dtype holding the new values and the default.
+    Blocks of 8 or 16 bits integers are remapped with a lookup array covering
+    their whole range, indexed by the raw (unsigned) bits, so negative codes
+    don't need any offset. Other dtypes use a lookup array from the smallest to
+    the largest code of the matrix.
+
+    Args:
+        matrix: {old_value: new_value}, values not in the matrix get the default
+        dtype: dtype of the blocks to remap
+        default: value of the codes not in the matrix
+    """
+
+    def __init__(self, matrix: Dict[int, int], dtype: np.dtype, default: int = 0):
+        dtype = np.dtype(dtype)
+        from_ = np.fromiter(matrix.keys(), dtype=np.int64, count=len(matrix))
+        to_ = np.fromiter(matrix.values(), dtype=np.int64, count=len(matrix))
+        bounds = [int(to_.min(initial=default)), int(to_.max(initial=default))]
+
+        self.dtype = next(
+            np.dtype(out)
+            for out in ["u1", "i1", "u2", "i2", "u4", "i4", "i8"]
+            if np.iinfo(out).min <= bounds[0] and bounds[1] <= np.iinfo(out).max
+        )
+        self.default = default
+        self.index_dtype = None
+        self.offset = 0
+
+        if dtype.kind in "iu" and dtype.itemsize <= 2:
+            bits = np.iinfo(dtype).bits
+            inside = (from_ >= np.iinfo(dtype).min) & (from_ <= np.iinfo(dtype).max)
+
+            self.index_dtype = np.dtype(f"u{dtype.itemsize}")
+            self.lut = np.full(1 << bits, default, dtype=self.dtype)
+            self.lut[from_[inside] & ((1 << bits) - 1)] = to_[inside]
+        else:
+            self.offset = int(from_.min(initial=0))
+            size = int(from_.max(initial=0)) - self.offset + 1
+            self.lut = np.full(size, default, dtype=self.dtype)
+            self.lut[from_ - self.offset] = to_
+
+    def __call__(self, values: np.ndarray) -> np.ndarray:
+        if self.index_dtype is not None:
+            return self.lut[values.view(self.index_dtype)]
+
+        index = values.astype(np.int64) - self.offset
+        inside = (index >= 0) & (index < self.lut.size)
+
+        remapped = np.full(values.shape, self.default, dtype=self.dtype)
+        remapped[inside] = self.lut[index[inside]]
+
+        return remapped
+
+
+class AreaAccumulator:
+    """Incremental area histograms grouped by (biobelt, class) for several bands.
+
+    Each call to add reduces a block to a few groups with np.bincount and merges
+    them with the previous blocks. Accumulators of different workers can be
+    merged together.
+    """
+
+    def __init__(self, names: Optional[List[str]] = None):
+        self.sums: Dict[str, Sums] = {
+            name: defaultdict(float) for name in (names or [])
+        }
+
+    def add(
+        self,
+        name: str,
+        biobelt: np.ndarray,
+        values: np.ndarray,
+        area: np.ndarray,
+        valid: np.ndarray,
+    ) -> "AreaAccumulator":
+        """Add the area of the valid pixels of a block to the band histogram.
+
+        Args:
+            name: band of the histogram, i.e. "sub_a" or a sub B category
+            biobelt: bioclimatic belt of the pixels
+            values: class (or transition code) of the pixels, non negative
+            area: area of the pixels, a scalar or an array
+            valid: pixels to take into account
+        """
+
+        sums = self.sums.setdefault(name, defaultdict(float))
+
+        biobelt = biobelt[valid].astype(np.int64)
+        values = values[valid].astype(np.int64)
+        area = np.broadcast_to(area, valid.shape)[valid]
+
+        if not values.size:
+            return self
+
+        n_values = int(values.max()) + 1
+        n_bins = (int(biobelt.max()) + 1) * n_values
+
+        codes = biobelt * n_values + values
+
+        if n_bins <= MAX_DENSE_BINS:
+            keys = np.flatnonzero(np.bincount(codes, minlength=n_bins))
+            totals = np.bincount(codes, weights=area, minlength=n_bins)[keys]
+        else:
+            keys, inverse = np.unique(codes, return_inverse=True)
+            totals = np.bincount(inverse, weights=area)
+
+        for belt, value, total in zip(keys // n_values, keys % n_values, totals):
+            sums[(int(belt), int(value))] += float(total)
+
+        return self
+
+    def merge(self, other: "AreaAccumulator") -> "AreaAccumulator":
+        """Add the histograms of another accumulator to this one"""
+
+        for name, other_sums in other.sums.items():
+            sums = self.sums.setdefault(name, defaultdict(float))
+            for key, total in other_sums.items():
+                sums[key] += total
+
+        return self
+
+    def scale(self, factor: float) -> "AreaAccumulator":
+        """Divide all the areas by the factor, i.e. to convert them to km2"""
+
+        for sums in self.sums.values():
+            for key in sums:
+                sums[key] /= factor
+
+        return self
+
+    def to_groups(self, name: str) -> List[SubItem]:
+        """Return the histogram of a band with the structure of the GEE grouped
+        reducers: [{"biobelt": 1, "groups": [{"lc": 1, "sum": 0.1}, ...]}, ...]"""
+
+        belts = defaultdict(list)
+        for (belt, value), total in sorted(self.sums.get(name, {}).items()):
+            belts[belt].append({"lc": value, "sum": total})
+
+        return [{"biobelt": belt, "groups": groups} for belt, groups in belts.items()]
+
+    def __getstate__(self):
+        # defaultdicts are sent to (and back from) the workers as plain dicts
+        return {name: dict(sums) for name, sums in self.sums.items()}
+
+    def __setstate__(self, state):
+        self.sums = {name: defaultdict(float, sums) for name, sums in state.items()}
+
+
+def block_unique(values: np.ndarray) -> np.ndarray:
+    """Return the values found in a block: a presence array over the whole range
+    of 8 or 16 bits integers (indexed by their raw bits), the sorted unique
+    values otherwise"""
+
+    if values.dtype.kind in "iu" and values.dtype.itemsize <= 2:
+        bits = values.dtype.itemsize * 8
+        index = values.view(f"u{values.dtype.itemsize}").ravel()
+
+        return np.bincount(index, minlength=1 << bits).astype(bool)
+
+    return np.unique(values)
+
+
+def fold_unique(found: Optional[np.ndarray], values: np.ndarray) -> np.ndarray:
+    """Add an output of block_unique to the values found so far, in place for
+    the presence arrays"""
+
+    if found is None:
+        return values
+
+    if values.dtype == bool:
+        return np.logical_or(found, values, out=found)
+
+    return np.union1d(found, values)
+
+
+def merge_unique(found: List[np.ndarray], dtype: np.dtype) -> List[int]:
+    """Merge the outputs of block_unique into the sorted list of the values"""
+
+    dtype = np.dtype(dtype)
+
+    if dtype.kind in "iu" and dtype.itemsize <= 2:
+        present = np.logical_or.reduce(found)
+        values = np.flatnonzero(present).astype(f"u{dtype.itemsize}").view(dtype)
+    else:
+        values = np.unique(np.concatenate(found))
+
+    return np.sort(values).tolist()
+
+
+def get_unique_values(
+    path: Pathlike,
+    band: int = 1,
+    window: Optional[Window] = None,
+    n_threads: Optional[int] = None,
+) -> List[int]:
+    """Return the sorted values of a raster band, scanned block by block.
+
+    Blocks are read and reduced by a pool of threads (GDAL and NumPy release the
+    GIL), every thread with its own dataset. 8 and 16 bits integers, negative
+    ones included, are reduced to presence arrays with np.bincount, other dtypes
+    with np.unique. The result of every block is folded in a single array as
+    soon as it's done, and only a few blocks are submitted ahead, so the memory
+    doesn't grow with the number of blocks.
+
+    Args:
+        path: raster file
+        band: band to scan
+        window: area to scan, the whole raster by default
+        n_threads: number of threads, one per CPU by default
+    """
+
+    local = threading.local()
+    srcs = []
+
+    def scan(block: Window) -> np.ndarray:
+        if not hasattr(local, "src"):
+            local.src = rio.open(path)
+            srcs.append(local.src)
+
+        return block_unique(local.src.read(band, window=block))
+
+    try:
+        with rio.open(path) as src:
+            dtype = src.dtypes[band - 1]
+            blocks = iter_block_windows(
+                src.height, src.width, get_block_shape(src), window
+            )
+
+        found = None
+        n_threads = n_threads or cpu_count()
+        with ThreadPoolExecutor(n_threads) as executor:
+            pending = {
+                executor.submit(scan, block) for block in islice(blocks, 2 * n_threads)
+            }
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    found = fold_unique(found, future.result())
+                pending |= {
+                    executor.submit(scan, block) for block in islice(blocks, len(done))
+                }
+    finally:
+        for src in srcs:
+            src.close()
+
+    return merge_unique([found], dtype) if found is not None else []
+
+
+def preview_unique_values(
+    path: Pathlike,
+    band: int = 1,
+    window: Optional[Window] = None,
+    max_size: int = PREVIEW_SIZE,
+) -> List[int]:
+    """Return the values of a decimated (nearest) read of the raster band.
+
+    GDAL reads the closest overview when the raster has some, so the preview is
+    instant but can miss the rare classes, use get_unique_values to find them
+    all.
+    """
+
+    with rio.open(path) as src:
+        window = window or Window(0, 0, src.width, src.height)
+        factor = max(window.height, window.width) / max_size
+        out_shape = (
+            max(1, int(window.height / max(factor, 1))),
+            max(1, int(window.width / max(factor, 1))),
+        )
+        values = src.read(
+            band, window=window, out_shape=out_shape, resampling=Resampling.nearest
+        )
+
+    return merge_unique([block_unique(values)], values.dtype)
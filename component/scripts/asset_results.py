@@ -0,0 +1,130 @@
+"""Background results kept in an Earth Engine table asset.
+
+Instead of exporting the results to Drive, downloading the csv and parsing the
+string literals of its cells (read_from_csv), the collection is exported to a
+table asset where the results of every feature are a JSON string. They are read
+back with getInfo, a page of features at a time, straight into a ResultsDict.
+"""
+
+import asyncio
+import json
+import logging
+from typing import List
+
+import ee
+from pysepal.scripts.gee_interface import GEEInterface
+from pysepal.scripts.warning import SepalWarning
+
+from component.scripts.task_store import COMPLETED_STATES, FAILED_STATES
+from component.types import ResultsDict
+
+log = logging.getLogger("MGCI.scripts.asset_results")
+
+__all__ = [
+    "RESULTS_PROPERTY",
+    "to_asset_collection",
+    "get_asset_id",
+    "read_from_asset",
+    "results_from_task",
+]
+
+RESULTS_PROPERTY = "results"
+"""str: property holding the JSON encoded results of a feature"""
+
+PAGE_SIZE = 20
+"""int: number of features read by every getInfo request"""
+
+
+def to_asset_collection(process: ee.FeatureCollection) -> ee.FeatureCollection:
+    """Encode the results of every feature of the background process as a JSON
+    string, so the nested dictionaries and lists come back untouched.
+
+    Args:
+        process: features with a process_id and the results of every category
+            as returned by perform_calculation
+    """
+
+    def encode(feature):
+        feature = ee.Feature(feature)
+        results = feature.toDictionary().remove(["process_id"], True)
+
+        return ee.Feature(
+            None,
+            {
+                "process_id": feature.get("process_id"),
+                RESULTS_PROPERTY: ee.String.encodeJSON(results),
+            },
+        )
+
+    return process.map(encode)
+
+
+async def get_asset_id(task_name: str, gee_interface: GEEInterface) -> str:
+    """Return the id of the table asset of a task, in the user assets folder"""
+
+    folder = await gee_interface.get_folder_async()
+
+    return f"{folder.rstrip('/')}/{task_name}"
+
+
+def parse_features(features: List[dict]) -> ResultsDict:
+    """Decode the properties of the asset features, see to_asset_collection"""
+
+    return {
+        str(feature["process_id"]): json.loads(feature[RESULTS_PROPERTY])
+        for feature in features
+    }
+
+
+async def read_from_asset(
+    asset_id: str, gee_interface: GEEInterface, page_size: int = PAGE_SIZE
+) -> ResultsDict:
+    """Read the results of a table asset written by a background task.
+
+    The features are requested by pages of page_size, so a single request never
+    hits the getInfo size limits.
+    """
+
+    collection = ee.FeatureCollection(asset_id)
+    size = await gee_interface.get_info_async(collection.size())
+
+    pages = [
+        collection.toList(page_size, offset).map(
+            lambda feature: ee.Feature(feature).toDictionary(
+                ["process_id", RESULTS_PROPERTY]
+            )
+        )
+        for offset in range(0, size, page_size)
+    ]
+    log.debug(f"Reading {size} features of {asset_id} in {len(pages)} pages")
+
+    features = await asyncio.gather(
+        *[gee_interface.get_info_async(page) for page in pages]
+    )
+
+    return parse_features([feature for page in features for feature in page])
+
+
+async def results_from_task(
+    task_id: str, asset_id: str, gee_interface: GEEInterface
+) -> ResultsDict:
+    """Read the results of a task exported to an asset, once it's completed
+
+    Args:
+        task_id (str): id of the task tasked in GEE.
+        asset_id (str): table asset written by the task.
+    """
+
+    task = await gee_interface.get_task_async(task_id.strip())
+    state = task.metadata.state if task else "FAILED"
+
+    log.debug(f"Task {task_id} state: {state}")
+
+    if state in COMPLETED_STATES:
+        return await read_from_asset(asset_id, gee_interface)
+
+    elif state in FAILED_STATES:
+        raise Exception(f"The task {asset_id.split('/')[-1]} failed.")
+
+    else:
+        raise SepalWarning(f"The task '{asset_id.split('/')[-1]}' state is: {state}.")
@@ -0,0 +1,103 @@
+"""Combine the reports of many countries in a single workbook.
+
+The reports are read in worker processes, their sheets are collected in lists
+and concatenated once per sheet, then streamed with report_writer. Reports
+exported with the Parquet store of their folder (see scripts.export_reports)
+are read from it instead of parsing the xlsx files.
+"""
+
+import logging
+from concurrent.futures import Executor, ProcessPoolExecutor
+from contextlib import nullcontext
+from functools import partial
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from component.scripts.report_writer import (
+    STORE_FOLDER,
+    read_report_store,
+    write_reports,
+)
+from component.types import Pathlike
+
+log = logging.getLogger("MGCI.scripts.consolidate")
+
+__all__ = ["read_report", "consolidate_reports"]
+
+CHUNKSIZE = 8
+"""int: reports read by a worker at once"""
+
+
+def read_report(
+    report_file: Pathlike, num_sheets: Optional[int] = None
+) -> Dict[str, pd.DataFrame]:
+    """Read the first num_sheets sheets of a report, from the Parquet store of
+    its folder when the report has been written in it"""
+
+    report_file = Path(report_file)
+    store_folder = report_file.parent / STORE_FOLDER
+
+    sheets = {}
+    if store_folder.is_dir():
+        sheets = read_report_store(store_folder, report_file.stem)
+
+    if not sheets:
+        # Keep the codes (e.g. "004") and the NA values as written, as they
+        # are read from the store
+        with pd.ExcelFile(report_file, engine="openpyxl") as xls:
+            sheets = {
+                sheet_name: xls.parse(
+                    sheet_name,
+                    dtype={"REF_AREA": str},
+                    keep_default_na=False,
+                )
+                for sheet_name in xls.sheet_names[:num_sheets]
+            }
+
+    return dict(list(sheets.items())[:num_sheets])
+
+
+def consolidate_reports(
+    report_files: Iterable[Pathlike],
+    output_file: Pathlike,
+    num_sheets: Optional[int] = None,
+    n_workers: Optional[int] = None,
+    executor: Optional[Executor] = None,
+) -> Path:
+    """Write the sheets of all the reports one after the other in a workbook.
+
+    Args:
+        report_files: xlsx reports, the sheets are taken in their order
+        output_file: consolidated xlsx file
+        num_sheets: number of sheets taken from every report, all by default
+        n_workers: number of processes reading the reports
+        executor: executor reading the reports, left open for the caller. A
+            process pool of n_workers is created by default
+    """
+
+    report_files = list(report_files)
+    if not report_files:
+        raise ValueError("There are no reports to consolidate")
+
+    frames: Dict[str, List[pd.DataFrame]] = {}
+    read = partial(read_report, num_sheets=num_sheets)
+
+    # Only the pool created here is shut down, a given executor is left open
+    pool = nullcontext(executor) if executor else ProcessPoolExecutor(n_workers)
+    with pool as executor:
+        reports = executor.map(read, report_files, chunksize=CHUNKSIZE)
+
+        for i, (report_file, sheets) in enumerate(zip(report_files, reports), 1):
+            for sheet_name, df in sheets.items():
+                frames.setdefault(sheet_name, []).append(df)
+
+            log.info(f"Processing {i}/{len(report_files)}: {report_file}")
+
+    sheets = {
+        sheet_name: pd.concat(dfs, ignore_index=True)
+        for sheet_name, dfs in frames.items()
+    }
+
+    return Path(write_reports(sheets, output_file))
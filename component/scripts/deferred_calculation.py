@@ -1,6 +1,6 @@
 import logging
 import json
-from typing import Union
+from typing import Dict, List, Optional, Union
 import asyncio
 import ee
 from pathlib import Path
@@ -8,14 +8,29 @@ from pathlib import Path
 from pysepal.scripts.gee_interface import GEEInterface
 
 import component.scripts as cs
-from component.types import ResultsDict, SubAYearDict, SubBYearDict
-from component.scripts.gee import reduce_regions
+from component.types import LONG_COLUMNS, ResultsDict, SubAYearDict, SubBYearDict
+from component.scripts.asset_results import (
+    RESULTS_PROPERTY,
+    get_asset_id,
+    to_asset_collection,
+)
+from component.scripts.task_store import TaskStore
+from component.scripts.gee import reduce_regions, to_long_collection
 import component.widget as cw
 from component.message import cm
 
 
 log = logging.getLogger("MGCI.scripts.deferred_calculation")
 
+RESOURCE_ERRORS = ("Computation timed out.", "User memory limit exceeded")
+"tuple: GEE errors raised when a computation is too big to be done on the fly"
+
+
+def is_resource_error(error: Exception) -> bool:
+    """Return True if the error comes from GEE time or memory limits"""
+
+    return any(msg in str(error) for msg in RESOURCE_ERRORS)
+
 
 class Logger:
     state = "info"
@@ -33,32 +48,65 @@ async def task_process(
     model_state: dict,
     sepal_client=None,
     gee_interface: GEEInterface = None,
+    task_store: Optional[TaskStore] = None,
+    destination: str = "drive",
+    layout: str = "nested",
 ) -> None:
     """Send the task to the GEE servers and process it in background. This will be
     neccessary when the process is timed out.
 
     It will return a file with the task name and the task id to track when the process is done.
     Also, it will return the current state of the model to a json file.
+
+    Args:
+        task_store: local store where the task is also recorded
+        destination: "drive" to export a csv file to Google Drive, "asset" to
+            export a table asset read back with asset_results.results_from_task
+        layout: layout of the Drive csv, "nested" keeps the results of a year in
+            a row, "long" writes one row per reduced group (see
+            gee.to_long_collection) which is read without parsing the cells
     """
 
     task_name = Path(f"{task_filepath.stem}")
+    task_data = {"name": str(task_name)}
+
+    if destination == "asset":
+        asset_id = await get_asset_id(str(task_name), gee_interface)
+        task = await gee_interface.export_table_to_asset_async(
+            collection=to_asset_collection(process),
+            asset_id=asset_id,
+            description=str(task_name),
+            selectors=["process_id", RESULTS_PROPERTY],
+        )
+        task_data.update(destination="asset", asset_id=asset_id)
+
+    elif layout == "long":
+        task = await gee_interface.export_table_to_drive_async(
+            collection=to_long_collection(process),
+            description=str(task_name),
+            filename_prefix=str(task_name),
+            file_format="CSV",
+            selectors=LONG_COLUMNS,
+        )
+        task_data.update(layout="long")
 
-    task = await gee_interface.export_table_to_drive_async(
-        **{
-            "collection": process,
-            "description": str(task_name),
-            "filename_prefix": str(task_name),
-            "file_format": "CSV",
-            "selectors": [
-                "process_id",
-                "sub_a",
-                "baseline_degradation",
-                "final_degradation",
-                "baseline_transition",
-                "report_transition",
-            ],
-        }
-    )
+    else:
+        task = await gee_interface.export_table_to_drive_async(
+            **{
+                "collection": process,
+                "description": str(task_name),
+                "filename_prefix": str(task_name),
+                "file_format": "CSV",
+                "selectors": [
+                    "process_id",
+                    "sub_a",
+                    "baseline_degradation",
+                    "final_degradation",
+                    "baseline_transition",
+                    "report_transition",
+                ],
+            }
+        )
 
     log.debug(f"Task {task_name} >>>>>>>>>>>>>>: {task}")
 
@@ -66,10 +114,13 @@ async def task_process(
 
     data = {
         "model_state": model_state,
-        "task": {"id": task.id, "name": str(task_name)},
+        "task": {"id": task.id, **task_data},
     }
     json_data = json.dumps(data, indent=4)
 
+    if task_store:
+        task_store.add_task_data(data, task_path)
+
     if sepal_client:
         # overwrite=True to match the local branch (open("w")); pysepal-api 409s otherwise
         return sepal_client.set_file(task_path, json_data, overwrite=True)
@@ -94,7 +145,21 @@ async def perform_calculation(
     background: bool = False,
     scale: int = None,
     test_time_out: bool = False,
+    batch: bool = False,
+    rsa_asset: Optional[Union[str, List[str]]] = None,
+    rsa_source: str = "on_the_fly",
 ) -> Union[ResultsDict, ee.FeatureCollection, None]:
+    """Compute the results of all the years on the fly or as a background task.
+
+    Args:
+        batch: pack all the years in a single ee.Dictionary and evaluate them
+            in one request. When the request hits the GEE time or memory limits
+            it is split in smaller batches, the calculation only falls back to
+            the background when a single year still fails.
+        rsa_asset: real surface area asset of the AOI (see gee.get_rsa_asset),
+            or precomputed tiles when rsa_source is "precomputed".
+        rsa_source: see gee.reduce_regions
+    """
     if not aoi:
         raise Exception(cm.error.no_aoi)
 
@@ -105,6 +170,21 @@ async def perform_calculation(
     tasks = {}
     all_succeeded = True
 
+    def get_process(year) -> ee.Dictionary:
+        """Return the reduce_regions process of the given year"""
+
+        return reduce_regions(
+            aoi,
+            cs.get_remap_matrix(year, remap_matrix_a, remap_matrix_b),
+            rsa,
+            dem,
+            year,
+            transition_matrix,
+            scale,
+            rsa_asset=rsa_asset,
+            rsa_source=rsa_source,
+        )
+
     # If background processing is requested, skip direct computation
     if background:
         for year in years:
@@ -115,25 +195,73 @@ async def perform_calculation(
             )
             logger.set_state("info", id_=process_id)
 
-            matrix = remap_matrix_a if len(years) == 1 else remap_matrix_b
-            process = reduce_regions(
-                aoi, matrix, rsa, dem, year, transition_matrix, scale
-            )
+            process = get_process(year)
             tasks[process_id] = ee.Feature(None, process).set("process_id", process_id)
 
         # Add a minimal await to maintain async behavior for callers
         await asyncio.sleep(0.1)
         return ee.FeatureCollection(list(tasks.values()))
 
+    async def process_batch(batch_years: List) -> Dict[str, dict]:
+        """Evaluate the years in a single request, splitting it on GEE limits"""
+
+        processes = {}
+        for year in batch_years:
+            process_id = cs.years_from_dict(year)
+            logger.set_msg(f"Calculating {process_id}...", id_=process_id)
+
+            processes[process_id] = get_process(year)
+
+        try:
+            if test_time_out:
+                raise Exception("Computation timed out.")
+
+            batch_result = await gee_interface.get_info_async(
+                ee.Dictionary(processes), tag="+".join(processes)
+            )
+
+        except Exception as e:
+            if not is_resource_error(e) or len(batch_years) == 1:
+                raise
+
+            log.debug(f"Splitting batch {list(processes)}: {e}")
+            half = len(batch_years) // 2
+
+            return await process_batches([batch_years[:half], batch_years[half:]])
+
+        for process_id in processes:
+            logger.set_msg(f"Calculating {process_id}... Done.", id_=process_id)
+            logger.set_state("success", id_=process_id)
+
+        # Keep the order of the years, GEE sorts the dictionary keys
+        return {process_id: batch_result[process_id] for process_id in processes}
+
+    async def process_batches(batches: List[List]) -> Dict[str, dict]:
+        """Evaluate the batches concurrently, every batch reports its years as
+        soon as it completes and the first failure cancels the other ones"""
+
+        batch_tasks = [asyncio.create_task(process_batch(b)) for b in batches]
+
+        try:
+            done, _ = await asyncio.wait(
+                batch_tasks, return_when=asyncio.FIRST_EXCEPTION
+            )
+            for task in done:
+                if task.exception():
+                    raise task.exception()
+        finally:
+            for task in batch_tasks:
+                task.cancel()
+            await asyncio.gather(*batch_tasks, return_exceptions=True)
+
+        return {k: v for task in batch_tasks for k, v in task.result().items()}
+
     # For non-background processing, create coroutines for all years
     async def process_year(year):
         process_id = cs.years_from_dict(year)
         logger.set_msg(f"Calculating {process_id}...", id_=process_id)
 
-        matrix = remap_matrix_a if len(years) == 1 else remap_matrix_b
-
-        # Call reduce_regions which is now synchronous
-        process = reduce_regions(aoi, matrix, rsa, dem, year, transition_matrix, scale)
+        process = get_process(year)
 
         if test_time_out:
             raise Exception("Computation timed out.")
@@ -147,17 +275,22 @@ async def perform_calculation(
 
         return process_id, result, process
 
-    # Create coroutines for all years
-    year_coros = [process_year(year) for year in years]
-
     # Use asyncio.gather to fail fast and handle cancellation properly
     try:
-        year_results = await asyncio.gather(*year_coros)
+        if batch:
+            results = await process_batch(list(years))
 
-        # If we get here, all tasks succeeded
-        for process_id, result_data, process in year_results:
-            results[process_id] = result_data
-            tasks[process_id] = ee.Feature(None, process).set("process_id", process_id)
+        else:
+            # Create coroutines for all years
+            year_coros = [process_year(year) for year in years]
+            year_results = await asyncio.gather(*year_coros)
+
+            # If we get here, all tasks succeeded
+            for process_id, result_data, process in year_results:
+                results[process_id] = result_data
+                tasks[process_id] = ee.Feature(None, process).set(
+                    "process_id", process_id
+                )
 
     except asyncio.CancelledError:
 
@@ -172,7 +305,7 @@ async def perform_calculation(
         raise
     except Exception as e:
         # At least one task failed, fall back to background processing
-        if "Computation timed out." in str(e) or "User memory limit exceeded" in str(e):
+        if is_resource_error(e):
             logger.set_msg(
                 f"Warning: At least one computation failed on the fly. All tasks will be processed on the background.",
                 id_="batch",
@@ -188,10 +321,7 @@ async def perform_calculation(
         tasks = {}
         for year in years:
             process_id = cs.years_from_dict(year)
-            matrix = remap_matrix_a if len(years) == 1 else remap_matrix_b
-            process = reduce_regions(
-                aoi, matrix, rsa, dem, year, transition_matrix, scale
-            )
+            process = get_process(year)
             tasks[process_id] = ee.Feature(None, process).set("process_id", process_id)
 
     except asyncio.CancelledError:
@@ -209,10 +339,7 @@ async def perform_calculation(
         tasks = {}
         for year in years:
             process_id = cs.years_from_dict(year)
-            matrix = remap_matrix_a if len(years) == 1 else remap_matrix_b
-            process = reduce_regions(
-                aoi, matrix, rsa, dem, year, transition_matrix, scale
-            )
+            process = get_process(year)
             tasks[process_id] = ee.Feature(None, process).set("process_id", process_id)
 
     if all_succeeded:
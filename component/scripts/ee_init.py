@@ -0,0 +1,56 @@
+"""Initialize Earth Engine once per process, without blocking the imports.
+
+Importing component used to call init_ee, a network round trip, before the
+app could do anything else. start_ee runs it in a background thread the first
+time it's called, the code about to build Earth Engine objects calls wait_ee,
+which only blocks while the initialization is still running.
+"""
+
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Optional
+
+from pysepal.scripts.utils import init_ee
+
+log = logging.getLogger("MGCI.scripts.ee_init")
+
+__all__ = ["start_ee", "wait_ee"]
+
+_lock = threading.Lock()
+_future: Optional[Future] = None
+
+
+def run_init_ee(future: Future) -> None:
+    """Initialize Earth Engine and set the result of the future"""
+
+    try:
+        init_ee()
+        future.set_result(None)
+
+    except Exception as e:
+        log.error(f"Earth Engine initialization failed: {e}")
+        future.set_exception(e)
+
+
+def start_ee() -> Future:
+    """Start the Earth Engine initialization in a background thread, only the
+    first call of the process starts it"""
+
+    global _future
+
+    with _lock:
+        if _future is None:
+            _future = Future()
+            threading.Thread(
+                target=run_init_ee, args=(_future,), name="ee-init", daemon=True
+            ).start()
+
+    return _future
+
+
+def wait_ee(timeout: Optional[float] = None) -> None:
+    """Wait for the Earth Engine initialization, started if needed, and raise its
+    error if it failed"""
+
+    start_ee().result(timeout)
@@ -1,22 +1,36 @@
 """Reduce land use/land cover image to bioclimatic belts regions using planimetric or real surface area"""
 
-from typing import Dict, List, Optional, Tuple
+import re
+from typing import Dict, List, Optional, Tuple, Union
 import ee
 import pandas as pd
 from pathlib import Path
 
 from component.scripts.file_handler import read_file
 from component.scripts.aoi_geometry import aoi_bbox
+from component.scripts.asset_results import get_asset_id
 from pysepal.scripts.gee_interface import GEEInterface
 
 import component.parameter.module_parameter as param
-from component.scripts.surface_area import get_real_surface_area
-from component.parameter.module_parameter import transition_degradation_matrix
-from component.scripts.gee_parse_reduce_regions import filter_groups, reduceGroups
+from component.scripts.surface_area import (
+    get_real_surface_area,
+    get_tile_real_surface_area,
+    read_real_surface_area,
+)
+from component.parameter.tables import get_degradation_impacts
+from component.scripts.gee_parse_reduce_regions import (
+    drop_lc_groups,
+    filter_groups,
+    reduceGroups,
+)
+from component.types import LONG_COLUMNS, SUB_B_CATEGORIES
 
 NO_DATA_VALUE = 0
 """Union[int, None]: No data value for the remap process"""
 
+MASKED_VALUE = -1
+"""int: value of the masked pixels when several bands are reduced together"""
+
 
 def no_remap(image: ee.Image, remap_matrix: Optional[dict] = None):
     """return remapped or raw image if there's a matrix"""
@@ -80,6 +94,72 @@ def reduce_by_regions(
     )
 
 
+def reduce_by_regions_combined(
+    image_area: ee.Image,
+    biobelt: ee.Image,
+    image: ee.Image,
+    bands: List[str],
+    aoi: ee.FeatureCollection,
+    scale: int,
+) -> ee.Dictionary:
+    """Same as :func:`reduce_by_regions` for several bands of ``image`` at once.
+
+    Every band gets its own grouped reducer and all of them are combined in a
+    single ``reduceRegion``, so the area image, the clip and the traversal of
+    the AOI are computed once instead of once per band. Masked pixels of each
+    band are set to ``MASKED_VALUE`` so that all the reducer inputs share the
+    same mask, their groups are dropped from the output.
+
+    Return:
+        ee.Dictionary with the band names as keys and the same groups as
+        :func:`reduce_by_regions` as values
+    """
+
+    def grouped_reducer():
+        return ee.Reducer.sum().group(1, "lc").group(2, "biobelt")
+
+    # The first reducer output is "groups", the following ones are prefixed
+    reducer = grouped_reducer()
+    output_keys = ["groups"]
+    for band in bands[1:]:
+        reducer = reducer.combine(grouped_reducer(), outputPrefix=f"{band}_")
+        output_keys.append(f"{band}_groups")
+
+    # Inputs are consumed in order: (area, band, biobelt) for every band
+    stack = ee.Image.cat(
+        *[
+            _grouped_area_stack(
+                image_area, biobelt, image.select(band).unmask(MASKED_VALUE)
+            ).rename([f"{band}_area", band, f"{band}_biobelt"])
+            for band in bands
+        ]
+    )
+
+    result = stack.clip(aoi).reduceRegion(
+        **{
+            "reducer": reducer,
+            "geometry": aoi_bbox(aoi),
+            "scale": scale,
+            "bestEffort": True,
+            "maxPixels": int(1e13),
+            "tileScale": 8,
+        }
+    )
+
+    def get_groups(key):
+        return (
+            ee.FeatureCollection([ee.Feature(None, {"groups": result.get(key)})])
+            .map(lambda feature: drop_lc_groups(feature, MASKED_VALUE))
+            .map(filter_groups)
+            .first()
+            .get("groups")
+        )
+
+    return ee.Dictionary(
+        {band: get_groups(key) for band, key in zip(bands, output_keys)}
+    )
+
+
 def reduce_by_regions_grouped(
     image_area: ee.Image,
     biobelt: ee.Image,
@@ -156,6 +236,9 @@ def reduce_regions(
     transition_matrix: str,
     scale: Optional[int] = None,
     method: str = "clip",
+    combined: bool = True,
+    rsa_asset: Optional[Union[str, List[str]]] = None,
+    rsa_source: str = "on_the_fly",
 ) -> ee.Dictionary:
     """Reduce land use/land cover image to bioclimatic belts regions using planimetric
     or real surface area
@@ -169,6 +252,16 @@ def reduce_regions(
         scale (int): scale of the reduce process
         method (str): "clip" (default, clip + bbox reduceRegion) or "grouped"
             (per-feature reduceRegions + reduceGroups) as a fallback for huge AOIs
+        combined (bool): reduce the four sub indicator B bands in a single
+            reduceRegion (see reduce_by_regions_combined). Only used with the
+            "clip" method.
+        rsa_asset (str, list): with the "on_the_fly" source, real surface area
+            image of the AOI exported with export_real_surface_area. With the
+            "precomputed" source, image collection (or list of tiles) exported
+            with precompute_real_surface_area.
+        rsa_source (str): "on_the_fly" (default) computes the real surface area
+            from the dem, unless rsa_asset is given. "precomputed" reads it from
+            the tiles in rsa_asset.
 
     Return:
         GEE Dicionary process (is not yet executed), with land cover class area
@@ -188,7 +281,14 @@ def reduce_regions(
     if rsa:
         # When using rsa, we need to use the dem scale, otherwise
         # we will end with wrong results.
-        image_area = get_real_surface_area(dem, aoi)
+        if rsa_source == "precomputed":
+            if not rsa_asset:
+                raise ValueError("rsa_asset is required with precomputed rsa_source")
+            image_area = read_real_surface_area(rsa_asset, dem)
+        elif rsa_asset:
+            image_area = ee.Image(rsa_asset)
+        else:
+            image_area = get_real_surface_area(dem, aoi)
         scale = scale or ee_lc_start.projection().nominalScale()
     else:
         # Otherwise, we will use the coarse scale to the output.
@@ -208,51 +308,27 @@ def reduce_regions(
             ee_lc_start, ee_end_base, ee_report, aoi, transition_matrix, remap_matrix
         )
 
-        return (
-            ee.Dictionary(
-                {
-                    "baseline_degradation": reduce_fn(
-                        image_area,
-                        clip_biobelt,
-                        final_degradation.select("baseline_degradation"),
-                        aoi,
-                        scale,
-                    )
-                }
-            )
-            .combine(
-                {
-                    "final_degradation": reduce_fn(
-                        image_area,
-                        clip_biobelt,
-                        final_degradation.select("final_degradation"),
-                        aoi,
-                        scale,
-                    )
-                }
-            )
-            .combine(
-                {
-                    "baseline_transition": reduce_fn(
-                        image_area,
-                        clip_biobelt,
-                        final_degradation.select("baseline_transition"),
-                        aoi,
-                        scale,
-                    )
-                }
-            )
-            .combine(
-                {
-                    "report_transition": reduce_fn(
-                        image_area,
-                        clip_biobelt,
-                        final_degradation.select("report_transition"),
-                        aoi,
-                        scale,
-                    )
-                }
+        if method == "clip" and combined:
+            return reduce_by_regions_combined(
+                image_area,
+                clip_biobelt,
+                final_degradation,
+                SUB_B_CATEGORIES,
+                aoi,
+                scale,
             )
+
+        return ee.Dictionary(
+            {
+                category: reduce_fn(
+                    image_area,
+                    clip_biobelt,
+                    final_degradation.select(category),
+                    aoi,
+                    scale,
+                )
+                for category in SUB_B_CATEGORIES
+            }
         )
 
     reduced_collection = reduce_fn(
@@ -262,6 +338,48 @@ def reduce_regions(
     return ee.Dictionary({"sub_a": reduced_collection})
 
 
+def to_long_collection(process: ee.FeatureCollection) -> ee.FeatureCollection:
+    """Flatten the results of a background process on the server, one feature per
+    reduced group with the LONG_COLUMNS properties.
+
+    The nested biobelt groups of every category are exported as plain columns
+    instead of the GEE string representation of the dictionaries, see
+    scripts.read_long_results.
+
+    Args:
+        process: features with a process_id and the results of every category,
+            as returned by perform_calculation
+    """
+
+    def explode_feature(feature):
+        feature = ee.Feature(feature)
+        process_id = feature.get("process_id")
+        results = feature.toDictionary().remove(["process_id"], True)
+
+        def explode_category(category):
+            def explode_belt(belt):
+                belt = ee.Dictionary(belt)
+                properties = ee.Dictionary(
+                    {
+                        "process_id": process_id,
+                        "category": category,
+                        "biobelt": belt.get("biobelt"),
+                    }
+                )
+
+                return ee.List(belt.get("groups")).map(
+                    lambda group: ee.Feature(
+                        None, ee.Dictionary(group).combine(properties)
+                    )
+                )
+
+            return ee.List(results.get(category)).map(explode_belt).flatten()
+
+        return ee.FeatureCollection(results.keys().map(explode_category).flatten())
+
+    return process.map(explode_feature).flatten().select(LONG_COLUMNS)
+
+
 def get_transition(
     ee_start_base: ee.Image,
     ee_end_base: ee.Image,
@@ -318,9 +436,10 @@ def get_transition(
         .rename("degraded_transition")
     )
 
+    impacts = get_degradation_impacts()
     final_degradation = degraded_transition.remap(
-        transition_degradation_matrix["transition"].tolist(),
-        transition_degradation_matrix["impact_code"].tolist(),
+        list(impacts),
+        list(impacts.values()),
         NO_DATA_VALUE,
     ).rename("final_degradation")
 
@@ -347,3 +466,96 @@ def get_gee_recipe_folder(recipe_name: str, gee_interface: GEEInterface) -> Path
 
     recipe_folder = Path("sepal_sdg15_4_2") / recipe_name
     return Path(gee_interface.create_folder(recipe_folder))
+
+
+async def export_real_surface_area(
+    dem: str, aoi: ee.FeatureCollection, asset_id: str, gee_interface: GEEInterface
+) -> str:
+    """Export the real surface area of the AOI to an asset, in the dem grid.
+
+    Return:
+        id of the export task
+    """
+
+    projection = await gee_interface.get_info_async(ee.Image(dem).projection())
+
+    return await gee_interface.export_image_to_asset_async(
+        image=get_real_surface_area(dem, aoi).float(),
+        asset_id=asset_id,
+        description=Path(asset_id).name,
+        max_pixels=int(1e13),
+        region=aoi_bbox(aoi),
+        crs=projection["crs"],
+        crs_transform=projection["transform"],
+    )
+
+
+async def get_rsa_asset_id(aoi_name: str, dem: str, gee_interface: GEEInterface) -> str:
+    """Return the id of the real surface area asset of the AOI and dem, in the
+    user assets folder"""
+
+    name = re.sub(r"[^A-Za-z0-9_-]", "_", f"rsa_{aoi_name}_{Path(dem).name}")
+
+    return await get_asset_id(name, gee_interface)
+
+
+async def get_rsa_asset(
+    dem: str, aoi: ee.FeatureCollection, asset_id: str, gee_interface: GEEInterface
+) -> Optional[str]:
+    """Return the real surface area asset of the AOI if it has been exported.
+
+    The first time it is requested (and while the export is running), the export
+    task is started and None is returned, so the current calculation computes the
+    real surface area on the fly and the next ones read the asset.
+    """
+
+    if await gee_interface.get_asset_async(asset_id, not_exists_ok=True):
+        return asset_id
+
+    if not await gee_interface.is_running_async(Path(asset_id).name):
+        await export_real_surface_area(dem, aoi, asset_id, gee_interface)
+
+    return None
+
+
+async def precompute_real_surface_area(
+    dem: str,
+    regions: ee.FeatureCollection,
+    folder: str,
+    gee_interface: GEEInterface,
+    id_property: str = "system:index",
+) -> List[str]:
+    """Export the real surface area of every region (countries or tiles of a
+    grid) to an image asset of the folder, in the dem grid.
+
+    Once the tasks are done, pass the image collection holding the tiles (or the
+    list of their ids) as rsa_asset with the "precomputed" rsa_source of
+    reduce_regions.
+
+    Return:
+        ids of the export tasks
+    """
+
+    projection = await gee_interface.get_info_async(ee.Image(dem).projection())
+    region_ids = await gee_interface.get_info_async(
+        regions.aggregate_array(id_property)
+    )
+
+    tasks = []
+    for region_id in region_ids:
+        tile = regions.filter(ee.Filter.eq(id_property, region_id)).geometry()
+        asset_id = f"{folder}/rsa_{region_id}"
+
+        tasks.append(
+            await gee_interface.export_image_to_asset_async(
+                image=get_tile_real_surface_area(dem, tile).float(),
+                asset_id=asset_id,
+                description=Path(asset_id).name,
+                max_pixels=int(1e13),
+                region=tile.bounds(),
+                crs=projection["crs"],
+                crs_transform=projection["transform"],
+            )
+        )
+
+    return tasks
@@ -42,6 +42,34 @@ def filter_groups(feature: ee.Feature) -> ee.Feature:
     return feature.set("groups", filtered_groups)
 
 
+def drop_lc_groups(feature: ee.Feature, lc: int) -> ee.Feature:
+    """Remove the land cover groups with the given value from every biobelt.
+
+    Biobelts left without groups are kept, use filter_groups afterwards to drop
+    them.
+    """
+
+    groups = ee.List(feature.get("groups"))
+
+    def filter_lc(group):
+        group_dict = ee.Dictionary(group)
+
+        def keep_lc(sub_group):
+            sub_group_dict = ee.Dictionary(sub_group)
+            return ee.Algorithms.If(
+                ee.Number(sub_group_dict.get("lc")).eq(lc), None, sub_group_dict
+            )
+
+        sub_groups = (
+            ee.List(group_dict.get("groups"))
+            .map(keep_lc)
+            .filter(ee.Filter.neq("item", None))
+        )
+        return group_dict.set("groups", sub_groups)
+
+    return feature.set("groups", groups.map(filter_lc))
+
+
 def reduceFlattened(featureCollection, reducer, groupKeys):
 
     def flatten(feature):
@@ -11,7 +11,7 @@ def get_layer_a(selection, remap_matrix, aoi):
         .clip(aoi)
     )
 
-    vis_params = visuals.VIS_PARAMS["land_cover"]
+    vis_params = visuals.get_vis_params("land_cover")
 
     return layer, vis_params
 
@@ -42,7 +42,7 @@ def get_layer_b(selection, remap_matrix, aoi, sub_b_year, transition_matrix):
     if selection == "baseline_degradation":
         # We can take either, they have the same baseline
         layer = transition_images[0].select("baseline_degradation")
-        vis_params = visuals.VIS_PARAMS["degradation"]
+        vis_params = visuals.get_vis_params("degradation")
 
     else:
         reporting_years = cs.get_reporting_years(sub_b_year, "sub_b")
@@ -68,7 +68,7 @@ def get_layer_b(selection, remap_matrix, aoi, sub_b_year, transition_matrix):
                 layer_name = f"land_cover_report"
             # TODO: use random visualizaion if remap is not default
             layer = transition_image.select(layer_name)
-            vis_params = visuals.VIS_PARAMS["land_cover"]
+            vis_params = visuals.get_vis_params("land_cover")
 
         else:
             years = reporting_years[1:]
@@ -78,10 +78,10 @@ def get_layer_b(selection, remap_matrix, aoi, sub_b_year, transition_matrix):
             # Select the required band
             if selection.startswith("final_degradation"):
                 layer = transition_image.select("final_degradation")
-                vis_params = visuals.VIS_PARAMS["degradation"]
+                vis_params = visuals.get_vis_params("degradation")
 
             elif selection.startswith("report_degradation"):
                 layer = transition_image.select("report_degradation")
-                vis_params = visuals.VIS_PARAMS["degradation"]
+                vis_params = visuals.get_vis_params("degradation")
 
     return layer.updateMask(read_asset(param.BIOBELT).mask()), vis_params
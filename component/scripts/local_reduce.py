@@ -0,0 +1,387 @@
+"""Local backend of gee.reduce_regions: area by land cover class and bioclimatic
+belt computed from rasters on disk with rasterio and NumPy.
+
+Land cover, biobelt and area rasters are read in windows aligned to the same
+grid, remapped with lookup arrays and reduced with np.bincount. Windows are
+distributed on a process pool and the partial sums are merged at the end. The
+output has the same structure as the one returned by Earth Engine, so the
+results can be parsed and reported with the same functions.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from os import cpu_count
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import rasterio as rio
+from rasterio.enums import Resampling
+from rasterio.errors import WindowError
+from rasterio.features import bounds as geometry_bounds
+from rasterio.features import geometry_mask
+from rasterio.vrt import WarpedVRT
+from rasterio.windows import Window, from_bounds
+from rasterio.windows import transform as window_transform
+
+import component.parameter.module_parameter as param
+import component.parameter.tables as tables
+import component.scripts as cs
+from component.scripts.accumulator import (
+    AreaAccumulator,
+    Lookup,
+    get_block_shape,
+    iter_block_windows,
+    snap_window,
+)
+from component.scripts.file_handler import read_file
+from component.scripts.local_surface_area import (
+    TILE_SIZE,
+    export_real_surface_area,
+)
+from component.types import SUB_B_CATEGORIES, Pathlike, ResultsDict
+
+__all__ = ["reduce_regions", "reduce_years"]
+
+NO_DATA_VALUE = 0
+"""int: No data value for the remap process, as in gee.NO_DATA_VALUE"""
+
+EARTH_RADIUS = 6378137
+"""float: radius (meters) used to compute the area of geographic pixels"""
+
+Grid = Dict[str, object]
+"""Target grid of the reduction: crs, transform, width and height"""
+
+
+def get_lookups(
+    remap_matrix: Optional[dict],
+    transition_matrix: Optional[pd.DataFrame],
+    dtype: np.dtype,
+) -> Dict[str, Optional[Lookup]]:
+    """Return the lookups of a reduction: the remap of the land cover rasters
+    (of the given dtype), the impact of the transitions and the final
+    degradation of the baseline and report impacts (see gee.get_transition)"""
+
+    lookups = {
+        "remap": Lookup(remap_matrix, dtype, NO_DATA_VALUE) if remap_matrix else None
+    }
+
+    if transition_matrix is not None:
+        impacts = zip(transition_matrix["transition"], transition_matrix["impact_code"])
+        lookups["impact"] = Lookup(dict(impacts), np.int64, 0)
+        lookups["degradation"] = Lookup(
+            tables.get_degradation_impacts(), np.int64, NO_DATA_VALUE
+        )
+
+    return lookups
+
+
+def no_remap(
+    values: np.ndarray, valid: np.ndarray, lookup: Optional[Lookup] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return remapped or raw values if there's a lookup (see gee.no_remap).
+    Remapped NO_DATA_VALUE pixels are masked."""
+
+    if lookup:
+        values = lookup(values)
+        valid = valid & (values != NO_DATA_VALUE)
+
+    return values, valid
+
+
+def get_transition(
+    start: Tuple[np.ndarray, np.ndarray],
+    end: Tuple[np.ndarray, np.ndarray],
+    report: Tuple[np.ndarray, np.ndarray],
+    lookups: Dict[str, Optional[Lookup]],
+) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """Return the sub indicator B bands of three land cover windows (see
+    gee.get_transition). Every band is a (values, valid) pair."""
+
+    (start, valid_start) = no_remap(*start, lookups["remap"])
+    (end, valid_end) = no_remap(*end, lookups["remap"])
+    (report, valid_report) = no_remap(*report, lookups["remap"])
+
+    valid_baseline = valid_start & valid_end
+    valid_report = valid_end & valid_report
+
+    # The codes of the transitions don't fit in the land cover dtype
+    end = end.astype(np.int64)
+    baseline_transition = start.astype(np.int64) * 100 + end
+    report_transition = end * 100 + report
+
+    baseline_degradation = lookups["impact"](baseline_transition)
+    report_degradation = lookups["impact"](report_transition)
+
+    final_degradation = lookups["degradation"](
+        baseline_degradation.astype(np.int64) * 100 + report_degradation
+    )
+
+    return {
+        "baseline_degradation": (baseline_degradation, valid_baseline),
+        "final_degradation": (final_degradation, valid_baseline & valid_report),
+        "baseline_transition": (baseline_transition, valid_baseline),
+        "report_transition": (report_transition, valid_report),
+    }
+
+
+def get_grid(lc_path: Pathlike, scale: Optional[float] = None) -> Grid:
+    """Return the grid of the land cover raster, resampled to the scale if given"""
+
+    with rio.open(lc_path) as src:
+        grid = {
+            "crs": src.crs,
+            "transform": src.transform,
+            "width": src.width,
+            "height": src.height,
+        }
+
+    if scale:
+        left, top = grid["transform"].c, grid["transform"].f
+        res_x, res_y = grid["transform"].a, -grid["transform"].e
+        grid["transform"] = rio.Affine(scale, 0, left, 0, -scale, top)
+        grid["width"] = int(np.ceil(grid["width"] * res_x / scale))
+        grid["height"] = int(np.ceil(grid["height"] * res_y / scale))
+
+    return grid
+
+
+def get_pixel_area(grid: Grid, window: Window) -> np.ndarray:
+    """Return the area (square meters) of the pixels of the window. Geographic
+    pixels are computed on a sphere, projected ones are considered equal-area."""
+
+    transform = window_transform(window, grid["transform"])
+    shape = (int(window.height), int(window.width))
+
+    if not grid["crs"].is_geographic:
+        return np.full(shape, abs(transform.a * transform.e))
+
+    rows = np.arange(shape[0] + 1)
+    lats = np.radians(transform.f + rows * transform.e)
+    width = np.radians(abs(transform.a))
+    area = EARTH_RADIUS**2 * width * np.abs(np.diff(np.sin(lats)))
+
+    return np.repeat(area[:, None], shape[1], axis=1)
+
+
+def get_aoi_windows(
+    geometries: List[dict], grid: Grid, block_shape: Tuple[int, int]
+) -> List[Window]:
+    """Return the blocks of the grid covering the bounding box of the geometries.
+
+    Raise a ValueError if the AOI is outside the land cover raster.
+    """
+
+    bounds = np.array([geometry_bounds(geometry) for geometry in geometries])
+    bounds = [*bounds[:, :2].min(axis=0), *bounds[:, 2:].max(axis=0)]
+
+    try:
+        aoi_window = snap_window(
+            from_bounds(*bounds, transform=grid["transform"]),
+            grid["height"],
+            grid["width"],
+        )
+    except WindowError:
+        raise ValueError(
+            f"The AOI {bounds} is outside of the land cover raster, check that "
+            "they overlap and that the AOI is in the crs of the raster"
+        ) from None
+
+    return list(
+        iter_block_windows(grid["height"], grid["width"], block_shape, aoi_window)
+    )
+
+
+def read_window(vrt: WarpedVRT, window: Window) -> Tuple[np.ndarray, np.ndarray]:
+    """Read the first band of the window as (values, valid)"""
+
+    data = vrt.read(1, window=window, masked=True)
+
+    return data.data, ~np.ma.getmaskarray(data)
+
+
+def reduce_windows(job: dict) -> AreaAccumulator:
+    """Reduce a chunk of windows, runs in the workers of the process pool"""
+
+    grid = job["grid"]
+    vrt_args = dict(resampling=Resampling.nearest, **grid)
+    accumulator = AreaAccumulator()
+
+    def open_vrt(path):
+        return WarpedVRT(rio.open(path), **vrt_args)
+
+    lc_vrts = [open_vrt(path) for path in job["lc_paths"]]
+    biobelt_vrt = open_vrt(job["biobelt"])
+    area_vrt = open_vrt(job["area"]) if job["area"] else None
+
+    # The land cover windows are remapped in the common dtype of the years
+    lc_dtype = np.result_type(*[vrt.dtypes[0] for vrt in lc_vrts])
+    lookups = get_lookups(job["matrix"], job["transition_matrix"], lc_dtype)
+
+    try:
+        for window in job["windows"]:
+            shape = (int(window.height), int(window.width))
+            biobelt, valid = read_window(biobelt_vrt, window)
+
+            valid &= geometry_mask(
+                job["geometries"],
+                out_shape=shape,
+                transform=window_transform(window, grid["transform"]),
+                invert=True,
+            )
+
+            if area_vrt:
+                area, valid_area = read_window(area_vrt, window)
+                valid &= valid_area & ~np.isnan(area)
+            else:
+                area = get_pixel_area(grid, window)
+
+            if not valid.any():
+                continue
+
+            lcs = [read_window(vrt, window) for vrt in lc_vrts]
+            lcs = [(values.astype(lc_dtype, copy=False), ok) for values, ok in lcs]
+
+            if len(lcs) == 3:
+                bands = get_transition(*lcs, lookups)
+            else:
+                bands = {"sub_a": no_remap(*lcs[0], lookups["remap"])}
+
+            for name, (values, valid_band) in bands.items():
+                accumulator.add(name, biobelt, values, area, valid & valid_band)
+    finally:
+        for vrt in [*lc_vrts, biobelt_vrt, area_vrt]:
+            if vrt:
+                vrt.src_dataset.close()
+                vrt.close()
+
+    return accumulator
+
+
+def reduce_regions(
+    aoi,
+    remap_matrix: dict,
+    rsa: bool,
+    dem: Optional[Pathlike],
+    lc_years: List[Dict],
+    transition_matrix: str,
+    scale: Optional[float] = None,
+    *,
+    biobelt: Pathlike,
+    rsa_asset: Optional[Pathlike] = None,
+    tile_size: Optional[int] = None,
+    n_jobs: Optional[int] = None,
+) -> dict:
+    """Reduce land use/land cover rasters to bioclimatic belts regions using
+    planimetric or real surface area, same as gee.reduce_regions with local files.
+
+    Args:
+        aoi (gpd.GeoDataFrame, list): area of interest, a GeoDataFrame or a list
+            of GeoJSON geometries in the land cover crs
+        lc_years: list of years, their "asset" is the path of the land cover raster
+        dem: path of the dem raster, used when rsa is True
+        scale: output resolution, in the land cover crs units. Defaults to the
+            land cover resolution
+        biobelt: path of the bioclimatic belts raster
+        rsa_asset: real surface area raster already computed from the dem (see
+            local_surface_area.export_real_surface_area)
+        tile_size: size of the windows distributed to the workers. Defaults to
+            the internal blocks of the land cover raster
+        n_jobs: number of worker processes, 1 to run in the current process
+
+    Return:
+        Same dictionary as the GEE process once evaluated: {"sub_a": groups} or
+        the four sub indicator B categories
+    """
+
+    lc_paths = [year["asset"] for year in lc_years]
+    grid = get_grid(lc_paths[0], scale)
+
+    # Read the land cover by its own blocks unless it is resampled
+    if tile_size or scale:
+        block_shape = (tile_size or TILE_SIZE,) * 2
+    else:
+        with rio.open(lc_paths[0]) as src:
+            block_shape = get_block_shape(src)
+
+    if hasattr(aoi, "to_crs"):
+        geometries = [
+            geom.__geo_interface__ for geom in aoi.to_crs(grid["crs"]).geometry
+        ]
+    else:
+        geometries = list(aoi)
+
+    with TemporaryDirectory() as tmp_dir:
+        area = None
+        if rsa:
+            area = rsa_asset or export_real_surface_area(dem, Path(tmp_dir) / "rsa.tif")
+
+        job = {
+            "grid": grid,
+            "lc_paths": lc_paths,
+            "biobelt": biobelt,
+            "area": area,
+            "geometries": geometries,
+            "matrix": remap_matrix,
+            "transition_matrix": (
+                read_file(transition_matrix) if len(lc_paths) == 3 else None
+            ),
+        }
+
+        # Only the windows covering the AOI are read
+        windows = get_aoi_windows(geometries, grid, block_shape)
+
+        # One chunk of windows per job, so every worker opens the rasters once
+        n_chunks = 1 if n_jobs == 1 else min(len(windows), (n_jobs or cpu_count()) * 4)
+        jobs = [{**job, "windows": windows[i::n_chunks]} for i in range(n_chunks)]
+
+        if n_jobs == 1:
+            partials = [reduce_windows(job) for job in jobs]
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+                partials = list(executor.map(reduce_windows, jobs))
+
+    names = SUB_B_CATEGORIES if len(lc_paths) == 3 else ["sub_a"]
+    accumulator = AreaAccumulator(names)
+    for partial in partials:
+        accumulator.merge(partial)
+
+    accumulator.scale(param.UNITS["sqkm"][0])
+
+    return {name: accumulator.to_groups(name) for name in names}
+
+
+def reduce_years(
+    aoi,
+    remap_matrix_a: dict,
+    remap_matrix_b: dict,
+    rsa: bool,
+    dem: Optional[Pathlike],
+    years: list,
+    transition_matrix: str,
+    scale: Optional[float] = None,
+    **kwargs,
+) -> ResultsDict:
+    """Local counterpart of deferred_calculation.perform_calculation: reduce all
+    the years and return the results keyed by process_id.
+
+    The real surface area is computed once and shared by all the years. Extra
+    keyword arguments are passed to reduce_regions (biobelt is required).
+    """
+
+    results: ResultsDict = {}
+
+    with TemporaryDirectory() as tmp_dir:
+        if rsa and not kwargs.get("rsa_asset"):
+            kwargs["rsa_asset"] = export_real_surface_area(
+                dem, Path(tmp_dir) / "rsa.tif"
+            )
+
+        for year in years:
+            matrix = cs.get_remap_matrix(year, remap_matrix_a, remap_matrix_b)
+            results[cs.years_from_dict(year)] = reduce_regions(
+                aoi, matrix, rsa, dem, year, transition_matrix, scale, **kwargs
+            )
+
+    return results
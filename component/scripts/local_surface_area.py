@@ -0,0 +1,207 @@
+"""Real surface area (Jenness, 2004) of a local DEM, computed with NumPy.
+
+Same eight triangles algorithm as the GEE graph in surface_area.py, so the
+surface can be computed, tested and benchmarked without Earth Engine. The DEM
+is processed by tiles read with a one pixel halo, every tile only needs its own
+neighbors and continental DEMs fit in bounded memory.
+"""
+
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+import numpy as np
+import rasterio as rio
+from rasterio.windows import Window
+
+from component.types import Pathlike
+
+__all__ = [
+    "get_real_surface_area",
+    "iter_real_surface_area",
+    "export_real_surface_area",
+]
+
+DEGREE_SCALE = 2 * np.pi * 6378137 / 360
+"""float: meters per degree used by GEE to compute the nominal scale of geographic
+projections"""
+
+TILE_SIZE = 512
+"""int: default size (pixels) of the tiles processed at once"""
+
+# Offsets (row, col) of the neighbors of the central pixel E
+NEIGHBORS = {
+    "A": (-1, -1),
+    "B": (-1, 0),
+    "C": (-1, 1),
+    "D": (0, -1),
+    "E": (0, 0),
+    "F": (0, 1),
+    "G": (1, -1),
+    "H": (1, 0),
+    "I": (1, 1),
+}
+
+# Same sides and triangles than SUBTRACTION_MATRIX and TRIANGLES_MATRIX
+SIDES = ["AB", "AD", "AE", "BC", "BE", "CF", "CE", "DE", "DG", "EF"]
+SIDES += ["EH", "FI", "GH", "GE", "HI", "IE"]
+DIAGONALS = ["AE", "CE", "GE", "IE"]
+TRIANGLES = [
+    ["AE", "AB", "BE"],
+    ["BE", "BC", "CE"],
+    ["AD", "DE", "AE"],
+    ["CE", "CF", "EF"],
+    ["DE", "DG", "GE"],
+    ["EF", "FI", "IE"],
+    ["GE", "EH", "GH"],
+    ["EH", "IE", "HI"],
+]
+
+
+def get_real_surface_area(dem: np.ndarray, cellsize: float) -> np.ndarray:
+    """Return the real surface area of the pixels of a DEM.
+
+    Pixels on the border of the array, or next to a nodata (nan) value, don't
+    have all their neighbors and are nan, as the masked pixels of the GEE graph.
+
+    Args:
+        dem: elevation array, nodata as nan
+        cellsize: size of the pixels in meters
+    """
+
+    dem = np.asarray(dem, dtype=np.float64)
+    height, width = dem.shape
+    area = np.full((height, width), np.nan)
+
+    if height < 3 or width < 3:
+        return area
+
+    def neighbor(name):
+        row, col = NEIGHBORS[name]
+        return dem[1 + row : height - 1 + row, 1 + col : width - 1 + col]
+
+    diagonal_size = np.sqrt(2 * cellsize**2)
+
+    # Steps 1-2: half of the 3D length of the sides
+    half_sides = {}
+    for side in SIDES:
+        size = diagonal_size if side in DIAGONALS else cellsize
+        height_diff = neighbor(side[0]) - neighbor(side[1])
+        half_sides[side] = np.sqrt(size**2 + height_diff**2) / 2
+
+    # Steps 3-4: Heron's formula on every triangle
+    total = np.zeros((height - 2, width - 2))
+    for sides in TRIANGLES:
+        a, b, c = (half_sides[side] for side in sides)
+        semi_perimeter = (a + b + c) / 2
+        total += np.sqrt(
+            semi_perimeter
+            * (semi_perimeter - a)
+            * (semi_perimeter - b)
+            * (semi_perimeter - c)
+        )
+
+    area[1:-1, 1:-1] = total
+
+    return area
+
+
+def get_cellsize(src: rio.DatasetReader) -> float:
+    """Return the nominal scale of the DEM in meters, as GEE does"""
+
+    cellsize = src.res[0]
+
+    return cellsize * DEGREE_SCALE if src.crs and src.crs.is_geographic else cellsize
+
+
+def read_with_halo(src: rio.DatasetReader, window: Window, halo: int = 1) -> np.ndarray:
+    """Read the first band of the window and its halo, as float with nan as
+    nodata. Outside of the raster the halo is nan."""
+
+    row_off, col_off = window.row_off - halo, window.col_off - halo
+    height, width = window.height + 2 * halo, window.width + 2 * halo
+
+    # Read the part of the halo window that is inside the raster
+    rows = max(row_off, 0), min(row_off + height, src.height)
+    cols = max(col_off, 0), min(col_off + width, src.width)
+
+    data = np.full((height, width), np.nan)
+    inner = src.read(
+        1,
+        window=Window(cols[0], rows[0], cols[1] - cols[0], rows[1] - rows[0]),
+        masked=True,
+    )
+    data[
+        rows[0] - row_off : rows[1] - row_off, cols[0] - col_off : cols[1] - col_off
+    ] = inner.astype(np.float64).filled(np.nan)
+
+    return data
+
+
+def iter_windows(height: int, width: int, tile_size: int) -> Iterator[Window]:
+    """Return the windows tiling a raster of the given shape"""
+
+    for row_off in range(0, height, tile_size):
+        for col_off in range(0, width, tile_size):
+            yield Window(
+                col_off,
+                row_off,
+                min(tile_size, width - col_off),
+                min(tile_size, height - row_off),
+            )
+
+
+def iter_real_surface_area(
+    dem_path: Pathlike, tile_size: int = TILE_SIZE
+) -> Iterator[Tuple[Window, np.ndarray]]:
+    """Compute the real surface area of a DEM file tile by tile.
+
+    Every tile is read with a one pixel halo, so the result doesn't depend on
+    the tile size.
+
+    Yield:
+        the window of the tile and its real surface area
+    """
+
+    with rio.open(dem_path) as src:
+        cellsize = get_cellsize(src)
+
+        for window in iter_windows(src.height, src.width, tile_size):
+            dem = read_with_halo(src, window)
+            yield window, get_real_surface_area(dem, cellsize)[1:-1, 1:-1]
+
+
+def export_real_surface_area(
+    dem_path: Pathlike,
+    dst_path: Pathlike,
+    tile_size: int = TILE_SIZE,
+    memmap: Optional[Pathlike] = None,
+) -> Path:
+    """Write the real surface area of a DEM file to a GeoTIFF in the DEM grid.
+
+    Args:
+        dem_path: local DEM file
+        dst_path: output GeoTIFF, nodata is nan
+        tile_size: size of the tiles computed and written at once
+        memmap: optional file to also get the whole surface as a memory-mapped
+            array (np.memmap with the DEM shape)
+    """
+
+    with rio.open(dem_path) as src:
+        profile = src.profile.copy()
+        shape = (src.height, src.width)
+
+    profile.update(count=1, dtype="float64", nodata=np.nan, driver="GTiff")
+    surface = np.memmap(memmap, np.float64, "w+", shape=shape) if memmap else None
+
+    with rio.open(dst_path, "w", **profile) as dst:
+        for window, area in iter_real_surface_area(dem_path, tile_size):
+            dst.write(area, 1, window=window)
+
+            if surface is not None:
+                rows, cols = window.toslices()
+                surface[rows, cols] = area
+
+    if surface is not None:
+        surface.flush()
+
+    return Path(dst_path)
@@ -6,12 +6,7 @@ import component.scripts as cs
 
 # isort: off
 from component.parameter.index_parameters import mountain_area_cols
-from component.scripts.report_scripts import (
-    fill_parsed_df,
-    get_belt_desc,
-    get_nature,
-    get_obs_status,
-)
+from component.scripts.report_scripts import fill_parsed_df, finalize_report
 
 
 def get_mountain_area(parsed_df):
@@ -72,22 +67,12 @@ def get_report(
     report_df["TIME_DETAIL"] = year
     report_df["SOURCE_DETAIL"] = source_detail
     report_df["COMMENT_OBS"] = "FAO estimate"
-    report_df["BIOCLIMATIC_BELT"] = report_df.apply(get_belt_desc, axis=1)
 
     # round obs_value
     report_df["OBS_VALUE"] = report_df["OBS_VALUE"].round(4)
     report_df["OBS_VALUE_RSA"] = report_df["OBS_VALUE"].round(4)
 
-    # Convert DataFrame to object type
-    report_df = report_df.astype(object)
+    # Add descriptions, NATURE, OBS_STATUS and fill missing values with "NA"
+    report_df = finalize_report(report_df, mountain_area_cols)
 
-    # fill NaN values with "N/A"
-    report_df.fillna("NA", inplace=True)
-
-    # fill zeros with "N/A"
-    report_df.replace(0, "NA", inplace=True)
-
-    report_df["NATURE"] = report_df.apply(get_nature, axis=1)
-    report_df["OBS_STATUS"] = report_df.apply(get_obs_status, axis=1)
-
-    return report_df[mountain_area_cols].reset_index(drop=True)
+    return report_df.reset_index(drop=True)
@@ -1,12 +1,12 @@
-import pandas as pd
+from typing import List, Mapping
 
-import component.parameter.module_parameter as param
+import numpy as np
+import pandas as pd
 
-BELT_TABLE = pd.read_csv(param.BIOBELTS_DESC)
-"pd.Dataframe: bioclimatic belts classes and description"
+import component.parameter.tables as tables
 
-LC_CLASSES = pd.read_csv(param.LC_CLASSES)
-"pd.Dataframe: fixed land cover classes, description and colors"
+NA = "NA"
+"str: value used in the reports for missing (or zero) observations"
 
 
 def get_nature(row):
@@ -28,23 +28,71 @@ def get_obs_status(row):
 def get_belt_desc(row):
     """return bioclimatic belt description"""
 
-    if not row["belt_class"] in set(BELT_TABLE.belt_class.unique()):
-        return row["belt_class"]
-
-    desc = BELT_TABLE[BELT_TABLE.belt_class == row["belt_class"]]["desc"]
-
-    return desc.values[0]
+    return tables.get_belt_desc().get(row["belt_class"], row["belt_class"])
 
 
 def get_lc_desc(row):
     """return landcover description"""
 
-    if not row["lc_class"] in set(LC_CLASSES.lc_class.unique()):
-        return row["lc_class"]
+    return tables.get_lc_desc().get(row["lc_class"], row["lc_class"])
+
+
+def map_desc(codes: pd.Series, desc: Mapping) -> pd.Series:
+    """Map a column of codes to their description. Codes without description
+    (i.e. "Total", "MGCI") are kept as they are.
+
+    Args:
+        codes: column of belt or land cover codes
+        desc: description by code (tables.get_belt_desc or get_lc_desc)
+    """
+
+    mapped = codes.map(desc)
+
+    return pd.Series(
+        np.where(mapped.notna(), mapped, codes), index=codes.index, dtype=object
+    )
+
+
+def is_missing(values: pd.Series) -> pd.Series:
+    """Return a boolean mask with the observations that will be reported as NA"""
+
+    return values.isna() | (values == 0)
+
+
+def finalize_report(report_df: pd.DataFrame, output_cols: List[str]) -> pd.DataFrame:
+    """Shared last step of all the SDG 15.4.2 tables.
+
+    Adds the BIOCLIMATIC_BELT (and LAND_COVER when requested) descriptions,
+    derives the NATURE and OBS_STATUS columns from OBS_VALUE and replaces
+    missing and zero values with "NA". Everything is done column-wise and
+    numeric columns are only cast to object when they contain "NA" values.
 
-    desc = LC_CLASSES[LC_CLASSES.lc_class == row["lc_class"]]["desc"]
+    Args:
+        report_df: report with belt_class, lc_class and OBS_VALUE columns
+        output_cols: columns of the output table (see index_parameters)
+    """
+
+    report_df["BIOCLIMATIC_BELT"] = map_desc(
+        report_df["belt_class"], tables.get_belt_desc()
+    )
+
+    if "LAND_COVER" in output_cols:
+        report_df["LAND_COVER"] = map_desc(report_df["lc_class"], tables.get_lc_desc())
 
-    return desc.values[0]
+    # When Nature = N then OBS_STATUS = M and OBS_VALUE = NA, see get_obs_status
+    obs_missing = is_missing(report_df["OBS_VALUE"]).to_numpy()
+    report_df["NATURE"] = np.where(obs_missing, "N", "C")
+    report_df["OBS_STATUS"] = np.where(obs_missing, "M", "A")
+
+    report_df = report_df[output_cols].copy()
+
+    for col in output_cols:
+        missing = is_missing(report_df[col]).to_numpy()
+        if missing.any():
+            values = report_df[col].to_numpy(dtype=object)
+            report_df[col] = np.where(missing, NA, values)
+
+    return report_df
 
 
 def fill_parsed_df(parsed_df):
@@ -54,11 +102,11 @@ def fill_parsed_df(parsed_df):
     """
 
     # create a cartesian product of belt_classes and lc_classes
-    BELT_TABLE["key"] = 1
-    LC_CLASSES["key"] = 1
+    belt_table = tables.get_belt_table().assign(key=1)
+    lc_classes = tables.get_lc_classes().assign(key=1)
 
     all_belts_classes = pd.merge(
-        BELT_TABLE[["belt_class", "key"]], LC_CLASSES[["lc_class", "key"]], on="key"
+        belt_table[["belt_class", "key"]], lc_classes[["lc_class", "key"]], on="key"
     )
 
     # expand parsed_df to include all belt_classes
@@ -87,3 +135,28 @@ def get_impact(row, transition_table: pd.DataFrame):
         (transition_table.from_code == row["from_lc"])
         & (transition_table.to_code == row["to_lc"])
     ]["impact_code"].values[0]
+
+
+def map_impact(df: pd.DataFrame, transition_table: pd.DataFrame) -> pd.Series:
+    """Column-wise version of get_impact: return the type of the impact of every
+    from_lc -> to_lc transition of the dataframe.
+
+    Args:
+        df: parsed dataframe with from_lc and to_lc columns
+        transition_table: transition matrix dataframe (custom or default)
+    """
+
+    impact_codes = transition_table.set_index(["from_code", "to_code"])["impact_code"]
+    impact_codes = impact_codes[~impact_codes.index.duplicated()]
+
+    transitions = pd.MultiIndex.from_frame(df[["from_lc", "to_lc"]])
+    impact = pd.Series(impact_codes.reindex(transitions).values, index=df.index)
+
+    # transitions from or to no data have no impact, the others must be known
+    data = (df.from_lc != 0) & (df.to_lc != 0)
+    missing = impact.isna() & data
+    if missing.any():
+        pairs = sorted(set(zip(df.from_lc[missing], df.to_lc[missing])))
+        raise ValueError(f"The transitions {pairs} are not in the transition matrix")
+
+    return impact.where(data, 0).astype(int)
@@ -0,0 +1,284 @@
+"""Write the reporting tables to Excel in a single pass.
+
+The sheets are streamed in a write-only openpyxl workbook: the widths of the
+columns are computed from the DataFrames before writing, instead of reading
+every cell back, and the rows are written once, a chunk at a time, so the
+memory stays flat even for the consolidated workbooks of many countries.
+
+The tables can also be kept in a Parquet store partitioned by REF_AREA and
+TIME_PERIOD (see get_store_files), read back with read_store filters, or
+report by report with read_report_store.
+"""
+
+from io import BytesIO
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, List, Optional, Union
+from urllib.parse import quote, unquote
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment
+from openpyxl.utils import get_column_letter
+
+from component.scripts.report_scripts import NA
+from component.types import Pathlike
+
+__all__ = [
+    "get_column_widths",
+    "merge_widths",
+    "write_sheet",
+    "write_reports",
+    "STORE_FOLDER",
+    "PARTITION_COLUMNS",
+    "get_store_files",
+    "write_store",
+    "read_store",
+    "read_report_store",
+]
+
+WIDTH_PADDING = 4
+"""int: characters added to the longest value of a column"""
+
+CHUNKSIZE = 10_000
+"""int: rows converted to Python values at once"""
+
+OBS_ALIGNMENT = Alignment(horizontal="right")
+"""Alignment: alignment of the OBS_VALUE columns, header included"""
+
+STORE_FOLDER = "parquet"
+"""str: folder of the Parquet store in the report folder"""
+
+PARTITION_COLUMNS = ["REF_AREA", "TIME_PERIOD"]
+"""list: columns partitioning the tables of the Parquet store"""
+
+
+def get_column_widths(df: pd.DataFrame) -> List[int]:
+    """Return the width of every column: the length of its longest value, header
+    included, plus WIDTH_PADDING"""
+
+    widths = []
+    for name, column in df.items():
+        values = column.dropna()
+        length = values.astype(str).str.len().max() if len(values) else 0
+        widths.append(max(int(length), len(str(name))) + WIDTH_PADDING)
+
+    return widths
+
+
+def merge_widths(*widths: List[int]) -> List[int]:
+    """Return the widths fitting all the given chunks of a sheet"""
+
+    return [max(column_widths) for column_widths in zip(*widths)]
+
+
+def write_sheet(
+    workbook: Workbook,
+    sheet_name: str,
+    chunks: Iterable[pd.DataFrame],
+    widths: List[int],
+) -> None:
+    """Stream the rows of a sheet in a write-only workbook.
+
+    Args:
+        workbook: write-only workbook
+        sheet_name: name of the new sheet
+        chunks: DataFrames with the same columns, written one after the other.
+            The header is the columns of the first one.
+        widths: width of every column, see get_column_widths
+    """
+
+    worksheet = workbook.create_sheet(sheet_name)
+
+    # The dimensions have to be set before writing the first row
+    for i, width in enumerate(widths, start=1):
+        worksheet.column_dimensions[get_column_letter(i)].width = width
+
+    header = None
+    for chunk in chunks:
+        if header is None:
+            header = [str(name) for name in chunk.columns]
+            obs = [i for i, name in enumerate(header) if "OBS" in name.upper()]
+            for i in obs:
+                header[i] = get_obs_cell(worksheet, header[i])
+            worksheet.append(header)
+
+        for start in range(0, len(chunk), CHUNKSIZE):
+            values = chunk.iloc[start : start + CHUNKSIZE].astype(object)
+            rows = values.where(values.notna(), None).to_numpy()
+
+            for row in rows:
+                row = list(row)
+                for i in obs:
+                    row[i] = get_obs_cell(worksheet, row[i])
+                worksheet.append(row)
+
+
+def get_obs_cell(worksheet, value) -> WriteOnlyCell:
+    """Return a cell of an OBS_VALUE column, aligned to the right"""
+
+    cell = WriteOnlyCell(worksheet, value)
+    cell.alignment = OBS_ALIGNMENT
+
+    return cell
+
+
+def write_reports(
+    sheets: Dict[str, pd.DataFrame], output: Union[Pathlike, BinaryIO]
+) -> Union[Pathlike, BinaryIO]:
+    """Write the reporting tables, one sheet per DataFrame
+
+    Args:
+        sheets: DataFrames by sheet name, in the order of the sheets
+        output: xlsx file or buffer
+    """
+
+    workbook = Workbook(write_only=True)
+
+    for sheet_name, df in sheets.items():
+        write_sheet(workbook, sheet_name, [df], get_column_widths(df))
+
+    workbook.save(output)
+
+    return output
+
+
+def to_columnar(df: pd.DataFrame) -> pd.DataFrame:
+    """Return the table with a single type per column.
+
+    The OBS columns mix the values with the NA placeholder of the missing belts,
+    they become numbers with nulls, NATURE and OBS_STATUS tell why they're
+    missing.
+    """
+
+    df = df.copy()
+    for name, column in df.items():
+        if column.dtype != object:
+            continue
+
+        types = {type(value) for value in column.dropna()}
+        if str in types and len(types) > 1:
+            df[name] = pd.to_numeric(column, errors="coerce")
+
+    return df
+
+
+def get_store_files(
+    sheets: Dict[str, pd.DataFrame], file_name: str
+) -> Dict[str, bytes]:
+    """Return the Parquet files of the tables, one per partition.
+
+    The files are laid out as a hive dataset of every table:
+    <table>/REF_AREA=<ref_area>/TIME_PERIOD=<time_period>/<file_name>.parquet,
+    without the partition columns, so other reports can be added to the same
+    partitions without overwriting them. The attrs of the files keep what
+    read_report_store needs to rebuild the sheets: the order of the columns,
+    the types of the partition columns and the OBS columns holding NA values.
+
+    Args:
+        sheets: DataFrames by sheet name, as written in the report
+        file_name: name of the files, the name of the report
+    """
+
+    files = {}
+    for sheet_name, report in sheets.items():
+        df = to_columnar(report)
+        attrs = {
+            "columns": list(report.columns),
+            "dtypes": {name: str(report[name].dtype) for name in PARTITION_COLUMNS},
+            "na_columns": [name for name in df if df[name].dtype != report[name].dtype],
+        }
+
+        for keys, partition in df.groupby(PARTITION_COLUMNS, sort=False):
+            folders = [
+                f"{name}={quote(str(key), safe='')}"
+                for name, key in zip(PARTITION_COLUMNS, keys)
+            ]
+            path = "/".join([sheet_name, *folders, f"{file_name}.parquet"])
+
+            partition = partition.drop(columns=PARTITION_COLUMNS)
+            partition.attrs = attrs
+
+            buffer = BytesIO()
+            partition.to_parquet(buffer, index=False)
+            files[path] = buffer.getvalue()
+
+    return files
+
+
+def write_store(
+    sheets: Dict[str, pd.DataFrame], folder: Pathlike, file_name: str
+) -> Path:
+    """Write the Parquet store of the tables in a local folder, see
+    get_store_files"""
+
+    for path, content in get_store_files(sheets, file_name).items():
+        file = Path(folder, path)
+        file.parent.mkdir(parents=True, exist_ok=True)
+        file.write_bytes(content)
+
+    return Path(folder)
+
+
+def read_store(
+    folder: Pathlike, sheet_name: str, filters: Optional[list] = None
+) -> pd.DataFrame:
+    """Read a table of the Parquet store, only the partitions matching the
+    filters are read.
+
+    Args:
+        folder: Parquet store, see write_store
+        sheet_name: table to read, e.g. Table1_ER_MTN_TOTL
+        filters: pyarrow filters on any column, the partition columns are
+            strings, e.g. [("REF_AREA", "in", ["004", "008"])]
+    """
+
+    # pyarrow is only needed to read the store, like pandas does to write it
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    # Keep the codes as written (e.g. "004") instead of inferring integers
+    partitioning = ds.partitioning(
+        pa.schema([(name, pa.string()) for name in PARTITION_COLUMNS]),
+        flavor="hive",
+    )
+
+    return pd.read_parquet(
+        Path(folder, sheet_name), filters=filters, partitioning=partitioning
+    )
+
+
+def read_report_store(folder: Pathlike, file_name: str) -> Dict[str, pd.DataFrame]:
+    """Read the tables of a single report from the Parquet store, as they are
+    written in its sheets.
+
+    The partition columns are added back from the paths of the files, with
+    their type and at their position, and the nulls of the OBS columns become
+    NA again (see get_store_files). The rows come in the order of the
+    partitions.
+
+    Args:
+        folder: Parquet store, see write_store
+        file_name: name of the files of the report, see get_store_files
+    """
+
+    sheets = {}
+    for table in sorted(path for path in Path(folder).iterdir() if path.is_dir()):
+        partitions = []
+        for file in sorted(table.glob(f"*/*/{file_name}.parquet")):
+            df = pd.read_parquet(file)
+            attrs = df.attrs
+
+            keys = [
+                unquote(part.split("=", 1)[1])
+                for part in file.parent.relative_to(table).parts
+            ]
+            df = df.assign(**dict(zip(PARTITION_COLUMNS, keys))).astype(attrs["dtypes"])
+            df[attrs["na_columns"]] = df[attrs["na_columns"]].astype(object).fillna(NA)
+
+            partitions.append(df[attrs["columns"]])
+
+        if partitions:
+            sheets[table.name] = pd.concat(partitions, ignore_index=True)
+
+    return sheets
@@ -1,18 +1,21 @@
 from io import BytesIO
 from typing import TYPE_CHECKING
 from component.scripts.file_handler import read_file
-from component.types import Pathlike
+from component.types import (
+    LONG_COLUMNS,
+    SUB_B_CATEGORIES,
+    Pathlike,
+    ResultsDict,
+    SubItem,
+)
+import json
 import random
 import re
 from pathlib import Path, PurePosixPath
 from typing import Dict, List, Literal, Tuple, Union
 
-import ipyvuetify as v
 import numpy as np
 import pandas as pd
-from scipy.interpolate import interp1d
-from openpyxl.utils import get_column_letter
-from openpyxl.styles import Alignment
 
 
 from component.parameter.directory import dir_
@@ -23,6 +26,8 @@ from component.scripts import sub_a as sub_a
 from component.scripts import sub_b as sub_b
 
 if TYPE_CHECKING:
+    import ipyvuetify as v
+
     from component.model.model import MgciModel
 
 
@@ -37,19 +42,25 @@ __all__ = [
     "get_a_years",
     "get_b_years",
     "read_from_csv",
+    "read_long_results",
     "export_reports",
     "get_sub_a_break_points",
     "years_from_dict",
+    "get_remap_matrix",
     "parse_to_year_a",
     "parse_sub_b_year",
     "parse_result",
+    "ResultsCache",
+    "get_results_cache",
     "get_reporting_years",
     "create_folder",
 ]
 
 
-def create_avatar(mgci: float) -> v.Avatar:
+def create_avatar(mgci: float) -> "v.Avatar":
     """Creates a circular avatar containing the MGCI value"""
+    import ipyvuetify as v
+
     color = cs.get_mgci_color(mgci)
 
     overall_mgci_html = v.Html(
@@ -133,6 +144,19 @@ def years_from_dict(year_dict: Tuple[Dict]) -> str:
     return "_".join([str(year.get("year")) for year in year_dict])
 
 
+def get_remap_matrix(
+    year_dict: Tuple[Dict], remap_matrix_a: dict, remap_matrix_b: dict
+) -> dict:
+    """Return the remap matrix of the sub indicator of a get_years entry: a
+    single land cover is a sub A year, the three of the transition a sub B one.
+
+    Used by the GEE and the local calculations, so both remap a year the same
+    way.
+    """
+
+    return remap_matrix_a if len(year_dict) == 1 else remap_matrix_b
+
+
 def get_interpolation_years(
     breaking_points: Dict[str, List[Dict[str, str]]],
 ) -> List[List[Dict[str, str]]]:
@@ -272,17 +296,19 @@ def parse_to_year_a(results, reporting_years, year: int) -> Union[pd.DataFrame,
     If there is not a match, it will try to interpolate the results.
 
     Args:
-        results (dict): dictionary with results coming from model
+        results (dict, ResultsCache): dictionary with results coming from model
+            or its parsed results cache
         year (int): year to get the results from
     """
 
+    results = get_results_cache(results)
     str_year = str(year)
 
     individual_yrs = [y for y in results.keys() if len(y.split("_")) == 1]
 
     # Check that indicator is sub_a and year is in individual years
     if any([str_year in yr for yr in individual_yrs]):
-        return parse_result(results[str_year]["sub_a"], single=True)
+        return results.get(str_year, "sub_a")
 
     # If we're here, it means that we didn't find the year in individual
     # or double years
@@ -296,7 +322,11 @@ def parse_to_year_a(results, reporting_years, year: int) -> Union[pd.DataFrame,
 
 
 def interpolate_sub_a_data(
-    results: dict, reporting_years, year1: int, year2: int, target_year: int
+    results: Union[ResultsDict, "ResultsCache"],
+    reporting_years,
+    year1: int,
+    year2: int,
+    target_year: int,
 ) -> pd.DataFrame:  # type: ignore
     """Interpolate sub A data between two years.
 
@@ -312,6 +342,9 @@ def interpolate_sub_a_data(
 
     if not (year1 < target_year < year2):
         raise Exception("target year has to be in between year1 and year 2")
+
+    # Share the parsed years between the bracketing years
+    results = get_results_cache(results)
     df1 = parse_to_year_a(results, reporting_years, year1)
     df2 = parse_to_year_a(results, reporting_years, year2)
 
@@ -327,6 +360,8 @@ def interpolate_sub_a_data(
     # I've used this function because later we can change the interpolation
     # method without having to change the rest of the code
 
+    from scipy.interpolate import interp1d
+
     interp_func = interp1d(
         [year1, year2], np.vstack([merged_df["sum_x"], merged_df["sum_y"]]), axis=0
     )
@@ -342,34 +377,70 @@ def interpolate_sub_a_data(
 
 
 def parse_sub_b_year(
-    results: Dict, target_year: Dict[str, Tuple[int, int]]
+    results: Union[ResultsDict, "ResultsCache"],
+    target_year: Dict[str, Tuple[int, int]],
 ) -> pd.DataFrame:
     """Return the parsed df for the given year .
 
     Args:
+        results: dictionary with results coming from model or its parsed
+            results cache
         target_year: a dictionary with the following structure:
             {'baseline': [2000, 2015]}, or
             {'report': [2015, 2020]}
     """
+    results = get_results_cache(results)
+
     if "baseline" in target_year:
         for key in results.keys():
             if len(key.split("_")) > 1:
-                df = parse_result(results[key], single=False)
+                df = results.get(key, "baseline_transition")
                 # Decode transition to from_code and to_code
                 df.loc[:, "from_lc"] = df.transition // 100
                 df.loc[:, "to_lc"] = df.transition % 100
-                return df[df.category == "baseline_transition"]
+                return df
 
     # target_year is a tuple of the (start_baseline, report_year)
     year = target_year.get("report")[1]
     for key in results.keys():
         if len(key.split("_")) > 1:
             if str(year) in key:
-                df = parse_result(results[key], single=False)
-                return df[df.category == "final_degradation"]
+                return results.get(key, "final_degradation")
+
 
+def flatten_groups(
+    result: List[SubItem],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Flatten the nested biobelt groups of a reduction into three arrays.
 
-def parse_result(result: dict, single: bool = False) -> pd.DataFrame:
+    Args:
+        result: list of biobelt groups, i.e. [{"biobelt": 2, "groups": [{"lc": 3, "sum": 0.7}]}]
+
+    Returns:
+        belt_class, lc (or transition) and sum arrays, one element per group
+    """
+
+    size = sum(len(belt["groups"]) for belt in result)
+
+    belt_class = np.empty(size, dtype=np.int16)
+    lc_class = np.empty(size, dtype=np.int32)
+    sum_ = np.empty(size, dtype=np.float64)
+
+    start = 0
+    for belt in result:
+        groups = belt["groups"]
+        end = start + len(groups)
+        belt_class[start:end] = belt["biobelt"]
+        lc_class[start:end] = [group["lc"] for group in groups]
+        sum_[start:end] = [group["sum"] for group in groups]
+        start = end
+
+    return belt_class, lc_class, sum_
+
+
+def parse_result(
+    result: Union[List[SubItem], Dict[str, List[SubItem]]], single: bool = False
+) -> pd.DataFrame:
     """
     This function parses the nest result to create a exploded dataframe.
     The input format should be of type:
@@ -382,6 +453,10 @@ def parse_result(result: dict, single: bool = False) -> pd.DataFrame:
         ]}
     ]}
 
+    The nested groups are flattened into numpy arrays (see flatten_groups) and
+    the dataframe is built at once with int16 belts, int32 classes and float64
+    sums.
+
     Parameters
     ----------
 
@@ -397,64 +472,252 @@ def parse_result(result: dict, single: bool = False) -> pd.DataFrame:
 
     """
     if single:
-        # Define the dataframe depending whether if single or double level nested
-        df = pd.DataFrame(columns=["belt_class", "lc_class", "sum"])
+        belt_class, lc_class, sum_ = flatten_groups(result)
 
-        s = 0
-        for belt in result:
-            for lc_class in belt["groups"]:
-                df.loc[s] = [belt["biobelt"], lc_class["lc"], lc_class["sum"]]
-                s += 1
+        return pd.DataFrame(
+            {"belt_class": belt_class, "lc_class": lc_class, "sum": sum_}
+        )
 
-    else:
-        # Flattening the data and preparing it for DataFrame
-        rows = []
-        for category, groups in result.items():
-            for group_data in groups:
-                main_group = group_data["biobelt"]
-                for sub_group_data in group_data["groups"]:
-                    row = {
-                        "category": category,
-                        "belt_class": main_group,
-                        "transition": sub_group_data["lc"],
-                        "sum": sub_group_data["sum"],
+    # Flatten each category and concatenate the arrays, starting from empty
+    # arrays so the dtypes are kept even when there are no categories
+    categories = list(result.keys())
+    flattened = [flatten_groups(result[category]) for category in categories]
+    belt_class, transition, sum_ = (
+        np.concatenate(arrays) for arrays in zip(flatten_groups([]), *flattened)
+    )
+    sizes = [len(belt_classes) for belt_classes, _, _ in flattened]
+
+    return pd.DataFrame(
+        {
+            "category": pd.Categorical(
+                np.repeat(np.array(categories, dtype=object), sizes),
+                categories=categories,
+            ),
+            "belt_class": belt_class,
+            "transition": transition,
+            "sum": sum_,
+        }
+    )
+
+
+class ResultsCache:
+    """Parsed DataFrames of a ResultsDict, memoized by process_id and category.
+
+    Each process is parsed once with parse_result and shared by the reports,
+    the dashboard and the interpolation. The cache is bound to one results
+    dictionary, a new one has to be created when the results change (see
+    MgciModel.results_cache).
+
+    Args:
+        results: results of the calculation, coming from the model or read
+            from a task file
+    """
+
+    def __init__(self, results: ResultsDict):
+        self.results = results
+        self._parsed: Dict[Tuple[str, Union[str, None]], pd.DataFrame] = {}
+
+    @classmethod
+    def from_long(cls, df: pd.DataFrame) -> "ResultsCache":
+        """Build the cache from the long layout (see read_long_results).
+
+        The DataFrames of every process are sliced from the table, with the same
+        columns and dtypes as parse_result, without building the nested
+        ResultsDict.
+        """
+
+        cache = cls({})
+
+        for process_id, process_df in df.groupby(
+            "process_id", sort=False, observed=True
+        ):
+            process_id = str(process_id)
+            cache.results[process_id] = {}
+            category = process_df.category.astype(str).to_numpy()
+
+            sub_a_df = process_df[category == "sub_a"]
+            if len(sub_a_df):
+                cache._parsed[(process_id, "sub_a")] = pd.DataFrame(
+                    {
+                        "belt_class": sub_a_df.biobelt.to_numpy(np.int16),
+                        "lc_class": sub_a_df.lc.to_numpy(np.int32),
+                        "sum": sub_a_df["sum"].to_numpy(np.float64),
+                    }
+                )
+
+            sub_b_df = process_df[category != "sub_a"]
+            if len(sub_b_df):
+                # Categories in the order of the table, as the GEE dictionaries
+                sub_b_category = category[category != "sub_a"]
+                cache._parsed[(process_id, None)] = pd.DataFrame(
+                    {
+                        "category": pd.Categorical(
+                            sub_b_category,
+                            categories=list(dict.fromkeys(sub_b_category)),
+                        ),
+                        "belt_class": sub_b_df.biobelt.to_numpy(np.int16),
+                        "transition": sub_b_df.lc.to_numpy(np.int32),
+                        "sum": sub_b_df["sum"].to_numpy(np.float64),
                     }
-                    rows.append(row)
+                )
+
+        return cache
+
+    def keys(self):
+        """Return the process ids of the results"""
+        return self.results.keys()
+
+    def get(self, process_id: str, category: str = "sub_a") -> pd.DataFrame:
+        """Return a copy of the parsed DataFrame of a process.
+
+        Args:
+            process_id: key of the results, i.e. "2000" or "2000_2015_2018"
+            category: "sub_a" or one of the sub indicator B categories
+        """
+
+        return self._get(process_id, category).copy()
+
+    def _get(self, process_id: str, category: Union[str, None]) -> pd.DataFrame:
+        """Return the memoized DataFrame, category None stands for all the sub B
+        categories of the process"""
+
+        key = (process_id, category)
+
+        if key not in self._parsed:
+            if category == "sub_a":
+                df = parse_result(self.results[process_id]["sub_a"], single=True)
+            elif category is None:
+                df = parse_result(self.results[process_id], single=False)
+            else:
+                df = self._get(process_id, None)
+                df = df[df.category == category]
+
+            self._parsed[key] = df
+
+        return self._parsed[key]
+
+
+def get_results_cache(
+    results: Union[ResultsDict, ResultsCache, pd.DataFrame],
+) -> ResultsCache:
+    """Return the given cache or wrap the results dictionary, or the long results
+    table, in a new one"""
+
+    if isinstance(results, ResultsCache):
+        return results
 
-        df = pd.DataFrame(rows)
+    if isinstance(results, pd.DataFrame):
+        return ResultsCache.from_long(results)
+
+    return ResultsCache(results)
+
+
+GEE_KEY = re.compile(r"([A-Za-z_]\w*)=")
+"re.Pattern: keys of the GEE string representation of a dictionary, i.e. {biobelt=2, ...}"
+
+
+def parse_gee_cell(cell: str) -> List[SubItem]:
+    """Parse a cell of a CSV exported from GEE.
+
+    GEE writes nested dictionaries with its own literal syntax, i.e.
+    [{biobelt=2, groups=[{lc=3, sum=0.75}]}]. Quoting the keys and replacing
+    the "=" separator transforms it into valid JSON, which is parsed without
+    evaluating the content of the file.
+
+    Args:
+        cell: string representation of the reduced groups
+
+    Returns:
+        the list of biobelt groups, with the same structure as the on the fly
+        calculation
+    """
+
+    try:
+        return json.loads(GEE_KEY.sub(r'"\1":', cell))
+    except (TypeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Invalid GEE exported value: {str(cell)[:100]}") from e
+
+
+LONG_DTYPES = {
+    "process_id": str,
+    "category": str,
+    "biobelt": np.int16,
+    "lc": np.int32,
+    "sum": np.float64,
+}
+"dict: dtypes of the LONG_COLUMNS, process_id and category end up as categoricals"
+
+
+def read_long_results(task_file: Pathlike, cache: bool = True) -> pd.DataFrame:
+    """Read a results table exported in the long layout (see gee.to_long_collection).
+
+    Local tables are cached in a Parquet file next to the csv, which is read
+    instead of the csv as long as it is newer.
+
+    Args:
+        task_file: csv file with the LONG_COLUMNS
+        cache: read and write the Parquet cache
+
+    Returns:
+        one row per reduced group, with typed columns
+    """
+
+    csv_file = Path(task_file)
+    parquet_file = csv_file.with_suffix(".parquet")
+    # Remote files (sepal_client) are never cached
+    cache = cache and csv_file.exists()
+
+    if cache and parquet_file.exists():
+        if parquet_file.stat().st_mtime >= csv_file.stat().st_mtime:
+            return pd.read_parquet(parquet_file)
+
+    df = read_file(task_file, usecols=LONG_COLUMNS, dtype=LONG_DTYPES)
+    df = df[LONG_COLUMNS].astype({"process_id": "category", "category": "category"})
+
+    if cache:
+        df.to_parquet(parquet_file, index=False)
 
     return df
 
 
-def read_from_csv(task_file: Pathlike) -> dict:
+def is_long_table(task_file: Pathlike) -> bool:
+    """Return True if the csv file has the long layout columns"""
+
+    columns = read_file(task_file, nrows=0).columns
+
+    return set(LONG_COLUMNS) <= set(columns)
+
+
+def read_from_csv(
+    task_file: Pathlike, chunksize: int = 50
+) -> Union[ResultsDict, ResultsCache]:
     """read csv format from feature collection exportation in gee
 
+    Rows are read in chunks and each cell is parsed with parse_gee_cell. Tables
+    exported in the long layout are read with read_long_results and returned as
+    a ResultsCache, they can be used everywhere the results are expected.
+
     Args:
         task_file(path): full path of downloaded task
+        chunksize: number of rows read at once
     """
 
-    sub_b_cats = [
-        "baseline_degradation",
-        "final_degradation",
-        "baseline_transition",
-        "report_transition",
-    ]
-    results = {}
-    raw_results_df = read_file(task_file)
+    if is_long_table(task_file):
+        return ResultsCache.from_long(read_long_results(task_file))
 
-    def read_line(line):
-        return eval(
-            re.sub(r"([a-zA-Z]+)", r"'\1'", line).replace("=", ":").replace("'E'", "E")
-        )
+    results = {}
+    chunks = read_file(task_file, dtype=str, chunksize=chunksize)
 
-    for _, row in raw_results_df.iterrows():
+    for raw_results_df in chunks:
+        for row in raw_results_df.to_dict("records"):
+            process_id = str(row["process_id"])
 
-        if len(str(row["process_id"]).split("_")) > 1:
-            results[row["process_id"]] = {}
-            for cat in sub_b_cats:
-                results[row["process_id"]][cat] = read_line(row[cat])
-        else:
-            results[str(row["process_id"])] = {"sub_a": read_line(row["sub_a"])}
+            if len(process_id.split("_")) > 1:
+                results[process_id] = {
+                    cat: parse_gee_cell(row[cat]) for cat in SUB_B_CATEGORIES
+                }
+            else:
+                results[process_id] = {"sub_a": parse_gee_cell(row["sub_a"])}
 
     return results
 
@@ -539,6 +802,7 @@ def get_sub_a_data_reports(
 
     mtn_reports = []
     sub_a_reports = []
+    results = get_results_cache(results)
 
     sub_a_years = list(reporting_years_sub_a.keys())
 
@@ -593,6 +857,7 @@ def get_sub_b_data_reports(
 ) -> List:
 
     sub_b_reports = []
+    results = get_results_cache(results)
 
     reporting_years_sub_b = get_reporting_years(sub_b_year, "sub_b")
     sub_b_years = get_sub_b_years(reporting_years_sub_b)
@@ -629,7 +894,27 @@ def export_reports(
     session_id: str,
     which: Literal["both", "sub_a", "sub_b"] = "both",
     sepal_client=None,
+    save_store: bool = False,
 ) -> str:
+    """Write the reporting tables of the results in an xlsx file.
+
+    Args:
+        save_store: also write the tables in the Parquet store of the report
+            folder, partitioned by REF_AREA and TIME_PERIOD (see
+            report_writer.get_store_files). consolidate.consolidate_reports
+            reads them from it instead of the xlsx file
+    """
+
+    # openpyxl and pyarrow are only imported when a report is written
+    from component.scripts.report_writer import (
+        STORE_FOLDER,
+        get_store_files,
+        write_reports,
+        write_store,
+    )
+
+    # Both sub indicators share the parsed results
+    results = get_results_cache(results)
 
     output_folder = Path(report_folder)
     output_name = str(Path(output_folder, output_folder.name + f"{session_id}.xlsx"))
@@ -638,26 +923,21 @@ def export_reports(
             Path(output_folder, output_folder.name + f"{session_id}_{which}.xlsx")
         )
 
-    def build_excel_document(writer):
+    def build_sheets() -> Dict[str, pd.DataFrame]:
+
+        sheets = {}
 
         if which in ["both", "sub_a"]:
             # Get and process Sub A reports
             sub_a_reports, mtn_reports = get_sub_a_data_reports(
                 results, reporting_years_sub_a, geo_area_name, ref_area, source_detail
             )
-            mtn_reports_df = pd.concat(mtn_reports)
-            er_mtn_grnvi_df = pd.concat([report[0] for report in sub_a_reports])
-            er_mtn_grncov_df = pd.concat([report[1] for report in sub_a_reports])
-
-            # Write Sub A reports to Excel
-            mtn_reports_df.to_excel(
-                writer, sheet_name="Table1_ER_MTN_TOTL", index=False
-            )
-            er_mtn_grncov_df.to_excel(
-                writer, sheet_name="Table2_ER_MTN_GRNCOV", index=False
+            sheets["Table1_ER_MTN_TOTL"] = pd.concat(mtn_reports)
+            sheets["Table2_ER_MTN_GRNCOV"] = pd.concat(
+                [report[1] for report in sub_a_reports]
             )
-            er_mtn_grnvi_df.to_excel(
-                writer, sheet_name="Table3_ER_MTN_GRNCVI", index=False
+            sheets["Table3_ER_MTN_GRNCVI"] = pd.concat(
+                [report[0] for report in sub_a_reports]
             )
 
         if which in ["both", "sub_b"]:
@@ -670,48 +950,29 @@ def export_reports(
                 ref_area,
                 source_detail,
             )
-            er_mtn_dgrp_df = pd.concat([report[0] for report in sub_b_reports])
-            er_mtn_dgda_df = pd.concat([report[1] for report in sub_b_reports])
-
-            # Write Sub B reports to Excel
-            er_mtn_dgda_df.to_excel(
-                writer, sheet_name="Table4_ER_MTN_DGRDA", index=False
+            sheets["Table4_ER_MTN_DGRDA"] = pd.concat(
+                [report[1] for report in sub_b_reports]
             )
-            er_mtn_dgrp_df.to_excel(
-                writer, sheet_name="Table5_ER_MTN_DGRDP", index=False
+            sheets["Table5_ER_MTN_DGRDP"] = pd.concat(
+                [report[0] for report in sub_b_reports]
             )
 
-        # Formatting
-        for sheetname in writer.sheets:
-            worksheet = writer.sheets[sheetname]
-            for col in worksheet.columns:
-                max_length = 0
-                column = col[0]
-                for cell in col:
-                    try:
-                        if len(str(cell.value)) > max_length:
-                            max_length = len(str(cell.value))
-                    except:
-                        pass
-                adjusted_width = max(max_length, len(str(column.value))) + 4
-                worksheet.column_dimensions[get_column_letter(column.column)].width = (
-                    adjusted_width
-                )
-
-                # Align "obs_value" column to the right
-                if "OBS" in str(column.value).upper():
-                    for cell in col:
-                        cell.alignment = Alignment(horizontal="right")
+        return sheets
 
+    # The column widths and the alignment are set while streaming the sheets
     if not sepal_client:
-        with pd.ExcelWriter(output_name, engine="openpyxl") as writer:
-            build_excel_document(writer)
+        sheets = build_sheets()
+        write_reports(sheets, output_name)
+
+        if save_store:
+            write_store(sheets, output_folder / STORE_FOLDER, Path(output_name).stem)
+
         return output_name
 
     else:
+        sheets = build_sheets()
         buffer = BytesIO()
-        with pd.ExcelWriter(buffer, engine="openpyxl") as writer:
-            build_excel_document(writer)
+        write_reports(sheets, buffer)
         buffer.seek(0)
         excel_bytes = buffer.getvalue()
         # make sure the folder exists
@@ -719,6 +980,13 @@ def export_reports(
         # overwrite=True to regenerate an existing report (pysepal-api 409s otherwise)
         sepal_client.set_file(output_name, excel_bytes, overwrite=True)
 
+        if save_store:
+            store_files = get_store_files(sheets, Path(output_name).stem)
+            for path, content in store_files.items():
+                store_file = output_folder / STORE_FOLDER / path
+                sepal_client.get_remote_dir(store_file.parent, parents=True)
+                sepal_client.set_file(str(store_file), content, overwrite=True)
+
         return output_name
 
 
@@ -6,21 +6,40 @@ import component.scripts as cs
 # isort: off
 from component.parameter.index_parameters import sub_a_cols, sub_a_landtype_cols
 import component.parameter.module_parameter as param
+import component.parameter.tables as tables
 
 
-from component.scripts.report_scripts import (
-    fill_parsed_df,
-    get_nature,
-    get_belt_desc,
-    get_lc_desc,
-    get_obs_status,
-)
+from component.scripts.report_scripts import fill_parsed_df, finalize_report
 
 if TYPE_CHECKING:
     from component.model.model import MgciModel
 
 
-LC_MAP_MATRIX = pd.read_csv(param.LC_MAP_MATRIX)
+def annotate_parsed_df(parsed_df: pd.DataFrame) -> pd.DataFrame:
+    """Fill the parsed DataFrame with all the belt/land cover combinations and
+    add the is_green column.
+
+    The annotated frame is shared by Table2 and Table3, calling this function
+    on an already annotated frame returns a copy of it.
+    """
+
+    if "is_green" in parsed_df.columns:
+        return parsed_df.copy()
+
+    df = fill_parsed_df(parsed_df.copy())
+
+    # As for this subindicator we will always use the same land cover classification,
+    # we can use the default map matrix to get the is_green value.
+    green_lookup = tables.get_green_lookup()
+    unknown = set(df["lc_class"]) - set(green_lookup)
+    if unknown:
+        raise ValueError(
+            f"The land cover classes {sorted(unknown)} are not in the default map matrix"
+        )
+
+    df["is_green"] = df["lc_class"].map(green_lookup).astype(int)
+
+    return df
 
 
 def get_mgci_landtype(parsed_df):
@@ -31,17 +50,7 @@ def get_mgci_landtype(parsed_df):
     Table2_1542a_LandCoverType
     """
 
-    df = fill_parsed_df(parsed_df.copy())
-
-    # As for this subindicator we will always use the same land cover classification,
-    # we can use the param.LC_MAP_MATRIX to get the is_green value.
-
-    df["is_green"] = df.apply(
-        lambda row: LC_MAP_MATRIX.loc[LC_MAP_MATRIX.to_code == row["lc_class"]][
-            "green"
-        ].iloc[0],
-        axis=1,
-    )
+    df = annotate_parsed_df(parsed_df)
 
     # Get area of "green" classes and group them by belt_class
     green_cover = (
@@ -91,15 +100,8 @@ def get_mgci(parsed_df: pd.DataFrame) -> pd.DataFrame:
     Table3_1542a_MGCI
     """
 
-    df = fill_parsed_df(parsed_df.copy())
-
     # Adds is_green column to the dataframe based on lc_class.
-    df["is_green"] = df.apply(
-        lambda row: LC_MAP_MATRIX.loc[LC_MAP_MATRIX.to_code == row["lc_class"]][
-            "green"
-        ].iloc[0],
-        axis=1,
-    )
+    df = annotate_parsed_df(parsed_df)
 
     # Get the green and non green total area for each belt
     tmp_df = df.groupby(["belt_class", "is_green"], as_index=False).sum()
@@ -216,7 +218,6 @@ def get_report(
         report_df["OBS_VALUE_RSA"] = param.TBD  # TODO: check if we can report RSA
         report_df["UNIT_MEASURE"] = "KM2"
         report_df["UNIT_MULT"] = param.TBD
-        report_df["LAND_COVER"] = report_df.apply(get_lc_desc, axis=1)
         output_cols = sub_a_landtype_cols
     else:
         # Table3_1542a_MGCI
@@ -225,7 +226,6 @@ def get_report(
         report_df["OBS_VALUE_RSA"] = param.TBD  # TODO: check if we can report RSA
         report_df["UNIT_MEASURE"] = "PT"
         report_df["UNIT_MULT"] = param.TBD
-        report_df["LAND_COVER"] = report_df.apply(get_lc_desc, axis=1)
         output_cols = sub_a_cols
 
     # The following cols are equal for both tables
@@ -239,28 +239,18 @@ def get_report(
     report_df["TIME_DETAIL"] = year
     report_df["SOURCE_DETAIL"] = source_detail
     report_df["COMMENT_OBS"] = "FAO estimate"
-    report_df["BIOCLIMATIC_BELT"] = report_df.apply(get_belt_desc, axis=1)
 
     # round obs_value
     report_df["OBS_VALUE"] = report_df["OBS_VALUE"].round(4)
     report_df["OBS_VALUE_RSA"] = report_df["OBS_VALUE"].round(4)
 
-    # Convert DataFrame to object type
-    report_df = report_df.astype(object)
-
-    # fill NaN values with "N/A"
-    report_df.fillna("NA", inplace=True)
-
-    # fill zeros with "N/A"
-    report_df.replace(0, "NA", inplace=True)
-
-    report_df["NATURE"] = report_df.apply(get_nature, axis=1)
-    report_df["OBS_STATUS"] = report_df.apply(get_obs_status, axis=1)
+    # Add descriptions, NATURE, OBS_STATUS and fill missing values with "NA"
+    report_df = finalize_report(report_df, output_cols)
 
     if land_type:
         assert len(report_df) == 55, "Report should have 55 rows"
 
-    return report_df[output_cols].reset_index(drop=True)
+    return report_df.reset_index(drop=True)
 
 
 def get_reports(
@@ -275,6 +265,9 @@ def get_reports(
     SubIndA_LandType
     """
 
+    # Both tables share the same filled and annotated frame
+    parsed_df = annotate_parsed_df(parsed_df)
+
     mgci_report = get_report(
         parsed_df, year_s, geo_area_name, ref_area, source_detail, land_type=False
     )
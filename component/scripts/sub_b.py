@@ -3,25 +3,18 @@ from typing import Dict, Optional, Tuple, TYPE_CHECKING
 import pandas as pd
 
 import component.parameter.module_parameter as param
+import component.parameter.tables as tables
 import component.scripts as cs
 
 # isort: off
 from component.parameter.index_parameters import sub_b_landtype_cols, sub_b_perc_cols
 
-from component.scripts.report_scripts import (
-    get_impact,
-    get_nature,
-    get_belt_desc,
-    get_obs_status,
-)
+from component.scripts.report_scripts import finalize_report, map_impact
 from component.scripts.file_handler import read_file
 
 if TYPE_CHECKING:
     from component.model.model import MgciModel
 
-BELT_TABLE = pd.read_csv(param.BIOBELTS_DESC)
-"pd.Dataframe: bioclimatic belts classes and description"
-
 
 def get_degraded_area(parsed_df: pd.DataFrame, transition_matrix: str):
     """Return net and gross area of degraded land per belt class"""
@@ -32,9 +25,7 @@ def get_degraded_area(parsed_df: pd.DataFrame, transition_matrix: str):
 
     if df_type == "baseline_transition":
         transition_table = read_file(transition_matrix)
-        df["impact"] = df.apply(
-            lambda x: get_impact(x, transition_table), axis=1
-        )
+        df["impact"] = map_impact(df, transition_table)
     elif df_type == "final_degradation":
         df["impact"] = df["transition"]
     else:
@@ -77,7 +68,7 @@ def get_degraded_area(parsed_df: pd.DataFrame, transition_matrix: str):
     # we must be sure that all belt classes are present.
     # if not, we must add them with 0 values
     net_degraded = net_degraded.merge(
-        BELT_TABLE[["belt_class"]],
+        tables.get_belt_table()[["belt_class"]],
         left_on="belt_class",
         right_on="belt_class",
         how="outer",
@@ -178,25 +169,12 @@ def get_report(
     report_df["SOURCE_DETAIL"] = source_detail
     report_df["COMMENT_OBS"] = "FAO estimate"
 
-    report_df["BIOCLIMATIC_BELT"] = report_df.apply(get_belt_desc, axis=1)
-
     # round obs_value
     report_df["OBS_VALUE"] = report_df["OBS_VALUE"].round(4)
     report_df["OBS_VALUE_NET"] = report_df["OBS_VALUE_NET"].round(4)
 
-    # Convert DataFrame to object type
-    report_df = report_df.astype(object)
-
-    # Now fill NaN values with "NA"
-    report_df.fillna("NA", inplace=True)
-
-    # fill zeros with "N/A"
-    report_df.replace(0, "NA", inplace=True)
-
-    report_df["NATURE"] = report_df.apply(get_nature, axis=1)
-    report_df["OBS_STATUS"] = report_df.apply(get_obs_status, axis=1)
-
-    return report_df[output_cols]
+    # Add descriptions, NATURE, OBS_STATUS and fill missing values with "NA"
+    return finalize_report(report_df, output_cols)
 
 
 def get_reports(
@@ -1,54 +1,69 @@
+from functools import lru_cache
+
 import ee
 
 # Script to calculate Real Surface Area based on Jenness(2004)
 # https://www.fs.fed.us/rm/pubs_other/rmrs_2004_jenness_j001.pdf
 # GEE: https://code.earthengine.google.com/82ddeec5abe29f8b56d096b1bdd9ba36
 
-__all__ = ["get_real_surface_area"]
+__all__ = [
+    "get_real_surface_area",
+    "get_tile_real_surface_area",
+    "read_real_surface_area",
+    "compare_real_surface_area",
+]
+
+RSA_HALO = 200
+"""int: buffer (meters) of the precomputed tiles, two SRTM pixels, so their border
+pixels have all their neighbors"""
+
 
+# The constants are plain Python objects, wrapped in ee objects when the graph is
+# built, so importing this module doesn't need an initialized Earth Engine.
 
 # Define names to the eight neighbors and central bands.
-NEIGHBORS_NAMES = ee.List(["A", "B", "C", "D", "E", "F", "G", "H", "I"])
+NEIGHBORS_NAMES = ["A", "B", "C", "D", "E", "F", "G", "H", "I"]
 
 # Define a subtraction matrix used to steps 1-2.
-SUBTRACTION_MATRIX = ee.Dictionary(
-    {
-        "A": ["B", "D", "E"],
-        "B": ["C", "E"],
-        "C": ["F", "E"],
-        "D": ["E", "G"],
-        "E": ["F", "H"],
-        "F": ["I"],
-        "G": ["H", "E"],
-        "H": ["I"],
-        "I": ["E"],
-    }
-)
+SUBTRACTION_MATRIX = {
+    "A": ["B", "D", "E"],
+    "B": ["C", "E"],
+    "C": ["F", "E"],
+    "D": ["E", "G"],
+    "E": ["F", "H"],
+    "F": ["I"],
+    "G": ["H", "E"],
+    "H": ["I"],
+    "I": ["E"],
+}
 
 # Define diagonals (from the center pixel)
-DIAGONALS = ee.List(["AE", "CE", "GE", "IE"])
+DIAGONALS = ["AE", "CE", "GE", "IE"]
 
 # Define triangles segments that will be used in the 3-4 step
-TRIANGLES_MATRIX = ee.Dictionary(
-    {
-        "T1": ["AE", "AB", "BE"],
-        "T2": ["BE", "BC", "CE"],
-        "T3": ["AD", "DE", "AE"],
-        "T4": ["CE", "CF", "EF"],
-        "T5": ["DE", "DG", "GE"],
-        "T6": ["EF", "FI", "IE"],
-        "T7": ["GE", "EH", "GH"],
-        "T8": ["EH", "IE", "HI"],
-    }
-)
-
-
+TRIANGLES_MATRIX = {
+    "T1": ["AE", "AB", "BE"],
+    "T2": ["BE", "BC", "CE"],
+    "T3": ["AD", "DE", "AE"],
+    "T4": ["CE", "CF", "EF"],
+    "T5": ["DE", "DG", "GE"],
+    "T6": ["EF", "FI", "IE"],
+    "T7": ["GE", "EH", "GH"],
+    "T8": ["EH", "IE", "HI"],
+}
+
+
+@lru_cache(maxsize=8)
 def get_real_surface_area(dem_asset: str, clip_geometry):
     """
     Calculates real surface area from a Digital Elevation Model. Based on
     https://www.fs.fed.us/rm/pubs_other/rmrs_2004_jenness_j001.pdf paper from
     Jenness(2004).
 
+    The image only depends on the DEM and the geometry, so it is memoized and
+    the same graph is shared by all the years and sub indicators of a
+    calculation (ee objects are hashed by value).
+
     Args:
         dem_asset (str): digital elevation model asset available in GEE
         clip_geometry (ee.Object): GEE geometry to clip the DEM
@@ -60,7 +75,9 @@ def get_real_surface_area(dem_asset: str, clip_geometry):
 
             # Find the cellsize, depending if it's a diagonal or not
             size = ee.Number(
-                ee.Algorithms.If(DIAGONALS.contains(band_name), diagonal_size, cellsize)
+                ee.Algorithms.If(
+                    ee.List(DIAGONALS).contains(band_name), diagonal_size, cellsize
+                )
             )
 
             # Subtract corresponding neighbors (based on subtraction matrix dictionary)
@@ -78,7 +95,9 @@ def get_real_surface_area(dem_asset: str, clip_geometry):
             )
 
         # Return a list of half-sides
-        return ee.List(SUBTRACTION_MATRIX.get(neighbor_name)).map(inner_subtract)
+        return ee.List(ee.Dictionary(SUBTRACTION_MATRIX).get(neighbor_name)).map(
+            inner_subtract
+        )
 
     def get_triangles_area(triangle_name, triangle_sides):
         semi_perimeter = (
@@ -112,7 +131,7 @@ def get_real_surface_area(dem_asset: str, clip_geometry):
     diagonal_size = cellsize.pow(2).multiply(2).sqrt()
 
     # Calculate half-sides, based on steps 1-2
-    half_sides = NEIGHBORS_NAMES.map(get_half_side)
+    half_sides = ee.List(NEIGHBORS_NAMES).map(get_half_side)
     half_sides = ee.ImageCollection.fromImages(half_sides.flatten()).toBands()
 
     # Rename bands, since in the previous step a prefix has been added
@@ -121,10 +140,76 @@ def get_real_surface_area(dem_asset: str, clip_geometry):
     )
     half_sides = ee.Image(half_sides.rename(new_names))
 
-    triangles_area = TRIANGLES_MATRIX.map(get_triangles_area)
+    triangles_area = ee.Dictionary(TRIANGLES_MATRIX).map(get_triangles_area)
 
     return (
         ee.ImageCollection.fromImages(triangles_area.values())
         .toBands()
         .reduce(ee.Reducer.sum())
     )
+
+
+def get_tile_real_surface_area(dem_asset: str, tile_geometry) -> ee.Image:
+    """Real surface area of a tile of the precomputed asset.
+
+    The surface is computed on the tile bounds buffered by RSA_HALO and clipped
+    back to the bounds, so adjacent tiles are seamless and every pixel has the
+    same value as in the on the fly computation.
+
+    Args:
+        dem_asset (str): digital elevation model asset available in GEE
+        tile_geometry (ee.Geometry): tile, or country, geometry
+    """
+
+    bounds = ee.Geometry(tile_geometry).bounds()
+
+    return get_real_surface_area(dem_asset, bounds.buffer(RSA_HALO)).clip(bounds)
+
+
+def read_real_surface_area(rsa_asset, dem_asset: str) -> ee.Image:
+    """Return the precomputed real surface area as a single image.
+
+    Args:
+        rsa_asset (str, list): image collection id or list of the tile image ids
+        dem_asset (str): dem used to compute the tiles, the mosaic gets its
+            projection so it is reduced as the on the fly image
+    """
+
+    return (
+        ee.ImageCollection(rsa_asset)
+        .mosaic()
+        .setDefaultProjection(ee.Image(dem_asset).projection())
+    )
+
+
+def compare_real_surface_area(
+    dem_asset: str, clip_geometry, rsa_image: ee.Image
+) -> ee.Number:
+    """Return the largest relative difference between rsa_image and the real
+    surface area computed on the fly, over the pixels where the latter is defined.
+
+    Args:
+        dem_asset (str): digital elevation model asset available in GEE
+        clip_geometry (ee.Object): GEE geometry used to validate the image
+        rsa_image (ee.Image): precomputed real surface area
+    """
+
+    on_the_fly = get_real_surface_area(dem_asset, clip_geometry)
+
+    difference = (
+        rsa_image.subtract(on_the_fly)
+        .abs()
+        .divide(on_the_fly)
+        .updateMask(on_the_fly.mask())
+        .rename("difference")
+    )
+
+    return ee.Number(
+        difference.reduceRegion(
+            reducer=ee.Reducer.max(),
+            geometry=ee.FeatureCollection(clip_geometry).geometry(),
+            scale=ee.Image(dem_asset).projection().nominalScale(),
+            bestEffort=True,
+            maxPixels=int(1e13),
+        ).get("difference")
+    )
@@ -0,0 +1,169 @@
+"""Wait for many GEE tasks at once.
+
+download_from_task_file checks a single task when the user asks for it. The
+poller follows a whole batch: the states are read concurrently but with a
+limited rate of requests, and a task whose state doesn't change is checked less
+and less often (exponential backoff with jitter, so hundreds of tasks submitted
+together are not all checked at the same time).
+"""
+
+import asyncio
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional
+
+from pysepal.scripts.gee_interface import GEEInterface
+
+from component.scripts.task_store import COMPLETED_STATES, FAILED_STATES, TaskStore
+
+log = logging.getLogger("MGCI.scripts.task_poller")
+
+__all__ = ["RateLimiter", "get_delay", "poll_tasks", "STATE_COLORS"]
+
+STATE_COLORS = {
+    "PENDING": "info",
+    "READY": "info",
+    "RUNNING": "info",
+    "COMPLETED": "success",
+    "SUCCEEDED": "success",
+    "FAILED": "error",
+    "CANCELLED": "warning",
+    "CANCELLING": "warning",
+}
+"""dict: color of the TaskMsg icon for every GEE task state"""
+
+
+class RateLimiter:
+    """Limit the requests sent to GEE: at most max_concurrent at the same time
+    and max_rate started per second.
+
+    Use it as an async context manager around every request.
+    """
+
+    def __init__(self, max_concurrent: int = 10, max_rate: float = 5):
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.interval = 1 / max_rate if max_rate else 0
+        self.next_start = 0.0
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+
+        # book the next start time before sleeping, requests are spaced evenly
+        now = time.monotonic()
+        start = max(now, self.next_start)
+        self.next_start = start + self.interval
+        await asyncio.sleep(start - now)
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+def get_delay(
+    attempt: int,
+    interval: float = 10,
+    max_interval: float = 300,
+    factor: float = 2,
+    jitter: float = 0.5,
+) -> float:
+    """Return the time to wait before the next check of a task.
+
+    The delay is interval * factor ** attempt, capped to max_interval, minus a
+    random part of up to jitter times the delay.
+    """
+
+    delay = min(interval * factor**attempt, max_interval)
+
+    return delay * (1 - jitter * random.random())
+
+
+async def poll_tasks(
+    task_ids: Iterable[str],
+    gee_interface: GEEInterface,
+    on_state: Optional[Callable[[str, str, Optional[str]], None]] = None,
+    on_complete: Optional[Callable[[str], Awaitable]] = None,
+    task_store: Optional[TaskStore] = None,
+    limiter: Optional[RateLimiter] = None,
+    interval: float = 10,
+    max_interval: float = 300,
+    max_errors: int = 5,
+) -> Dict[str, dict]:
+    """Check the tasks until they are all finished.
+
+    Args:
+        task_ids: ids of the GEE tasks
+        on_state: called with the task id, its new state and the error, if any,
+            every time the state of a task changes. Use STATE_COLORS to show it
+            in a TaskMsg.
+        on_complete: coroutine function called with the id of every completed
+            task, to download and report its results. Its errors are sent to
+            on_state with the COMPLETED state.
+        task_store: store updated with the states and errors
+        limiter: rate of the requests to GEE, 10 concurrent requests and 5 per
+            second by default
+        interval: time between the first checks of a task, in seconds
+        max_interval: maximum time between two checks of a task
+        max_errors: number of consecutive errors reading the state of a task
+            before giving up on it
+
+    Return:
+        the final state and error of every task
+    """
+
+    limiter = limiter or RateLimiter()
+    results = {}
+
+    def set_state(task_id: str, state: str, error: Optional[str] = None) -> None:
+        results[task_id] = {"state": state, "error": error}
+        log.debug(f"Task {task_id}: {state} {error or ''}")
+
+        if task_store:
+            task_store.set_state(task_id, state, error)
+
+        if on_state:
+            on_state(task_id, state, error)
+
+    async def poll(task_id: str) -> None:
+        state, attempt, n_errors = None, 0, 0
+
+        while True:
+            try:
+                async with limiter:
+                    task = await gee_interface.get_task_async(task_id)
+            except Exception as e:
+                n_errors += 1
+                log.warning(f"The state of the task {task_id} can't be read: {e}")
+
+                if n_errors >= max_errors:
+                    set_state(task_id, "FAILED", f"The state can't be read: {e}")
+                    return
+            else:
+                n_errors = 0
+                new_state = task.metadata.state if task else "FAILED"
+
+                if new_state != state:
+                    state, attempt = new_state, 0
+                    error = None
+
+                    if state in FAILED_STATES:
+                        error = str(getattr(task, "error", None) or f"Task {state}")
+
+                    set_state(task_id, state, error)
+
+                if state in COMPLETED_STATES:
+                    if on_complete:
+                        try:
+                            await on_complete(task_id)
+                        except Exception as e:
+                            set_state(task_id, state, str(e))
+                    return
+
+                if state in FAILED_STATES:
+                    return
+
+            await asyncio.sleep(get_delay(attempt, interval, max_interval))
+            attempt += 1
+
+    await asyncio.gather(*[poll(task_id) for task_id in dict.fromkeys(task_ids)])
+
+    return results
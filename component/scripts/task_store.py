@@ -0,0 +1,254 @@
+"""Local SQLite store of the GEE tasks started in the background.
+
+Every task sent by deferred_calculation.task_process is also recorded here with
+its AOI, years, state, result file and timings. The store is indexed on the
+state so the pending, completed but not reported and failed tasks are instant
+queries, even with thousands of tasks. The JSON task files can be imported.
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from component.types import Pathlike
+
+__all__ = [
+    "TaskStore",
+    "PENDING_STATES",
+    "COMPLETED_STATES",
+    "FAILED_STATES",
+    "TASK_STORE_NAME",
+]
+
+TASK_STORE_NAME = "tasks.db"
+"""str: name of the store in the tasks directory"""
+
+PENDING_STATES = ["PENDING", "READY", "RUNNING"]
+"""list: states of the tasks that are not finished yet, PENDING is the state of
+a task that has been submitted but never checked"""
+
+COMPLETED_STATES = ["COMPLETED", "SUCCEEDED"]
+"""list: GEE states of the tasks that have a result to download"""
+
+FAILED_STATES = ["FAILED", "CANCELLED", "CANCELLING"]
+"""list: GEE states of the tasks that will never complete, a CANCELLING task
+won't have any result either"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    aoi TEXT,
+    years TEXT,
+    state TEXT NOT NULL DEFAULT 'PENDING',
+    reported INTEGER NOT NULL DEFAULT 0,
+    result_path TEXT,
+    task_file TEXT,
+    model_state TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 1,
+    created TEXT NOT NULL,
+    updated TEXT NOT NULL,
+    completed TEXT,
+    reported_at TEXT
+);
+CREATE INDEX IF NOT EXISTS tasks_state ON tasks (state, reported);
+"""
+
+JSON_COLUMNS = ["years", "model_state"]
+"""list: columns stored as JSON text"""
+
+
+def now() -> str:
+    """Return the current time as an ISO string, to the second"""
+
+    return datetime.now().isoformat(timespec="seconds")
+
+
+class TaskStore:
+    """Tasks sent to GEE and the state of their results.
+
+    Args:
+        path: SQLite file, created if needed. Use ":memory:" for a temporary store
+    """
+
+    def __init__(self, path: Pathlike):
+        self.path = path
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        # The GEE interface runs the coroutines in its own thread
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(str(path), check_same_thread=False)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+
+    def execute(self, query: str, params: Iterable = ()) -> List[dict]:
+        """Run a query in a transaction and return the rows as dictionaries"""
+
+        with self.lock, self.connection:
+            rows = self.connection.execute(query, tuple(params)).fetchall()
+
+        tasks = [dict(row) for row in rows]
+        for task in tasks:
+            for column in JSON_COLUMNS:
+                if task.get(column) is not None:
+                    task[column] = json.loads(task[column])
+
+        return tasks
+
+    def add(
+        self,
+        task_id: str,
+        name: str,
+        aoi: Optional[str] = None,
+        years: Optional[dict] = None,
+        model_state: Optional[dict] = None,
+        task_file: Optional[Pathlike] = None,
+        state: str = "PENDING",
+    ) -> dict:
+        """Record a new task, tasks already in the store are left untouched"""
+
+        self.execute(
+            "INSERT OR IGNORE INTO tasks (id, name, aoi, years, model_state, "
+            "task_file, state, created, updated) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                task_id,
+                name,
+                aoi,
+                json.dumps(years),
+                json.dumps(model_state),
+                str(task_file) if task_file else None,
+                state,
+                now(),
+                now(),
+            ],
+        )
+
+        return self.get(task_id)
+
+    def get(self, task_id: str) -> Optional[dict]:
+        """Return a task or None if it's not in the store"""
+
+        tasks = self.execute("SELECT * FROM tasks WHERE id = ?", [task_id])
+
+        return tasks[0] if tasks else None
+
+    def set_state(self, task_id: str, state: str, error: Optional[str] = None) -> None:
+        """Update the GEE state of a task, completed tasks get their end time"""
+
+        completed = now() if state in COMPLETED_STATES + FAILED_STATES else None
+        self.execute(
+            "UPDATE tasks SET state = ?, error = ?, updated = ?, "
+            "completed = COALESCE(?, completed) WHERE id = ?",
+            [state, error, now(), completed, task_id],
+        )
+
+    def set_result(self, task_id: str, result_path: Pathlike) -> None:
+        """Record the downloaded result of a task"""
+
+        self.execute(
+            "UPDATE tasks SET result_path = ?, updated = ? WHERE id = ?",
+            [str(result_path), now(), task_id],
+        )
+
+    def set_reported(self, task_id: str) -> None:
+        """Flag the task as reported, so it is not returned by unreported"""
+
+        self.execute(
+            "UPDATE tasks SET reported = 1, reported_at = ?, updated = ? WHERE id = ?",
+            [now(), now(), task_id],
+        )
+
+    def retry(self, task_id: str, new_task_id: str) -> None:
+        """Replace a failed task by the task that has been submitted again"""
+
+        self.execute(
+            "UPDATE tasks SET id = ?, state = 'PENDING', error = NULL, "
+            "completed = NULL, attempts = attempts + 1, updated = ? WHERE id = ?",
+            [new_task_id, now(), task_id],
+        )
+
+    def with_states(
+        self, states: List[str], reported: Optional[bool] = None
+    ) -> List[dict]:
+        """Return the tasks in the given states, optionally filtered on the
+        reported flag. Both filters are served by the (state, reported) index."""
+
+        query = f"SELECT * FROM tasks WHERE state IN ({','.join('?' * len(states))})"
+        params = list(states)
+
+        if reported is not None:
+            query += " AND reported = ?"
+            params.append(int(reported))
+
+        return self.execute(query + " ORDER BY created, rowid", params)
+
+    def pending(self) -> List[dict]:
+        """Return the tasks still running on GEE"""
+
+        return self.with_states(PENDING_STATES)
+
+    def unreported(self) -> List[dict]:
+        """Return the completed tasks whose report has not been generated"""
+
+        return self.with_states(COMPLETED_STATES, reported=False)
+
+    def failed(self) -> List[dict]:
+        """Return the tasks to retry"""
+
+        return self.with_states(FAILED_STATES)
+
+    def add_task_data(
+        self, data: dict, task_file: Optional[Pathlike] = None
+    ) -> Optional[dict]:
+        """Record a task from the content of a task file written by task_process:
+        {"model_state": {...}, "task": {"id": ..., "name": ...}}
+
+        Return:
+            the task, or None if the data doesn't describe a task
+        """
+
+        if "task" not in data:
+            return None
+
+        model_state = data.get("model_state", {})
+        years = {
+            "sub_a": model_state.get("reporting_years_sub_a"),
+            "sub_b": model_state.get("sub_b_year"),
+        }
+
+        return self.add(
+            data["task"]["id"],
+            data["task"]["name"],
+            aoi=model_state.get("geo_area_name"),
+            years=years,
+            model_state=model_state,
+            task_file=task_file,
+        )
+
+    def import_task_file(self, task_file: Pathlike) -> Optional[dict]:
+        """Record the task of a JSON file written by task_process"""
+
+        return self.add_task_data(json.loads(Path(task_file).read_text()), task_file)
+
+    def import_task_files(self, folder: Pathlike) -> List[dict]:
+        """Record the tasks of all the JSON files of a folder"""
+
+        tasks = [self.import_task_file(file) for file in Path(folder).glob("*.json")]
+
+        return [task for task in tasks if task]
+
+    def close(self) -> None:
+        """Close the connection to the store"""
+
+        self.connection.close()
+
+    def __enter__(self) -> "TaskStore":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
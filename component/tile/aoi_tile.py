@@ -26,6 +26,7 @@ from component.parameter.module_parameter import BIOBELT, BIOBELT_LEGEND, BIOBEL
 from component.widget.legend_control import LegendControl
 from component.message import cm
 import component.parameter.module_parameter as param
+from component.parameter.tables import get_gaul_table
 import logging
 
 log = logging.getLogger("MGCI.aoi_tile")
@@ -206,7 +207,10 @@ class AoiView(AoiView, sw.Card):
 class AdminField(AdminField):
     """Abstract class to load the admin data from the GAUL 2024 dataset"""
 
-    df = pd.read_csv("component/parameter/gaul_2024_database.csv")
+    @property
+    def df(self) -> pd.DataFrame:
+        """GAUL 2024 admin units, read on first use"""
+        return get_gaul_table()
 
     def load_data(self, level, parent_code=None):
         """Generic method to load admin data by level
@@ -218,21 +222,21 @@ class AdminField(AdminField):
         Returns:
             List of dictionaries with admin units data
         """
+        df = self.df
+
         if level == 0:
             cols = ["gaul0_name", "gaul0_code"]
             filter_condition = None
         elif level == 1:
             cols = ["gaul1_name", "gaul1_code"]
-            filter_condition = self.df["gaul0_code"] == int(parent_code)
+            filter_condition = df["gaul0_code"] == int(parent_code)
         elif level == 2:
             cols = ["gaul2_name", "gaul2_code"]
-            filter_condition = self.df["gaul1_code"] == int(parent_code)
+            filter_condition = df["gaul1_code"] == int(parent_code)
         else:
             return []
 
-        filtered_df = (
-            self.df[filter_condition] if filter_condition is not None else self.df
-        )
+        filtered_df = df[filter_condition] if filter_condition is not None else df
 
         return (
             filtered_df[cols]
@@ -252,7 +256,10 @@ class AdminField(AdminField):
 class AoiModel(AoiModel):
     """Custom AOI model to use simplified GAUL 2024 dataset"""
 
-    df = pd.read_csv("component/parameter/gaul_2024_database.csv")
+    @property
+    def df(self) -> pd.DataFrame:
+        """GAUL 2024 admin units, read on first use"""
+        return get_gaul_table()
 
     def _from_admin(self, admin: str) -> Self:
         """Get the feature collection from the admin code."""
@@ -266,7 +273,8 @@ class AoiModel(AoiModel):
         )
 
         if self.method == "ADMIN0":
-            country_df = self.df[self.df.gaul0_code == int(admin)][
+            df = self.df
+            country_df = df[df.gaul0_code == int(admin)][
                 ["iso3_code", "gaul0_code", "gaul0_name"]
             ]
 
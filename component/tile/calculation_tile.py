@@ -1,3 +1,4 @@
+from contextlib import nullcontext
 from datetime import datetime
 import os
 
@@ -13,6 +14,8 @@ from pysepal.sepalwidgets.btn import TaskButton
 
 from component.parameter.directory import dir_
 from component.scripts.deferred_calculation import perform_calculation, task_process
+from component.scripts.gee import get_rsa_asset, get_rsa_asset_id
+from component.scripts.task_store import TASK_STORE_NAME, TaskStore
 import component.scripts as cs
 from component.scripts.validation import validate_calc_params, validate_model
 import component.widget as cw
@@ -61,12 +64,37 @@ class CalculationView(sw.Card):
             value=True,
         )
 
+        self.w_rsa_asset = v.Switch(
+            v_model=False,
+            label=cm.dashboard.label.rsa_asset,
+            value=False,
+        )
+
+        self.w_rsa_tiles = v.TextField(
+            v_model=None,
+            label=cm.dashboard.label.rsa_tiles,
+            clearable=True,
+            dense=True,
+        )
+
         self.w_background = v.Switch(
             v_model=False,
             label=cm.dashboard.label.background,
             value=False,
         )
 
+        self.w_to_asset = v.Switch(
+            v_model=False,
+            label=cm.dashboard.label.to_asset,
+            value=False,
+        )
+
+        self.w_long_layout = v.Switch(
+            v_model=False,
+            label=cm.dashboard.label.long_layout,
+            value=False,
+        )
+
         self.w_scale = Slider()
 
         t_rsa = v.Flex(
@@ -78,6 +106,30 @@ class CalculationView(sw.Card):
             ],
         )
 
+        t_rsa_asset = v.Flex(
+            class_="d-flex",
+            children=[
+                sw.Tooltip(
+                    self.w_rsa_asset,
+                    cm.dashboard.help.rsa_asset,
+                    right=True,
+                    max_width=300,
+                )
+            ],
+        )
+
+        t_rsa_tiles = v.Flex(
+            class_="d-flex",
+            children=[
+                sw.Tooltip(
+                    self.w_rsa_tiles,
+                    cm.dashboard.help.rsa_tiles,
+                    right=True,
+                    max_width=300,
+                )
+            ],
+        )
+
         t_background = v.Flex(
             class_="d-flex",
             children=[
@@ -90,6 +142,30 @@ class CalculationView(sw.Card):
             ],
         )
 
+        t_to_asset = v.Flex(
+            class_="d-flex",
+            children=[
+                sw.Tooltip(
+                    self.w_to_asset,
+                    cm.dashboard.help.to_asset,
+                    right=True,
+                    max_width=300,
+                )
+            ],
+        )
+
+        t_long_layout = v.Flex(
+            class_="d-flex",
+            children=[
+                sw.Tooltip(
+                    self.w_long_layout,
+                    cm.dashboard.help.long_layout,
+                    right=True,
+                    max_width=300,
+                )
+            ],
+        )
+
         t_scale = v.Flex(
             class_="d-flex",
             children=[
@@ -115,7 +191,11 @@ class CalculationView(sw.Card):
                         v.ExpansionPanelContent(
                             children=[
                                 t_rsa,
+                                t_rsa_asset,
+                                t_rsa_tiles,
                                 t_background,
+                                t_to_asset,
+                                t_long_layout,
                                 t_scale,
                             ]
                         ),
@@ -197,7 +277,7 @@ class CalculationView(sw.Card):
             raise Exception(cm.error.no_aoi)
 
         output_report_path = cs.export_reports(
-            results=self.model.results,
+            results=self.model.results_cache,
             **self.model.get_data(),
             which=which,
             sepal_client=self.sepal_client,
@@ -329,6 +409,12 @@ class CalculationView(sw.Card):
             )
             scale = self.w_scale.v_model
 
+        rsa_asset, rsa_source = None, "on_the_fly"
+        if self.model.rsa and self.w_rsa_tiles.v_model:
+            rsa_asset, rsa_source = self.w_rsa_tiles.v_model.strip(), "precomputed"
+        elif self.model.rsa and self.w_rsa_asset.v_model:
+            rsa_asset = await self.get_rsa_asset()
+
         log.debug(f"Performing calculation with parameters:\n {self.model}")
 
         # Create a fucntion in order to be able to test it easily
@@ -344,20 +430,51 @@ class CalculationView(sw.Card):
             logger=self.alert,
             background=self.w_background.v_model,
             scale=scale,
+            batch=True,
+            rsa_asset=rsa_asset,
+            rsa_source=rsa_source,
         )
 
         if isinstance(results, ee.FeatureCollection):
             model_state = self.model.get_data()
-            await task_process(
-                results,
-                task_filepath,
-                model_state,
-                sepal_client=self.sepal_client,
-                gee_interface=self.gee_interface,
-            )
+            # SQLite needs a local file, the store is only kept out of SEPAL
+            with (
+                nullcontext()
+                if self.sepal_client
+                else TaskStore(dir_.tasks_dir / TASK_STORE_NAME)
+            ) as task_store:
+                await task_process(
+                    results,
+                    task_filepath,
+                    model_state,
+                    sepal_client=self.sepal_client,
+                    gee_interface=self.gee_interface,
+                    task_store=task_store,
+                    destination="asset" if self.w_to_asset.v_model else "drive",
+                    layout="long" if self.w_long_layout.v_model else "nested",
+                )
 
         return results, task_filepath
 
+    async def get_rsa_asset(self):
+        """Return the real surface area asset of the AOI, or None while it's
+        being exported"""
+
+        asset_id = await get_rsa_asset_id(
+            self.model.aoi_model.name, self.model.dem, self.gee_interface
+        )
+        rsa_asset = await get_rsa_asset(
+            self.model.dem,
+            self.model.aoi_model.feature_collection,
+            asset_id,
+            self.gee_interface,
+        )
+
+        if not rsa_asset:
+            self.alert.append_msg(cm.dashboard.alert.rsa_export.format(asset_id))
+
+        return rsa_asset
+
     def _configure_statistics_button(self, *args):
         """Start the calculation of the statistics. It will start the process on the fly
         or making a task in the background depending if the rsa is selected or if the
@@ -1,4 +1,3 @@
-import pandas as pd
 from component.widget.base_dialog import BaseDialog
 import pysepal.scripts.utils as su
 import pysepal.sepalwidgets as sw
@@ -135,7 +134,7 @@ class DashViewA(DashView):
         )
 
         df = cs.parse_to_year_a(
-            self.model.results,
+            self.model.results_cache,
             self.model.reporting_years_sub_a,
             self.year_select.v_model,
         )
@@ -230,17 +229,15 @@ class DashViewB(DashView):
         if not look_up_year or not self.model.results:
             return
 
-        df = cs.parse_sub_b_year(self.model.results, look_up_year)
+        df = cs.parse_sub_b_year(self.model.results_cache, look_up_year)
         look_up_years = list(look_up_year.values())[0]
         self.nodes_and_links = get_nodes_and_links(df, param.LC_CLASSES, look_up_years)
 
         # Get all belts that are available for the selected year
 
         belt_items = [
-            {"text": get_belt_desc(row), "value": row.belt_class}
-            for _, row in pd.DataFrame(
-                df.belt_class.unique(), columns=["belt_class"]
-            ).iterrows()
+            {"text": get_belt_desc({"belt_class": belt}), "value": int(belt)}
+            for belt in df.belt_class.unique()
         ]
 
         self.belt_select.items = belt_items
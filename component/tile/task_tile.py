@@ -1,4 +1,6 @@
+from contextlib import nullcontext
 from pathlib import Path
+from typing import Optional
 
 import ipyvuetify as v
 import pysepal.scripts.utils as su
@@ -14,7 +16,10 @@ import component.scripts as cs
 import component.widget as cw
 from component.message import cm
 from component.scripts.file_handler import read_file
+from component.scripts.asset_results import results_from_task
 from component.scripts.gdrive import download_from_task_file
+from component.scripts.task_poller import STATE_COLORS, poll_tasks
+from component.scripts.task_store import TASK_STORE_NAME, TaskStore
 
 
 class DownloadTaskView(v.Card):
@@ -58,11 +63,18 @@ class DownloadTaskView(v.Card):
 
         self.btn = TaskButton(cm.dashboard.label.calculate_from_task, small=True)
 
+        # waiting for all the tasks needs the local task store
+        self.btn_all = TaskButton(
+            cm.dashboard.label.calculate_all_tasks, small=True, class_="ml-2"
+        )
+        if sepal_client:
+            self.btn_all.hide()
+
         self.children = [
             title,
             description,
             self.w_file_input,
-            self.btn,
+            v.Flex(children=[self.btn, self.btn_all]),
             self.alert,
         ]
 
@@ -80,28 +92,59 @@ class DownloadTaskView(v.Card):
                 on_error=lambda e: self.alert.add_msg(str(e), type_="error"),
             )
 
+        def run_all_statistics(*args):
+            return self.gee_interface.create_task(
+                func=self.run_all_statistics,
+                key="calculate_all_statistics",
+                on_error=lambda e: self.alert.add_msg(str(e), type_="error"),
+            )
+
         self.btn.configure(
             task_factory=run_statistics,
         )
+        self.btn_all.configure(
+            task_factory=run_all_statistics,
+        )
 
     async def run_statistics(self, *_):
+        """Download the results of the selected task file and export its
+        reporting tables."""
+
+        tasks_file = Path(self.w_file_input.v_model)
+        data = read_file(tasks_file)
+
+        # Dowload from file
+        msg = cw.TaskMsg(
+            f"Processing {tasks_file.stem}.csv..", data["model_state"]["session_id"]
+        )
+        self.alert.append_msg(msg)
+
+        report_folder = await self.report_task_file(tasks_file)
+        msg.set_state("success")
+
+        self.alert.append_msg(
+            f"Reporting tables successfull exported {report_folder}", type_="success"
+        )
+
+    async def report_task_file(
+        self, tasks_file: Path, task_store: Optional[TaskStore] = None
+    ) -> Path:
         """From the gee result dictionary, extract the values and give a proper
-        format in a pd.DataFrame.
+        format in a pd.DataFrame, then export the reporting tables.
 
         Args:
-            process (ee.reduceRegion): ee process (without execution).
-            task_file (path, str): full path of task file containing task_id(s)
-        """
+            tasks_file (path, str): full path of task file containing task_id(s)
+            task_store: store of the tasks, the local one is opened if not given
 
-        # Get and read file
-        tasks_file = self.w_file_input.v_model
+        Return:
+            the report folder
+        """
 
         tasks_file = Path(tasks_file)
         data = read_file(tasks_file)
 
         # Task
         task_id = data["task"]["id"]
-        task_name = data["task"]["name"]
 
         # Model state
         reporting_years_sub_a = data["model_state"]["reporting_years_sub_a"]
@@ -125,26 +168,23 @@ class DownloadTaskView(v.Card):
         # re-build the filename
         task_filename = f"{tasks_file.stem}.csv"
 
-        # Dowload from file
-        msg = cw.TaskMsg(f"Processing {task_filename}..", session_id)
-        self.alert.append_msg(msg)
-
-        result_file = await download_from_task_file(
-            task_id,
-            tasks_file,
-            task_filename,
-            drive_interface=self.drive_interface,
-            gee_interface=self.gee_interface,
-            sepal_client=self.sepal_client,
-        )
+        if data["task"].get("destination") == "asset":
+            result_file = data["task"]["asset_id"]
+            results = await results_from_task(task_id, result_file, self.gee_interface)
+
+        else:
+            result_file = await download_from_task_file(
+                task_id,
+                tasks_file,
+                task_filename,
+                drive_interface=self.drive_interface,
+                gee_interface=self.gee_interface,
+                sepal_client=self.sepal_client,
+            )
 
-        results = cs.read_from_csv(result_file)
-        msg.set_state("success")
+            results = cs.read_from_csv(result_file)
 
         # Write the results on a comma separated values file, or an excel file
-
-        self.alert.append_msg("Exporting tables...")
-
         cs.export_reports(
             results,
             reporting_years_sub_a,
@@ -158,6 +198,60 @@ class DownloadTaskView(v.Card):
             sepal_client=self.sepal_client,
         )
 
-        self.alert.append_msg(
-            f"Reporting tables successfull exported {report_folder}", type_="success"
-        )
+        # keep track of the reported task in the local store
+        if not self.sepal_client:
+            with (
+                nullcontext(task_store)
+                if task_store
+                else TaskStore(dir_.tasks_dir / TASK_STORE_NAME)
+            ) as store:
+                store.add_task_data(data, tasks_file)
+                store.set_state(task_id, "COMPLETED")
+                store.set_result(task_id, result_file)
+                store.set_reported(task_id)
+
+        return report_folder
+
+    async def run_all_statistics(self, *_):
+        """Wait for all the tasks of the tasks folder that are not reported yet
+        and export their reporting tables as soon as they complete."""
+
+        with TaskStore(dir_.tasks_dir / TASK_STORE_NAME) as task_store:
+            task_store.import_task_files(dir_.tasks_dir)
+            tasks = task_store.pending() + task_store.unreported()
+            task_files = {
+                task["id"]: Path(task["task_file"])
+                for task in tasks
+                if task["task_file"]
+            }
+
+            if not task_files:
+                self.alert.add_msg(cm.dashboard.tasks.no_pending, type_="warning")
+                return
+
+            msgs = {}
+            for task_id, tasks_file in task_files.items():
+                msgs[task_id] = cw.TaskMsg(f"{tasks_file.stem}: PENDING", task_id)
+                self.alert.append_msg(msgs[task_id])
+
+            def on_state(task_id, state, error):
+                msgs[task_id].set_msg(f"{task_files[task_id].stem}: {error or state}")
+                msgs[task_id].set_state(
+                    "error" if error else STATE_COLORS.get(state, "info")
+                )
+
+            async def on_complete(task_id):
+                report_folder = await self.report_task_file(
+                    task_files[task_id], task_store
+                )
+                msgs[task_id].set_msg(f"{task_files[task_id].stem}: {report_folder}")
+
+            await poll_tasks(
+                list(task_files),
+                self.gee_interface,
+                on_state=on_state,
+                on_complete=on_complete,
+                task_store=task_store,
+            )
+
+        self.alert.append_msg(cm.dashboard.tasks.all_done, type_="success")
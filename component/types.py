@@ -29,6 +29,19 @@ class SubBYearDict(TypedDict):
     report_transition: List[SubItem]
 
 
+SUB_B_CATEGORIES = [
+    "baseline_degradation",
+    "final_degradation",
+    "baseline_transition",
+    "report_transition",
+]
+"""Keys of SubBYearDict, in the order they are reduced and exported."""
+
+LONG_COLUMNS = ["process_id", "category", "biobelt", "lc", "sum"]
+"""Columns of the long results layout, one row per reduced group (see
+gee.to_long_collection)."""
+
+
 YearKey = NewType("YearKey", str)
 """YearKey can be either 'singleYear'(sub_A) or 'year__year__year' (sub_B)."""
 
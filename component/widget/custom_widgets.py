@@ -1,3 +1,5 @@
+from typing import Callable
+
 import ipyvuetify as v
 from pysepal import color
 import pysepal.sepalwidgets as sw
@@ -6,7 +8,7 @@ from traitlets import CBool, Int, link
 from ipyvuetify import Btn
 
 
-__all__ = ["BoolQuestion", "Tabs", "TaskMsg", "Alert"]
+__all__ = ["BoolQuestion", "Tabs", "TaskMsg", "Alert", "LazyTile"]
 
 
 class BoolQuestion(v.Flex, sw.SepalWidget):
@@ -148,3 +150,24 @@ class AlertDialog(sw.Dialog):
         """Opens the dialog when there's a change in the alert chilndren state."""
         if change["new"] != [""]:
             super().open_dialog()
+
+
+class LazyTile(sw.Layout):
+    """Placeholder of a tile that is only built the first time it's shown"""
+
+    def __init__(self, build: Callable[[], v.VuetifyWidget], *args, **kwargs):
+        self.class_ = "d-block"
+
+        super().__init__(*args, **kwargs)
+
+        self.build = build
+        self.tile = None
+
+    def load(self, *_) -> v.VuetifyWidget:
+        """Build the tile, only the first time, and display it"""
+
+        if self.tile is None:
+            self.tile = self.build()
+            self.children = [self.tile]
+
+        return self.tile
@@ -21,10 +21,10 @@ class LayerHandler(sw.Layout):
         self.alert = alert or sw.Alert()
 
         # self.map_.add_legend(
-        #     "lc_legend", "Land cover", visuals.LEGENDS["land_cover"], vertical=False
+        #     "lc_legend", "Land cover", visuals.get_legend("land_cover"), vertical=False
         # )
         # self.map_.add_legend(
-        #     "deg_legend", "Degradation", visuals.LEGENDS["degradation"]
+        #     "deg_legend", "Degradation", visuals.get_legend("degradation")
         # )
 
         self.class_ = "d-block pa-2"
@@ -8,10 +8,17 @@ import pandas as pd
 import rasterio as rio
 from matplotlib.colors import to_rgba
 from natsort import natsorted
-from rasterio.windows import from_bounds
+from rasterio.windows import Window, from_bounds
 
 from pysepal.solara import get_current_gee_interface
 
+from component.scripts.accumulator import (
+    Lookup,
+    get_block_shape,
+    get_unique_values,
+    iter_block_windows,
+    snap_window,
+)
 from component.scripts.file_handler import read_file
 from component.scripts.aoi_geometry import aoi_bbox
 from pysepal.model import Model
@@ -333,20 +340,22 @@ class ReclassifyModel(Model):
         def _local_image():
             with rio.open(self.src_local) as src:
                 bounds = self.get_aoi().total_bounds if self.get_aoi() else src.bounds
-                data = src.read(
-                    self.band, window=from_bounds(*bounds, transform=src.transform)
-                )
-                count = np.bincount(data.flatten())
+                window = from_bounds(*bounds, transform=src.transform)
+                window = snap_window(window, src.height, src.width)
 
-            return np.nonzero(count != 0)[0].tolist()
+            return get_unique_values(self.src_local, self.band, window)
 
         def _local_vector():
-            gdf = gpd.read_file(self.src_local)
-            bounds = self.get_aoi().total_bounds if self.get_aoi() else gdf.total_bounds
-            xmin, ymin, xmax, ymax = bounds
-            gdf = gdf.cx[xmin:xmax, ymin:ymax]
+            # only read the property of the features in the aoi bbox, the
+            # filter is applied by GDAL at read time (reprojected if needed)
+            df = gpd.read_file(
+                self.src_local,
+                bbox=self.get_aoi(),
+                columns=[self.band],
+                ignore_geometry=True,
+            )
 
-            return gdf[self.band].unique().tolist()
+            return df[self.band].unique().tolist()
 
         # map all the function in the guess matrix (gee, type)
         unique_func = [[_local_vector, _local_image], [_ee_vector, _ee_image]]
@@ -481,12 +490,22 @@ class ReclassifyModel(Model):
             with rio.open(self.src_local) as src:
                 bounds = self.get_aoi().total_bounds if self.get_aoi() else src.bounds
                 window = from_bounds(*bounds, transform=src.transform)
-                raw = src.read(self.band, window=window)
+                window = snap_window(window, src.height, src.width)
+                remap = Lookup(matrix, src.dtypes[self.band - 1])
 
-                data = np.zeros_like(raw, dtype=np.int64)
-
-                for old_val, new_val in matrix.items():
-                    data += (raw == old_val) * new_val
+                # the output is remapped block by block in the narrowest dtype
+                data = np.zeros((window.height, window.width), dtype=remap.dtype)
+                blocks = iter_block_windows(
+                    src.height, src.width, get_block_shape(src), window
+                )
+                for block in blocks:
+                    rows, cols = Window(
+                        block.col_off - window.col_off,
+                        block.row_off - window.row_off,
+                        block.width,
+                        block.height,
+                    ).toslices()
+                    data[rows, cols] = remap(src.read(self.band, window=block))
 
                 if self.save:
                     profile = src.profile
@@ -494,14 +513,15 @@ class ReclassifyModel(Model):
                         driver="GTiff",
                         count=1,
                         compress="lzw",
-                        dtype=np.uint8,
+                        dtype=remap.dtype,
                         height=window.height,
                         width=window.width,
                         transform=src.window_transform(window),
                     )
 
                     with rio.open(self.dst_local, "w", **profile) as dst:
-                        dst.write(data.astype(np.uint8), 1, window=window)
+                        for _, block in dst.block_windows(1):
+                            dst.write(data[block.toslices()], 1, window=block)
 
                         # add the colors to the image
                         colormap = {0: (0, 0, 0)}
@@ -525,14 +545,12 @@ class ReclassifyModel(Model):
                 self.dst_dir / f"{Path(self.src_local).stem}_reclass.shp"
             )
 
-            # read the dataset
-            gdf = gpd.read_file(self.src_local)
-            bounds = self.get_aoi().total_bounds if self.get_aoi() else gdf.total_bounds
-            xmin, ymin, xmax, ymax = bounds
-            gdf = gdf.cx[xmin:xmax, ymin:ymax]
+            # read the features in the aoi bbox, filtered by GDAL at read time
+            gdf = gpd.read_file(self.src_local, bbox=self.get_aoi())
 
-            # map the new column
-            gdf["reclass"] = gdf.apply(lambda row: matrix[row[self.band]], axis=1)
+            # map the new column, values missing from the matrix get NO_VALUE
+            # as in the gee backend
+            gdf["reclass"] = gdf[self.band].map(matrix).fillna(NO_VALUE).astype(int)
 
             # add the colors to the gdf
             # waiting for an answer there :
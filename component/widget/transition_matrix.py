@@ -15,6 +15,7 @@ from pysepal.scripts.sepal_client import SepalClient
 from component.model.model import MgciModel
 from component.parameter.directory import dir_
 import component.parameter.module_parameter as param
+from component.parameter.tables import get_lc_color
 from component.scripts import validation as validation
 from component.scripts.scripts import set_transition_code
 import logging
@@ -80,9 +81,6 @@ class CustomTransitionMatrix(sw.Layout):
 class TransitionMatrix(sw.Layout):
     """Transition matrix widget"""
 
-    CLASSES = param.LC_COLOR.iloc[:, 0].tolist()
-    "list: list of land cover classes names. Comes from lc_classification.csv file"
-
     disabled = Bool(False).tag(sync=True)
 
     show_matrix = Bool(True).tag(sync=True)
@@ -106,7 +104,8 @@ class TransitionMatrix(sw.Layout):
         )
         self.transition_matrix_view = TransitionMatrixInput(
             transition_matrix_file=str(dir_.transition_dir / "transition_matrix.csv"),
-            classes=self.CLASSES,
+            # land cover classes names, from the lc_classification.csv file
+            classes=get_lc_color().iloc[:, 0].tolist(),
             decode_options=param.DECODE,
         )
 
@@ -1,6 +1,10 @@
 import ee
 from component.scripts import sub_b
-from component.scripts.scripts import get_reporting_years, get_sub_b_years, parse_result
+from component.scripts.scripts import (
+    get_reporting_years,
+    get_sub_b_years,
+    parse_sub_b_year,
+)
 
 
 def get_countries_to_process(
@@ -43,29 +47,13 @@ def parse_sub_b_year_safe(results: dict, target_year: dict):
     Safely parse sub_b year data, handling empty results.
     Returns None if data is empty or invalid.
     """
-    if "baseline" in target_year:
-        for key in results.keys():
-            if len(key.split("_")) > 1:
-                df = parse_result(results[key], single=False)
-                # Handle empty results
-                if df.empty or "transition" not in df.columns:
-                    return None
-                # Decode transition to from_code and to_code
-                df.loc[:, "from_lc"] = df.transition // 100
-                df.loc[:, "to_lc"] = df.transition % 100
-                return df[df.category == "baseline_transition"]
-
-    # target_year is a tuple of the (start_baseline, report_year)
-    year = target_year.get("report")[1]
-    for key in results.keys():
-        if len(key.split("_")) > 1:
-            if str(year) in key:
-                df = parse_result(results[key], single=False)
-                # Handle empty results
-                if df.empty:
-                    return None
-                return df[df.category == "final_degradation"]
-    return None
+    df = parse_sub_b_year(results, target_year)
+
+    # Handle empty results
+    if df is None or df.empty:
+        return None
+
+    return df
 
 
 def get_sub_b_data_reports_safe(
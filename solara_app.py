@@ -6,7 +6,6 @@ import solara
 from solara.lab.components.theming import theme
 
 import pysepal.sepalwidgets as sw
-from pysepal.scripts.utils import init_ee
 from pysepal.sepalwidgets.vue_app import ThemeToggle, MapApp
 from pysepal.solara.components.admin import AdminButton
 from pysepal.solara import (
@@ -19,21 +18,80 @@ from pysepal.solara import (
     setup_solara_server,
 )
 
-from component.widget.custom_widgets import AlertDialog
+from component.widget.custom_widgets import AlertDialog, LazyTile
 from component.tile.calculation_tile import CalculationView
-from component.tile.dashboard_tile import DashViewA, DashViewB
 from component.tile.vegetation_tile import VegetationTile
 from component.tile.aoi_tile import AoiView
-from component.tile.task_tile import DownloadTaskView
 from component.model import MgciModel
 from component.message import cm
 from component.widget.mgci_map import MgciMap
 from component.widget.map import LayerHandler
 from component.parameter.directory import initialize_remote
+from component.scripts.ee_init import wait_ee
 
-init_ee()
+# Earth Engine is initializing in the background since component was imported
 setup_solara_server()
 
+TASK_STEP = 6
+"int: id of the step of the task tile, only built when it's opened"
+
+
+def build_tiles(alert, theme_toggle, gee_interface, drive_interface, sepal_client):
+    """Build the map and the tiles of the app.
+
+    The tiles needed by the first render and the ones sharing state with the
+    model (AOI, vegetation and calculation) are built right away. The task tile
+    and the dashboards are LazyTile placeholders, built with their modules the
+    first time their step or the right panel is opened (see Page).
+    """
+
+    wait_ee()
+
+    map_ = MgciMap(gee_interface=gee_interface, theme_toggle=theme_toggle)
+    aoi_view = AoiView(map_=map_)
+    model = MgciModel(aoi_view, sepal_client=sepal_client)
+    vegetation_tile = VegetationTile(
+        model=model, aoi_model=model.aoi_model, sepal_client=sepal_client, alert=alert
+    )
+    calculation_tile = CalculationView(
+        model=model,
+        units="sqkm",
+        rsa=True,
+        sepal_client=sepal_client,
+        gee_interface=gee_interface,
+    )
+
+    def build_task_tile():
+        from component.tile.task_tile import DownloadTaskView
+
+        return DownloadTaskView(
+            sepal_client=sepal_client,
+            drive_interface=drive_interface,
+            gee_interface=gee_interface,
+        )
+
+    def build_dash_view_a():
+        from component.tile.dashboard_tile import DashViewA
+
+        return DashViewA(model, alert=alert)
+
+    def build_dash_view_b():
+        from component.tile.dashboard_tile import DashViewB
+
+        return DashViewB(model, alert=alert)
+
+    return {
+        "map_": map_,
+        "model": model,
+        "aoi_view": aoi_view,
+        "vegetation_tile": vegetation_tile,
+        "calculation_tile": calculation_tile,
+        "task_tile": LazyTile(build_task_tile),
+        "layer_handler": LayerHandler(map_, model, alert=alert),
+        "dash_view_a": LazyTile(build_dash_view_a),
+        "dash_view_b": LazyTile(build_dash_view_b),
+    }
+
 
 @solara.lab.on_kernel_start
 def on_kernel_start():
@@ -57,28 +115,25 @@ def Page():
     sepal_client = get_current_sepal_client()
     initialize_remote(sepal_client)
 
-    map_ = MgciMap(gee_interface=gee_interface, theme_toggle=theme_toggle)
-    aoi_view = AoiView(map_=map_)
-    model = MgciModel(aoi_view, sepal_client=sepal_client)
-    vegetation_tile = VegetationTile(
-        model=model, aoi_model=model.aoi_model, sepal_client=sepal_client, alert=alert
+    tiles = build_tiles(
+        alert, theme_toggle, gee_interface, drive_interface, sepal_client
     )
-    calculation_tile = CalculationView(
-        model=model,
-        units="sqkm",
-        rsa=True,
-        sepal_client=sepal_client,
-        gee_interface=gee_interface,
-    )
-    task_tile = DownloadTaskView(
-        sepal_client=sepal_client,
-        drive_interface=drive_interface,
-        gee_interface=gee_interface,
-    )
-
-    layer_handler = LayerHandler(map_, model, alert=alert)
-    dash_view_a = DashViewA(model, alert=alert)
-    dash_view_b = DashViewB(model, alert=alert)
+    map_, model = tiles["map_"], tiles["model"]
+    aoi_view = tiles["aoi_view"]
+    vegetation_tile = tiles["vegetation_tile"]
+    calculation_tile = tiles["calculation_tile"]
+    task_tile = tiles["task_tile"]
+    layer_handler = tiles["layer_handler"]
+    dash_view_a, dash_view_b = tiles["dash_view_a"], tiles["dash_view_b"]
+
+    def on_current_step(step):
+        if step == TASK_STEP:
+            task_tile.load()
+
+    def on_right_panel_open(is_open):
+        if is_open:
+            dash_view_a.load()
+            dash_view_b.load()
 
     steps_data = [
         {
@@ -111,7 +166,7 @@ def Page():
             "right_panel_action": "toggle",  # "open", "close", "toggle", or None
         },
         {
-            "id": 6,
+            "id": TASK_STEP,
             "name": cm.app.drawer_item.task,
             "icon": "mdi-export",
             "display": "dialog",
@@ -159,4 +214,6 @@ def Page():
         theme_toggle=[theme_toggle],
         dialog_width=750,
         repo_url="https://github.com/sepal-contrib/sepal_mgci",
+        on_current_step=on_current_step,
+        on_right_panel_open=on_right_panel_open,
     )
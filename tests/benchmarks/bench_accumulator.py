@@ -0,0 +1,118 @@
+"""Benchmark the streaming accumulation of grouped areas on a synthetic raster.
+
+Two land cover years and a biobelt raster of size x size pixels are written as
+tiled GeoTIFFs, then streamed block by block: the land cover is remapped, coded
+as transitions and reduced to (biobelt, class) histograms. The peak memory
+reported by tracemalloc only depends on the block size.
+
+Usage:
+    python -m tests.benchmarks.bench_accumulator --size 50000 --dir /tmp/bench
+"""
+
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import rasterio as rio
+from rasterio.transform import from_origin
+
+from component.scripts.accumulator import AreaAccumulator, Lookup, iter_blocks
+
+BLOCK_SIZE = 512
+"""int: size of the tiles of the synthetic rasters"""
+
+PATCH_SIZE = 8
+"""int: size of the homogeneous patches, so the rasters compress as real ones"""
+
+
+def write_synthetic(path: Path, size: int, high: int, seed: int) -> Path:
+    """Write a tiled uint8 raster of random patches of values in [0, high["""
+
+    profile = {
+        "driver": "GTiff",
+        "height": size,
+        "width": size,
+        "count": 1,
+        "dtype": "uint8",
+        "crs": "EPSG:32618",
+        "transform": from_origin(500000, 5000000, 30, 30),
+        "nodata": 0,
+        "tiled": True,
+        "blockxsize": BLOCK_SIZE,
+        "blockysize": BLOCK_SIZE,
+        "compress": "deflate",
+    }
+
+    rng = np.random.default_rng(seed)
+    with rio.open(path, "w", **profile) as dst:
+        for _, window in dst.block_windows(1):
+            shape = (-(-window.height // PATCH_SIZE), -(-window.width // PATCH_SIZE))
+            patches = rng.integers(0, high, size=shape, dtype=np.uint8)
+            data = np.kron(patches, np.ones((PATCH_SIZE, PATCH_SIZE), np.uint8))
+            dst.write(data[: window.height, : window.width], 1, window=window)
+
+    return path
+
+
+def run(size: int, folder: Path) -> dict:
+    """Write the rasters and stream them, return the timings and the peak memory"""
+
+    folder.mkdir(parents=True, exist_ok=True)
+
+    start = time.perf_counter()
+    paths = [
+        write_synthetic(folder / f"lc_{seed}.tif", size, 11, seed) for seed in [0, 1]
+    ]
+    paths.append(write_synthetic(folder / "biobelt.tif", size, 5, 2))
+    write_time = time.perf_counter() - start
+
+    lookup = Lookup(dict(zip(range(1, 11), [1, 1, 2, 2, 3, 3, 4, 4, 5, 6])), "uint8")
+    pixel_area = 30 * 30
+
+    tracemalloc.start()
+    start = time.perf_counter()
+
+    accumulator = AreaAccumulator()
+    for _, (start_lc, end_lc, biobelt) in iter_blocks(paths):
+        valid = ~(
+            np.ma.getmaskarray(start_lc)
+            | np.ma.getmaskarray(end_lc)
+            | np.ma.getmaskarray(biobelt)
+        )
+        start_class = lookup(start_lc.data)
+        end_class = lookup(end_lc.data)
+
+        accumulator.add("sub_a", biobelt.data, end_class, pixel_area, valid)
+        accumulator.add(
+            "transition",
+            biobelt.data,
+            start_class.astype(np.int64) * 100 + end_class,
+            pixel_area,
+            valid,
+        )
+
+    stream_time = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "pixels": size * size,
+        "write_s": round(write_time, 1),
+        "stream_s": round(stream_time, 1),
+        "mpixels_per_s": round(size * size / stream_time / 1e6, 1),
+        "peak_mib": round(peak / 2**20, 1),
+        "full_array_mib": round(3 * size * size / 2**20, 1),
+        "groups": sum(len(sums) for sums in accumulator.sums.values()),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=50000)
+    parser.add_argument("--dir", type=Path, default=Path("bench_accumulator"))
+    args = parser.parse_args()
+
+    for key, value in run(args.size, args.dir).items():
+        print(f"{key}: {value}")
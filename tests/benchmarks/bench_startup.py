@@ -0,0 +1,91 @@
+"""Benchmark the cold start of the app, from the first import to the first render.
+
+Every run is a fresh interpreter, so nothing is imported yet. The timings are
+cumulative from the start of the run: the import of component.scripts (and the
+heavy libraries it pulled), the import of solara_app (what the server does
+before accepting a connection), the Earth Engine initialization running in the
+background meanwhile, the tiles of the first render (solara_app.build_tiles)
+and the lazy tiles, built when their step or the right panel is opened.
+
+The tiles need Earth Engine credentials, as the tests.
+
+Usage:
+    python -m tests.benchmarks.bench_startup --repeat 3
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["openpyxl", "scipy", "ipyvuetify", "plotly", "pyarrow"]
+"""list: libraries that should only be imported on first use"""
+
+RUN = """
+import json, sys, time
+
+start = time.perf_counter()
+timings = {}
+
+import component.scripts
+timings["import_scripts_s"] = time.perf_counter() - start
+heavy = [name for name in HEAVY_MODULES if name in sys.modules]
+
+import solara_app
+timings["import_app_s"] = time.perf_counter() - start
+
+from component.scripts.ee_init import wait_ee
+wait_ee()
+timings["ee_ready_s"] = time.perf_counter() - start
+
+import pysepal.sepalwidgets as sw
+import pysepal.solara.utils as solara_utils
+from pysepal.scripts.gee_interface import GEEInterface
+from pysepal.sepalwidgets.vue_app import ThemeToggle
+
+# Outside of a solara session the tiles use the fallback interface, see conftest
+solara_utils._fallback_gee_interface = gee_interface = GEEInterface()
+tiles = solara_app.build_tiles(sw.Alert(), ThemeToggle(), gee_interface, None, None)
+timings["first_render_s"] = time.perf_counter() - start
+
+for name in ["task_tile", "dash_view_a", "dash_view_b"]:
+    tiles[name].load()
+timings["lazy_tiles_s"] = time.perf_counter() - start
+
+print(json.dumps({"timings": timings, "heavy": heavy}))
+"""
+
+
+def run_once() -> dict:
+    """Run the cold start in a new interpreter and return its timings"""
+
+    code = f"HEAVY_MODULES = {HEAVY_MODULES!r}\n{RUN}"
+    process = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def run(repeat: int) -> dict:
+    """Return the median of every timing over repeat cold starts"""
+
+    runs = [run_once() for _ in range(repeat)]
+
+    result = {
+        key: round(statistics.median(run["timings"][key] for run in runs), 2)
+        for key in runs[0]["timings"]
+    }
+    result["heavy_modules_on_import"] = runs[0]["heavy"]
+
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for key, value in run(args.repeat).items():
+        print(f"{key}: {value}")
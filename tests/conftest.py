@@ -1,7 +1,6 @@
 import component.parameter.module_parameter as param
 
 
-from pysepal.scripts.utils import init_ee
 import ee
 import pytest
 
@@ -12,9 +11,10 @@ from pysepal.scripts.gee_interface import GEEInterface
 import pandas as pd
 
 from component.scripts.scripts import map_matrix_to_dict
+from component.scripts.ee_init import wait_ee
 import pysepal.solara.utils as solara_utils
 
-init_ee()
+wait_ee()
 
 # Seed pysepal's get_current_gee_interface() fallback with a *sessionless*
 # GEEInterface. pysepal 3.7's fallback (EESession.from_default) authenticates fine
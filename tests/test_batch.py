@@ -0,0 +1,192 @@
+"""Test the batch processing of many countries with fake GEE and Drive interfaces"""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from component.batch import runner
+from component.batch.manifest import Manifest
+
+
+class FakeGEEInterface:
+    """Export tasks that are running at their first check and completed after,
+    the exports of the countries in fail_export raise"""
+
+    def __init__(self, fail_export=()):
+        self.fail_export = fail_export
+        self.exported = []
+        self.checks = {}
+
+    async def export_table_to_drive_async(self, **kwargs):
+        if any(name in kwargs["description"] for name in self.fail_export):
+            raise Exception("Export quota exceeded")
+
+        self.exported.append(kwargs["description"])
+        return SimpleNamespace(id=f"id_{kwargs['description']}")
+
+    async def get_task_async(self, task_id):
+        self.checks[task_id] = self.checks.get(task_id, 0) + 1
+        state = "RUNNING" if self.checks[task_id] == 1 else "COMPLETED"
+        return SimpleNamespace(metadata=SimpleNamespace(state=state), error=None)
+
+
+class FakeDriveInterface:
+    def download_file(self, filename, output_file):
+        output_file.write_text("process_id,sub_a\n")
+
+
+def fake_report(csv_file, report_folder, config, ref_area):
+    return f"{report_folder}_{ref_area}.xlsx"
+
+
+@pytest.fixture
+def config(tmp_path, monkeypatch):
+    """Configuration of 3 countries without calling GEE nor writing reports"""
+
+    async def get_countries(gee_interface, config):
+        return {"Spain": "724", "France": "250", "Italy": "380"}
+
+    monkeypatch.setattr(runner, "get_countries", get_countries)
+    monkeypatch.setattr(runner, "get_country_process", lambda *args: None)
+    monkeypatch.setattr(runner, "build_report", fake_report)
+
+    return {
+        **runner.DEFAULT_CONFIG,
+        "years": {1: {"asset": "lc/2000", "year": 2000}},
+        "output_dir": str(tmp_path / "batch"),
+        "max_running": 2,
+        "poll_interval": 0,
+    }
+
+
+def test_manifest(tmp_path):
+    """Entries are saved at every change and reloaded"""
+
+    manifest = Manifest(tmp_path / "manifest.json")
+
+    assert manifest.add(["Spain", "France"]) == ["Spain", "France"]
+    assert manifest.add(["Spain", "Italy"]) == ["Italy"]
+
+    manifest.update("Spain", state="submitted", task_id="1")
+
+    with pytest.raises(ValueError):
+        manifest.update("France", state="running")
+
+    reloaded = Manifest(tmp_path / "manifest.json")
+    assert reloaded.with_state("pending") == ["France", "Italy"]
+    assert reloaded.entries["Spain"]["task_id"] == "1"
+    assert reloaded.summary()["submitted"] == 1
+
+
+def test_run_batch(config):
+    """All the countries are reported, a resumed run doesn't submit them again"""
+
+    gee_interface = FakeGEEInterface(fail_export=["Italy"])
+    changes = []
+
+    manifest = asyncio.run(
+        runner.run_batch(
+            config,
+            gee_interface,
+            FakeDriveInterface(),
+            on_change=lambda name, entry: changes.append((name, entry["state"])),
+            executor=ThreadPoolExecutor(1),
+        )
+    )
+
+    assert manifest.with_state("reported") == ["Spain", "France"]
+    assert manifest.with_state("failed") == ["Italy"]
+    assert "Export quota exceeded" in manifest.entries["Italy"]["error"]
+    assert gee_interface.exported == ["sub_a_Spain", "sub_a_France"]
+    assert ("Spain", "downloaded") in changes
+
+    entry = json.loads(manifest.path.read_text())["France"]
+    assert entry["csv"].endswith("sub_a_France.csv")
+
+    # The reports get the code of their country as REF_AREA
+    assert entry["report"].endswith("France_250.xlsx")
+
+    # Resume: only the failed country is submitted again
+    gee_interface = FakeGEEInterface()
+    manifest = asyncio.run(
+        runner.run_batch(
+            config,
+            gee_interface,
+            FakeDriveInterface(),
+            retry_failed=True,
+            executor=ThreadPoolExecutor(1),
+        )
+    )
+
+    assert gee_interface.exported == ["sub_a_Italy"]
+    assert manifest.summary()["reported"] == 3
+
+
+def test_run_batch_old_manifest(config, tmp_path):
+    """Entries of manifests written without the codes get them from the admin
+    asset"""
+
+    csv_file = tmp_path / "sub_a_Spain.csv"
+    csv_file.write_text("process_id,sub_a\n")
+
+    manifest = Manifest(Path(config["output_dir"]) / "manifest.json")
+    manifest.add(["Spain"])
+    manifest.update("Spain", state="downloaded", csv=str(csv_file))
+
+    gee_interface = FakeGEEInterface(fail_export=["France", "Italy"])
+    manifest = asyncio.run(
+        runner.run_batch(
+            config,
+            gee_interface,
+            FakeDriveInterface(),
+            executor=ThreadPoolExecutor(1),
+        )
+    )
+
+    assert manifest.with_state("reported") == ["Spain"]
+    assert manifest.entries["Spain"]["report"].endswith("Spain_724.xlsx")
+
+
+def test_run_batch_executor(config):
+    """The executor of the caller is not shut down"""
+
+    with ThreadPoolExecutor(1) as executor:
+        asyncio.run(
+            runner.run_batch(
+                config, FakeGEEInterface(), FakeDriveInterface(), executor=executor
+            )
+        )
+
+        assert executor.submit(len, "MGCI").result() == 4
+
+
+def test_get_country_process(monkeypatch):
+    """The countries are reduced with the real surface area source of the config"""
+
+    calls = []
+
+    def reduce_regions(*args, **kwargs):
+        calls.append(kwargs)
+        return {}
+
+    monkeypatch.setattr(runner, "reduce_regions", reduce_regions)
+
+    config = {
+        **runner.DEFAULT_CONFIG,
+        "years": {1: {"asset": "lc/2000", "year": 2000}},
+        "rsa": True,
+        "rsa_source": "precomputed",
+        "rsa_asset": "projects/my-project/assets/rsa_tiles",
+    }
+    runner.get_country_process(None, runner.get_years(config), {}, config)
+
+    assert calls == [
+        {
+            "rsa_asset": "projects/my-project/assets/rsa_tiles",
+            "rsa_source": "precomputed",
+        }
+    ]
@@ -1,11 +1,14 @@
 import json
 from pathlib import Path
+import pandas as pd
 import pytest
 
 import component.parameter.module_parameter as param
+import component.parameter.tables as tables
 import component.scripts as cs
 import component.scripts.sub_a as sub_a
 import component.scripts.sub_b as sub_b
+from component.scripts.report_scripts import finalize_report, map_impact
 import tests.test_result as test
 from component.parameter.index_parameters import (
     sub_a_landtype_cols,
@@ -44,6 +47,25 @@ def test_fill_parsed_df(results):
     assert filled_df.shape == (40, 4)
 
 
+def test_parameter_tables(results):
+    """The parameter tables are never changed by the reports or their users"""
+
+    parsed_df = cs.parse_to_year_a(results, reporting_years_sub_a, 2000)
+    sub_a.fill_parsed_df(parsed_df)
+
+    belt_table = tables.get_belt_table()
+    assert "key" not in belt_table.columns
+    assert "key" not in tables.get_lc_classes().columns
+
+    belt_table.loc[0, "desc"] = "changed"
+    assert tables.get_belt_table().loc[0, "desc"] != "changed"
+
+    with pytest.raises(TypeError):
+        tables.get_belt_desc()[1] = "changed"
+
+    assert tables.get_green_lookup()[1] == 0
+
+
 def test_get_report_sub_a_landtype(results):
 
     parsed_df = cs.parse_to_year_a(results, reporting_years_sub_a, 2000)
@@ -94,3 +116,148 @@ def test_get_report_pdma_pt(results):
     )
     assert len(sub_b_perc_cols) == 17
     assert report.shape == (5, len(sub_b_perc_cols))
+
+
+def test_annotate_parsed_df(results):
+    """Test annotate_parsed_df"""
+
+    parsed_df = cs.parse_to_year_a(results, reporting_years_sub_a, 2000)
+    annotated_df = sub_a.annotate_parsed_df(parsed_df)
+
+    # One row per belt_class and lc_class combination and the is_green column
+    assert annotated_df.shape == (40, 5)
+
+    # Green classes are the ones flagged in the default lc_map_matrix
+    green_classes = set(annotated_df[annotated_df.is_green == 1].lc_class.unique())
+    assert green_classes == {2, 3, 4, 5, 6}
+
+    # Annotating an already annotated frame is a no-op
+    assert sub_a.annotate_parsed_df(annotated_df).equals(annotated_df)
+
+
+def test_annotate_parsed_df_unknown_class(results):
+    """Classes outside of the default map matrix are not silently non-green"""
+
+    parsed_df = cs.parse_to_year_a(results, reporting_years_sub_a, 2000)
+    parsed_df.loc[0, "lc_class"] = 42
+
+    with pytest.raises(ValueError, match="42"):
+        sub_a.annotate_parsed_df(parsed_df)
+
+
+def test_map_impact():
+    """Transitions are matched on the class pair, whatever the class codes"""
+
+    transition_table = pd.DataFrame(
+        {
+            "from_code": [1, 1, 101, 2],
+            "to_code": [1, 2, 1, 101],
+            "impact_code": [0, 1, 2, 3],
+        }
+    )
+    df = pd.DataFrame({"from_lc": [1, 1, 101, 2, 0, 3], "to_lc": [1, 2, 1, 101, 5, 0]})
+
+    assert map_impact(df, transition_table).tolist() == [0, 1, 2, 3, 0, 0]
+
+    # A transition between 2 classes that is not in the matrix is an error
+    df = pd.DataFrame({"from_lc": [1, 2], "to_lc": [2, 1]})
+
+    with pytest.raises(ValueError, match=r"\(2, 1\)"):
+        map_impact(df, transition_table)
+
+
+def test_finalize_report():
+    """Test finalize_report"""
+
+    report_df = pd.DataFrame(
+        {
+            "belt_class": [1, 2, "Total"],
+            "lc_class": [4, 10, "MGCI"],
+            "OBS_VALUE": [0.0, None, 12.5],
+        }
+    )
+    output_cols = [
+        "BIOCLIMATIC_BELT",
+        "LAND_COVER",
+        "NATURE",
+        "OBS_STATUS",
+        "OBS_VALUE",
+    ]
+    report = finalize_report(report_df, output_cols)
+
+    assert report.columns.tolist() == output_cols
+    assert report.BIOCLIMATIC_BELT.tolist() == ["Nival", "Alpine", "Total"]
+    assert report.LAND_COVER.tolist() == [
+        "Tree-covered areas",
+        "Inland water bodies",
+        "MGCI",
+    ]
+    assert report.OBS_VALUE.tolist() == ["NA", "NA", 12.5]
+    assert report.NATURE.tolist() == ["N", "N", "C"]
+    assert report.OBS_STATUS.tolist() == ["M", "M", "A"]
+
+
+def test_parse_result(results):
+    """Test parse_result builds typed columns for both nesting levels"""
+
+    sub_a_df = cs.parse_result(results["2000"]["sub_a"], single=True)
+
+    assert sub_a_df.columns.tolist() == ["belt_class", "lc_class", "sum"]
+    assert sub_a_df.dtypes.astype(str).tolist() == ["int16", "int32", "float64"]
+    assert sub_a_df["sum"].sum() == pytest.approx(
+        sum(g["sum"] for belt in results["2000"]["sub_a"] for g in belt["groups"])
+    )
+
+    sub_b_df = cs.parse_result(results["2000_2015_2018"])
+    n_groups = sum(
+        len(belt["groups"])
+        for groups in results["2000_2015_2018"].values()
+        for belt in groups
+    )
+
+    assert sub_b_df.columns.tolist() == ["category", "belt_class", "transition", "sum"]
+    assert len(sub_b_df) == n_groups
+    assert set(sub_b_df.category) == set(results["2000_2015_2018"])
+
+    # Empty results keep the same structure
+    assert cs.parse_result({}).columns.tolist() == sub_b_df.columns.tolist()
+
+
+def test_results_cache(results):
+    """Test the cache parses every process once and returns independent copies"""
+
+    cache = cs.ResultsCache(results)
+
+    sub_a_df = cache.get("2000", "sub_a")
+    pd.testing.assert_frame_equal(
+        sub_a_df, cs.parse_result(results["2000"]["sub_a"], single=True)
+    )
+
+    # Mutating the returned frame does not alter the cached one
+    sub_a_df["sum"] = 0
+    assert cache.get("2000", "sub_a")["sum"].sum() > 0
+
+    baseline = cache.get("2000_2015_2018", "baseline_transition")
+    assert set(baseline.category) == {"baseline_transition"}
+    assert len(cache._parsed) == 3
+
+    # The parse helpers accept both the cache and the raw results
+    pd.testing.assert_frame_equal(
+        cs.parse_sub_b_year(cache, {"baseline": [2000, 2015]}),
+        cs.parse_sub_b_year(results, {"baseline": [2000, 2015]}),
+    )
+    assert cs.get_results_cache(cache) is cache
+
+
+def test_get_remap_matrix():
+    """Every year gets the matrix of its sub indicator, whatever the other years"""
+
+    matrix_a, matrix_b = {1: 1}, {1: 2}
+    a_years = cs.get_a_years(test.sub_a_year)
+    b_years = cs.get_b_years(test.sub_b_year)
+
+    matrices = [
+        cs.get_remap_matrix(year, matrix_a, matrix_b) for year in a_years + b_years
+    ]
+
+    assert matrices == [matrix_a] * len(a_years) + [matrix_b] * len(b_years)
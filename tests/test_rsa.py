@@ -1,8 +1,16 @@
+import numpy as np
 import pytest
 import ee
 
 from component.model import MgciModel
-from component.scripts.surface_area import get_real_surface_area
+import component.scripts as cs
+from component.scripts import local_surface_area
+from component.scripts.gee import reduce_regions
+from component.scripts.surface_area import (
+    compare_real_surface_area,
+    get_real_surface_area,
+    get_tile_real_surface_area,
+)
 
 
 def test_rsa_values(test_realsurfacearea_aoi, default_dem_asset_id):
@@ -51,3 +59,115 @@ def test_rsa_values(test_realsurfacearea_aoi, default_dem_asset_id):
     # Assert
 
     assert process_values == expected_values
+
+
+def test_rsa_memoized(test_realsurfacearea_aoi, default_dem_asset_id):
+    """The real surface area image is built once per dem and AOI"""
+
+    rsa = get_real_surface_area(default_dem_asset_id, test_realsurfacearea_aoi)
+
+    # An equal AOI reuses the same image
+    aoi = ee.FeatureCollection("users/dfgm2006/FAO/MGCI/AOI_RSA")
+    assert get_real_surface_area(default_dem_asset_id, aoi) is rsa
+
+
+def test_rsa_precomputed_parity(test_realsurfacearea_aoi, default_dem_asset_id):
+    """A precomputed tile gives the same values as the on the fly computation"""
+
+    tile = get_tile_real_surface_area(
+        default_dem_asset_id, test_realsurfacearea_aoi.geometry()
+    )
+
+    difference = compare_real_surface_area(
+        default_dem_asset_id, test_realsurfacearea_aoi, tile
+    ).getInfo()
+
+    assert difference < 1e-6
+
+
+def test_rsa_precomputed_reduce(
+    test_realsurfacearea_aoi,
+    default_dem_asset_id,
+    default_remap_matrix_a,
+    default_transition_matrix,
+    test_sub_a_year,
+):
+    """Reducing the AOI with the precomputed tiles gives the totals of the on the
+    fly real surface area"""
+
+    # Two tiles splitting the AOI, as precompute_real_surface_area exports them
+    coords = test_realsurfacearea_aoi.geometry().bounds().getInfo()["coordinates"][0]
+    (xmin, ymin), (xmax, ymax) = min(coords), max(coords)
+    xmid = (xmin + xmax) / 2
+    tiles = [
+        get_tile_real_surface_area(
+            default_dem_asset_id, ee.Geometry.Rectangle([x0, ymin, x1, ymax])
+        )
+        for x0, x1 in [(xmin, xmid), (xmid, xmax)]
+    ]
+
+    year = cs.get_a_years(test_sub_a_year)[0]
+    args = (
+        test_realsurfacearea_aoi,
+        default_remap_matrix_a,
+        True,
+        default_dem_asset_id,
+        year,
+        default_transition_matrix,
+    )
+
+    results = ee.Dictionary(
+        {
+            "on_the_fly": reduce_regions(*args),
+            "precomputed": reduce_regions(
+                *args, rsa_asset=tiles, rsa_source="precomputed"
+            ),
+        }
+    ).getInfo()
+
+    def to_sums(result):
+        return {
+            (belt["biobelt"], group["lc"]): group["sum"]
+            for belt in result["sub_a"]
+            for group in belt["groups"]
+        }
+
+    expected = to_sums(results["on_the_fly"])
+
+    assert expected
+    assert to_sums(results["precomputed"]) == pytest.approx(expected, rel=1e-6)
+
+
+def test_rsa_local_values(test_realsurfacearea_aoi, default_dem_asset_id):
+    """The NumPy implementation gives the same values as the GEE graph on the
+    3x3 DEM windows around the test points"""
+
+    points = ee.FeatureCollection(
+        "users/dfgm2006/FAO/MGCI/random_points_to_test_rsa"
+    ).toList(10)
+
+    dem = ee.Image(default_dem_asset_id).clip(test_realsurfacearea_aoi)
+    rsa = get_real_surface_area(default_dem_asset_id, test_realsurfacearea_aoi)
+    cellsize = dem.projection().nominalScale().getInfo()
+    windows = dem.neighborhoodToBands(ee.Kernel.square(1))
+
+    def extract_values(point):
+        """Return the GEE surface and the DEM window of the point"""
+        geometry = ee.Feature(point).geometry()
+        return ee.Dictionary(
+            windows.reduceRegion(ee.Reducer.first(), geometry, cellsize)
+        ).set(
+            "rsa", rsa.reduceRegion(ee.Reducer.first(), geometry, cellsize).get("sum")
+        )
+
+    for values in points.map(extract_values).getInfo():
+        # Band names end with the column and row offsets of the neighbor
+        window = np.full((3, 3), np.nan)
+        for name, value in values.items():
+            if name != "rsa":
+                col, row = (int(offset) for offset in name.split("_")[-2:])
+                window[row + 1, col + 1] = value
+
+        local_rsa = local_surface_area.get_real_surface_area(window, cellsize)
+
+        assert local_rsa[1, 1] == pytest.approx(values["rsa"], rel=1e-9)
@@ -0,0 +1,218 @@
+"""Test the streaming accumulation of grouped areas"""
+
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+import rasterio as rio
+from rasterio.transform import from_origin
+from rasterio.windows import Window
+
+from component.scripts import accumulator as acc
+from component.scripts.accumulator import (
+    AreaAccumulator,
+    Lookup,
+    get_block_shape,
+    get_unique_values,
+    iter_block_windows,
+    iter_blocks,
+    preview_unique_values,
+)
+
+
+def write_raster(path, data, **kwargs):
+    """Write a single band GeoTIFF, uint8 by default"""
+
+    profile = {
+        "driver": "GTiff",
+        "height": data.shape[0],
+        "width": data.shape[1],
+        "count": 1,
+        "dtype": "uint8",
+        "crs": "EPSG:32618",
+        "transform": from_origin(500000, 100000, 100, 100),
+        "nodata": 0,
+        **kwargs,
+    }
+    with rio.open(path, "w", **profile) as dst:
+        dst.write(data.astype(profile["dtype"]), 1)
+
+    return str(path)
+
+
+def test_iter_block_windows():
+    """Blocks are aligned on the raster blocks, clipped to the window and cover it"""
+
+    window = Window(5, 10, 40, 25)
+    blocks = list(iter_block_windows(50, 60, (16, 16), window))
+
+    assert blocks[0] == Window(5, 10, 11, 6)
+    assert blocks[1] == Window(16, 10, 16, 6)
+    assert all(block.col_off in [5, 16, 32] for block in blocks)
+    assert all(block.row_off in [10, 16, 32] for block in blocks)
+
+    covered = np.zeros((50, 60), dtype=int)
+    for block in blocks:
+        rows, cols = block.toslices()
+        covered[rows, cols] += 1
+
+    expected = np.zeros((50, 60), dtype=int)
+    expected[10:35, 5:45] = 1
+    assert (covered == expected).all()
+
+    # Whole raster, the last blocks are cut at the border
+    blocks = list(iter_block_windows(50, 60, (16, 16)))
+    assert len(blocks) == 4 * 4
+    assert blocks[-1] == Window(48, 48, 12, 2)
+
+
+def test_get_block_shape(tmp_path):
+    """Tiled rasters are read by tiles, striped ones by groups of strips"""
+
+    data = np.ones((300, 200))
+
+    tiled = write_raster(
+        tmp_path / "tiled.tif", data, tiled=True, blockxsize=64, blockysize=32
+    )
+    with rio.open(tiled) as src:
+        assert get_block_shape(src) == (32, 64)
+
+    striped = write_raster(tmp_path / "striped.tif", data, blockysize=10)
+    with rio.open(striped) as src:
+        assert get_block_shape(src) == (260, 200)
+        assert get_block_shape(src, min_rows=1) == (10, 200)
+
+
+@pytest.mark.parametrize("dtype", ["uint8", "int16", "uint16", "int32"])
+def test_lookup(dtype):
+    """The lookup array gives the same values as matching every class"""
+
+    rng = np.random.default_rng(2)
+    info = np.iinfo(dtype)
+    values = rng.integers(max(info.min, -500), min(info.max, 500), size=(30, 30))
+    values = values.astype(dtype)
+    matrix = {code: code % 7 + 1 for code in range(-400, 400, 3)}
+
+    expected = np.zeros(values.shape, dtype=np.int64)
+    for old_val, new_val in matrix.items():
+        expected += (values == old_val) * new_val
+
+    remap = Lookup(matrix, dtype)
+    remapped = remap(values)
+
+    assert remapped.dtype == remap.dtype == np.uint8
+    assert (remapped == expected).all()
+    assert Lookup({1: 300}, dtype).dtype == np.uint16
+    assert Lookup({1: -1}, dtype).dtype == np.int8
+
+
+def test_area_accumulator(monkeypatch):
+    """Dense and sparse reductions give the pandas groupby, merge adds them up"""
+
+    rng = np.random.default_rng(0)
+    biobelt = rng.integers(1, 5, size=(40, 40))
+    values = rng.integers(0, 1000, size=(40, 40))
+    area = rng.random((40, 40))
+    valid = rng.random((40, 40)) > 0.2
+
+    df = pd.DataFrame(
+        {"biobelt": biobelt[valid], "lc": values[valid], "area": area[valid]}
+    )
+    expected = df.groupby(["biobelt", "lc"]).area.sum().to_dict()
+
+    dense = AreaAccumulator().add("sub_a", biobelt, values, area, valid)
+    assert dense.sums["sub_a"] == pytest.approx(expected)
+
+    monkeypatch.setattr(acc, "MAX_DENSE_BINS", 0)
+    sparse = AreaAccumulator().add("sub_a", biobelt, values, area, valid)
+    assert sparse.sums["sub_a"] == pytest.approx(expected)
+
+    # Half of the rows in one accumulator, the other half in a second one
+    first = AreaAccumulator(["sub_a"]).add(
+        "sub_a", biobelt[:20], values[:20], area[:20], valid[:20]
+    )
+    second = AreaAccumulator().add(
+        "sub_a", biobelt[20:], values[20:], area[20:], valid[20:]
+    )
+    merged = first.merge(pickle.loads(pickle.dumps(second)))
+    assert merged.sums["sub_a"] == pytest.approx(expected)
+
+    groups = merged.scale(2).to_groups("sub_a")
+    assert [belt["biobelt"] for belt in groups] == [1, 2, 3, 4]
+    assert groups[0]["groups"][0]["sum"] == pytest.approx(
+        expected[(1, groups[0]["groups"][0]["lc"])] / 2
+    )
+
+
+def test_iter_blocks(tmp_path):
+    """Streaming the blocks of a raster gives the histogram of the whole array"""
+
+    rng = np.random.default_rng(1)
+    lc = rng.integers(0, 11, size=(100, 70))
+    biobelt = rng.integers(1, 5, size=(100, 70))
+
+    lc_path = write_raster(
+        tmp_path / "lc.tif", lc, tiled=True, blockxsize=32, blockysize=32
+    )
+    biobelt_path = write_raster(tmp_path / "biobelt.tif", biobelt)
+
+    accumulator = AreaAccumulator()
+    n_blocks = 0
+    for _, (lc_block, biobelt_block) in iter_blocks([lc_path, biobelt_path]):
+        assert lc_block.shape[0] <= 32 and lc_block.shape[1] <= 32
+        valid = ~(np.ma.getmaskarray(lc_block) | np.ma.getmaskarray(biobelt_block))
+        accumulator.add("sub_a", biobelt_block.data, lc_block.data, 1, valid)
+        n_blocks += 1
+
+    whole = AreaAccumulator().add("sub_a", biobelt, lc, 1, lc != 0)
+
+    assert n_blocks == 4 * 3
+    assert accumulator.sums == whole.sums
+
+
+@pytest.mark.parametrize("dtype", ["uint8", "int16", "uint16", "int32"])
+def test_get_unique_values(tmp_path, dtype):
+    """Values of the whole raster and of a window, with one or several threads"""
+
+    rng = np.random.default_rng(3)
+    info = np.iinfo(dtype)
+    data = rng.choice([max(info.min, -300), 0, 3, 7, min(info.max, 4000)], (90, 70))
+    data[50:, :] = 12
+
+    path = write_raster(
+        tmp_path / "lc.tif",
+        data,
+        dtype=dtype,
+        nodata=None,
+        tiled=True,
+        blockxsize=16,
+        blockysize=16,
+    )
+
+    window = Window(5, 0, 40, 45)
+    expected = np.unique(data.astype(dtype)).tolist()
+    expected_window = np.unique(data.astype(dtype)[:45, 5:45]).tolist()
+
+    assert get_unique_values(path, n_threads=1) == expected
+    assert get_unique_values(path, n_threads=4) == expected
+    assert get_unique_values(path, window=window) == expected_window
+    assert 12 not in expected_window
+
+    assert preview_unique_values(path) == expected
+    assert set(preview_unique_values(path, max_size=10)) <= set(expected)
+
+
+def test_fold_unique():
+    """Presence arrays are folded in place, other values in a sorted union"""
+
+    blocks = [np.array([3, 7], "uint8"), np.array([0, 3], "uint8")]
+    found = None
+    for values in blocks:
+        found = acc.fold_unique(found, acc.block_unique(values))
+
+    assert found.shape == (256,)
+    assert acc.merge_unique([found], "uint8") == [0, 3, 7]
+
+    found = acc.fold_unique(np.array([-5, 7]), np.array([0, 7]))
+    assert acc.merge_unique([found], "int32") == [-5, 0, 7]
@@ -0,0 +1,118 @@
+"""Test the background results read from a table asset with a fake GEE interface"""
+
+import asyncio
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import ee
+import pytest
+from pysepal.scripts.warning import SepalWarning
+
+from component.scripts.asset_results import (
+    RESULTS_PROPERTY,
+    read_from_asset,
+    results_from_task,
+)
+from component.scripts.deferred_calculation import task_process
+
+
+class FakeGEEInterface:
+    """Answers the getInfo requests with the given values, in order"""
+
+    def __init__(self, infos=(), state="COMPLETED"):
+        self.infos = list(infos)
+        self.state = state
+        self.exports = []
+
+    async def get_info_async(self, ee_object, tag=None):
+        return self.infos.pop(0)
+
+    async def get_task_async(self, task_id):
+        return SimpleNamespace(metadata=SimpleNamespace(state=self.state))
+
+    async def get_folder_async(self):
+        return "projects/my-project/assets/"
+
+    async def export_table_to_asset_async(self, **kwargs):
+        self.exports.append(kwargs)
+        return SimpleNamespace(id="TASK_ID")
+
+
+@pytest.fixture
+def antioquia_result() -> dict:
+    return json.loads(
+        Path("tests/test_output_result/result_antioquia.json").read_text()
+    )
+
+
+@pytest.fixture
+def asset_features(antioquia_result) -> list:
+    """Features as stored by to_asset_collection"""
+
+    return [
+        {"process_id": process_id, RESULTS_PROPERTY: json.dumps(results)}
+        for process_id, results in antioquia_result.items()
+    ]
+
+
+def test_read_from_asset(antioquia_result, asset_features):
+    """The results are read by pages and decoded to the ResultsDict"""
+
+    pages = [asset_features[:2], asset_features[2:]]
+    gee_interface = FakeGEEInterface([len(asset_features), *pages])
+
+    results = asyncio.run(
+        read_from_asset("projects/my-project/assets/Task", gee_interface, page_size=2)
+    )
+
+    assert results == antioquia_result
+    assert list(results) == list(antioquia_result)
+    assert gee_interface.infos == []
+
+
+def test_results_from_task(asset_features):
+    """Results are only read once the task is completed"""
+
+    asset_id = "projects/my-project/assets/Task_Antioquia"
+
+    gee_interface = FakeGEEInterface(state="RUNNING")
+    with pytest.raises(SepalWarning, match="Task_Antioquia"):
+        asyncio.run(results_from_task("TASK_ID", asset_id, gee_interface))
+
+    gee_interface = FakeGEEInterface(state="FAILED")
+    with pytest.raises(Exception, match="failed"):
+        asyncio.run(results_from_task("TASK_ID", asset_id, gee_interface))
+
+    gee_interface = FakeGEEInterface([1, asset_features[:1]])
+    results = asyncio.run(results_from_task("TASK_ID", asset_id, gee_interface))
+    assert list(results) == ["2000"]
+
+
+def test_task_process_to_asset(tmp_path):
+    """The task file records the asset that holds the results"""
+
+    gee_interface = FakeGEEInterface()
+    process = ee.FeatureCollection([ee.Feature(None, {"process_id": "2000"})])
+
+    task_path = asyncio.run(
+        task_process(
+            process,
+            tmp_path / "Task_Antioquia.json",
+            {"geo_area_name": "Antioquia"},
+            gee_interface=gee_interface,
+            destination="asset",
+        )
+    )
+
+    data = json.loads(Path(task_path).read_text())
+    asset_id = "projects/my-project/assets/Task_Antioquia"
+
+    assert data["task"] == {
+        "id": "TASK_ID",
+        "name": "Task_Antioquia",
+        "destination": "asset",
+        "asset_id": asset_id,
+    }
+    assert gee_interface.exports[0]["asset_id"] == asset_id
+    assert gee_interface.exports[0]["selectors"] == ["process_id", RESULTS_PROPERTY]
@@ -0,0 +1,90 @@
+"""Test the consolidation of the reports of many countries"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from component.scripts.consolidate import consolidate_reports, read_report
+from component.scripts.report_writer import STORE_FOLDER, write_reports, write_store
+
+
+def get_sheets(geo_area_name: str, ref_area: str) -> dict:
+    report = pd.DataFrame(
+        {
+            "REF_AREA": [ref_area] * 2,
+            "GeoAreaName": [geo_area_name] * 2,
+            "TIME_PERIOD": [2000, 2015],
+            "NATURE": ["C", "N"],
+            "OBS_VALUE": [12.5, "NA"],
+        }
+    )
+
+    return {
+        "Table1_ER_MTN_TOTL": report,
+        "Table2_ER_MTN_GRNCOV": report.assign(OBS_VALUE=[1.5, 2.5]),
+    }
+
+
+@pytest.fixture
+def reports(tmp_path) -> dict:
+    """xlsx reports of three countries, the last one also in its Parquet store"""
+
+    reports = {}
+    for geo_area_name, ref_area in [("Antioquia", "005"), ("Bolivar", "013")]:
+        sheets = get_sheets(geo_area_name, ref_area)
+        report_file = tmp_path / geo_area_name / f"{geo_area_name}.xlsx"
+        report_file.parent.mkdir()
+        reports[write_reports(sheets, report_file)] = sheets
+
+    # A store with another report of the folder, only this report must be read
+    sheets = get_sheets("Caldas", "017")
+    report_file = tmp_path / "Caldas" / "Caldas.xlsx"
+    report_file.parent.mkdir()
+    reports[write_reports(sheets, report_file)] = sheets
+    write_store(sheets, report_file.parent / STORE_FOLDER, report_file.stem)
+    write_store(sheets, report_file.parent / STORE_FOLDER, "Caldas_sub_b")
+
+    return reports
+
+
+def test_read_report(reports):
+    """Reports are read from their store or from the workbook, up to num_sheets"""
+
+    for report_file, sheets in reports.items():
+        result = read_report(report_file)
+        assert list(result) == list(sheets)
+        for sheet_name, df in sheets.items():
+            pd.testing.assert_frame_equal(result[sheet_name], df, check_dtype=False)
+
+        assert list(read_report(report_file, num_sheets=1)) == ["Table1_ER_MTN_TOTL"]
+
+
+def test_consolidate_reports(reports, tmp_path):
+    """The sheets of every report are written one after the other"""
+
+    output = consolidate_reports(
+        reports, tmp_path / "consolidated.xlsx", executor=ThreadPoolExecutor(2)
+    )
+
+    result = pd.read_excel(
+        output, sheet_name=None, dtype={"REF_AREA": str}, keep_default_na=False
+    )
+    assert list(result) == ["Table1_ER_MTN_TOTL", "Table2_ER_MTN_GRNCOV"]
+
+    for sheet_name, df in result.items():
+        expected = pd.concat(
+            [sheets[sheet_name] for sheets in reports.values()], ignore_index=True
+        )
+        pd.testing.assert_frame_equal(df, expected, check_dtype=False)
+
+    # The executor of the caller is not shut down
+    with ThreadPoolExecutor(2) as executor:
+        for num_sheets in [1, 2]:
+            output = consolidate_reports(
+                reports, output, num_sheets=num_sheets, executor=executor
+            )
+            assert len(pd.ExcelFile(output).sheet_names) == num_sheets
+
+    with pytest.raises(ValueError):
+        consolidate_reports([], output)
@@ -61,6 +61,43 @@ def test_perform_calculation_on_the_fly(
     assert compare_nested_dicts(result, antioquia_default_result)
 
 
+def test_perform_calculation_batch(
+    gee_interface,
+    test_antioquia_aoi,
+    years,
+    default_dem_asset_id,
+    default_remap_matrix_a,
+    default_remap_matrix_b,
+    default_transition_matrix,
+) -> None:
+    """All the years evaluated in a single request give the same results"""
+
+    antioquia_default_result: ResultsDict = json.loads(
+        Path("tests/test_output_result/result_antioquia.json").read_text()
+    )
+
+    calculation_parms = {
+        "gee_interface": gee_interface,
+        "aoi": test_antioquia_aoi,
+        "rsa": False,
+        "dem": default_dem_asset_id,
+        "remap_matrix_a": default_remap_matrix_a,
+        "remap_matrix_b": default_remap_matrix_b,
+        "transition_matrix": default_transition_matrix,
+        "years": years,
+        "logger": None,
+        "background": False,
+        "scale": None,
+        "batch": True,
+    }
+
+    result = asyncio.run(perform_calculation(**calculation_parms))
+
+    assert isinstance(result, dict)
+    assert list(result) == [cs.years_from_dict(year) for year in years]
+    assert compare_nested_dicts(result, antioquia_default_result)
+
+
 def test_perform_calculation_on_the_background(
     gee_interface,
     test_antioquia_aoi,
@@ -125,6 +162,73 @@ def test_perform_calculation_timed_out(
         assert result is None
 
 
+class SplitGEEInterface:
+    """Fail the requests of several years on GEE memory limits and the request
+    of the failing year on any other error"""
+
+    def __init__(self, failing=None):
+        self.failing = failing
+        self.tags = []
+        self.completed = []
+
+    async def get_info_async(self, ee_object, tag=None):
+        self.tags.append(tag)
+
+        if "+" in tag:
+            raise Exception("User memory limit exceeded.")
+        if tag == self.failing:
+            raise Exception("Invalid band")
+
+        await asyncio.sleep(0.1)
+        self.completed.append(tag)
+
+        return {tag: {}}
+
+
+def test_perform_calculation_batch_split(
+    test_antioquia_aoi,
+    years,
+    default_dem_asset_id,
+    default_remap_matrix_a,
+    default_remap_matrix_b,
+    default_transition_matrix,
+) -> None:
+    """Batches are split on GEE limits, and the first other error cancels the
+    remaining requests"""
+
+    calculation_parms = {
+        "aoi": test_antioquia_aoi,
+        "rsa": False,
+        "dem": default_dem_asset_id,
+        "remap_matrix_a": default_remap_matrix_a,
+        "remap_matrix_b": default_remap_matrix_b,
+        "transition_matrix": default_transition_matrix,
+        "years": years,
+        "logger": None,
+        "background": False,
+        "scale": None,
+        "batch": True,
+    }
+    process_ids = [cs.years_from_dict(year) for year in years]
+
+    gee_interface = SplitGEEInterface()
+    result = asyncio.run(
+        perform_calculation(gee_interface=gee_interface, **calculation_parms)
+    )
+
+    assert list(result) == process_ids
+    assert sorted(gee_interface.completed) == sorted(process_ids)
+
+    gee_interface = SplitGEEInterface(failing=process_ids[0])
+    with pytest.raises(Exception, match="Invalid band"):
+        asyncio.run(
+            perform_calculation(gee_interface=gee_interface, **calculation_parms)
+        )
+
+    # The other years are cancelled instead of waiting for them
+    assert gee_interface.completed == []
+
+
 if __name__ == "__main__":
     # Run pytest with the current file
     pytest.main([__file__, "-s", "-vv"])
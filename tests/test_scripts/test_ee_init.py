@@ -0,0 +1,45 @@
+"""Test the background Earth Engine initialization"""
+
+import threading
+
+import pytest
+
+from component.scripts import ee_init
+
+
+@pytest.fixture
+def calls(monkeypatch) -> list:
+    """Record the threads calling init_ee, with a new process state"""
+
+    calls = []
+    monkeypatch.setattr(ee_init, "_future", None)
+    monkeypatch.setattr(
+        ee_init, "init_ee", lambda: calls.append(threading.current_thread().name)
+    )
+
+    return calls
+
+
+def test_start_ee(calls):
+    """EE is initialized once per process, in a background thread"""
+
+    future = ee_init.start_ee()
+    assert ee_init.start_ee() is future
+
+    ee_init.wait_ee(timeout=5)
+    ee_init.wait_ee(timeout=5)
+
+    assert calls == ["ee-init"]
+
+
+def test_wait_ee_error(calls, monkeypatch):
+    """The initialization error is raised by every wait"""
+
+    def init_ee():
+        raise NameError("The project name cannot be detected.")
+
+    monkeypatch.setattr(ee_init, "init_ee", init_ee)
+
+    for _ in range(2):
+        with pytest.raises(NameError, match="project name"):
+            ee_init.wait_ee(timeout=5)
@@ -0,0 +1,220 @@
+"""Test the local backend of reduce_regions against a pixel by pixel computation"""
+
+import numpy as np
+import pandas as pd
+import pytest
+import rasterio as rio
+from rasterio.transform import from_origin
+
+import component.parameter.module_parameter as param
+from component.scripts.local_reduce import (
+    get_lookups,
+    no_remap,
+    reduce_regions,
+    reduce_years,
+)
+
+SHAPE = (60, 45)
+TRANSFORM = from_origin(500000, 100000, 100, 100)
+"Affine: 100 meters pixels, so every pixel is 0.01 km2"
+
+
+def write_raster(path, data, nodata=0):
+    """Write a single band uint8 GeoTIFF in the test grid"""
+
+    profile = {
+        "driver": "GTiff",
+        "height": data.shape[0],
+        "width": data.shape[1],
+        "count": 1,
+        "dtype": "uint8",
+        "crs": "EPSG:32618",
+        "transform": TRANSFORM,
+        "nodata": nodata,
+    }
+    with rio.open(path, "w", **profile) as dst:
+        dst.write(data.astype("uint8"), 1)
+
+    return str(path)
+
+
+@pytest.fixture
+def rasters(tmp_path):
+    """Three land cover years with nodata and a biobelt raster"""
+
+    rng = np.random.default_rng(42)
+    lcs = rng.integers(0, 11, size=(3, *SHAPE))
+    biobelt = rng.integers(0, 5, size=SHAPE)
+
+    years = [
+        {"asset": write_raster(tmp_path / f"lc_{year}.tif", lc), "year": year}
+        for lc, year in zip(lcs, [2000, 2015, 2018])
+    ]
+
+    return {
+        "lcs": lcs,
+        "biobelt": biobelt,
+        "years": years,
+        "biobelt_path": write_raster(tmp_path / "biobelt.tif", biobelt),
+    }
+
+
+@pytest.fixture
+def aoi():
+    """Rectangle covering the rows 5 to 40 and the columns 10 to 30"""
+
+    left, top = 500000 + 10 * 100, 100000 - 5 * 100
+    right, bottom = 500000 + 30 * 100, 100000 - 40 * 100
+    ring = [(left, top), (right, top), (right, bottom), (left, bottom), (left, top)]
+
+    return [{"type": "Polygon", "coordinates": [ring]}]
+
+
+def expected_sums(biobelt, values, valid):
+    """Area in km2 by (biobelt, value) computed with pandas"""
+
+    inside = np.zeros(SHAPE, dtype=bool)
+    inside[5:40, 10:30] = True
+    valid = valid & inside & (biobelt != 0)
+
+    df = pd.DataFrame({"biobelt": biobelt[valid], "lc": values[valid]})
+
+    return (df.groupby(["biobelt", "lc"]).size() * 0.01).to_dict()
+
+
+def to_sums(groups):
+    """Flatten the GEE-like groups to {(biobelt, lc): sum}"""
+
+    return {
+        (belt["biobelt"], group["lc"]): group["sum"]
+        for belt in groups
+        for group in belt["groups"]
+    }
+
+
+def test_reduce_regions_sub_a(rasters, aoi):
+    """Areas by land cover class of the remapped image, workers give the same sums"""
+
+    remap_matrix = {1: 1, 2: 1, 3: 2, 4: 3}
+    lc = rasters["lcs"][0]
+
+    remapped = np.vectorize(lambda value: remap_matrix.get(value, 0))(lc)
+    expected = expected_sums(rasters["biobelt"], remapped, (lc != 0) & (remapped != 0))
+
+    result = reduce_regions(
+        aoi,
+        remap_matrix,
+        False,
+        None,
+        rasters["years"][:1],
+        str(param.TRANSITION_MATRIX_FILE),
+        biobelt=rasters["biobelt_path"],
+        tile_size=16,
+        n_jobs=1,
+    )
+
+    assert list(result) == ["sub_a"]
+    assert to_sums(result["sub_a"]) == pytest.approx(expected)
+
+    result_pool = reduce_regions(
+        aoi,
+        remap_matrix,
+        False,
+        None,
+        rasters["years"][:1],
+        str(param.TRANSITION_MATRIX_FILE),
+        biobelt=rasters["biobelt_path"],
+        tile_size=16,
+        n_jobs=2,
+    )
+
+    assert to_sums(result_pool["sub_a"]) == pytest.approx(expected)
+
+
+def test_reduce_regions_sub_b(rasters, aoi):
+    """Transitions and degradation of three years without remapping"""
+
+    transition_matrix = pd.read_csv(param.TRANSITION_MATRIX_FILE)
+    impact = dict(zip(transition_matrix.transition, transition_matrix.impact_code))
+    degradation = dict(
+        zip(
+            param.transition_degradation_matrix.transition,
+            param.transition_degradation_matrix.impact_code,
+        )
+    )
+
+    start, end, report = rasters["lcs"].astype(np.int64)
+    baseline_transition = start * 100 + end
+    report_transition = end * 100 + report
+
+    baseline_degradation = np.vectorize(lambda v: impact.get(v, 0))(baseline_transition)
+    report_degradation = np.vectorize(lambda v: impact.get(v, 0))(report_transition)
+    final_degradation = np.vectorize(lambda v: degradation.get(v, 0))(
+        baseline_degradation * 100 + report_degradation
+    )
+
+    valid_baseline = (start != 0) & (end != 0)
+    valid_report = (end != 0) & (report != 0)
+    biobelt = rasters["biobelt"]
+
+    result = reduce_years(
+        aoi,
+        {},
+        {},
+        False,
+        None,
+        [rasters["years"]],
+        str(param.TRANSITION_MATRIX_FILE),
+        biobelt=rasters["biobelt_path"],
+        tile_size=16,
+        n_jobs=1,
+    )["2000_2015_2018"]
+
+    expected = {
+        "baseline_degradation": expected_sums(
+            biobelt, baseline_degradation, valid_baseline
+        ),
+        "final_degradation": expected_sums(
+            biobelt, final_degradation, valid_baseline & valid_report
+        ),
+        "baseline_transition": expected_sums(
+            biobelt, baseline_transition, valid_baseline
+        ),
+        "report_transition": expected_sums(biobelt, report_transition, valid_report),
+    }
+
+    assert list(result) == list(expected)
+    for category, sums in expected.items():
+        assert to_sums(result[category]) == pytest.approx(sums)
+
+
+def test_reduce_regions_outside(rasters):
+    """An AOI that doesn't overlap the land cover raster raises a clear error"""
+
+    left, top = 600000, 100000
+    ring = [(left, top), (left + 500, top), (left + 500, top - 500), (left, top)]
+    aoi = [{"type": "Polygon", "coordinates": [ring]}]
+
+    with pytest.raises(ValueError, match="outside of the land cover raster"):
+        reduce_regions(
+            aoi,
+            {},
+            False,
+            None,
+            rasters["years"][:1],
+            str(param.TRANSITION_MATRIX_FILE),
+            biobelt=rasters["biobelt_path"],
+            n_jobs=1,
+        )
+
+
+def test_no_remap_negative_codes():
+    """Negative codes are remapped to their own value, unknown codes are masked"""
+
+    lookups = get_lookups({-1: 5, 255: 6}, None, "int16")
+    values = np.array([-1, 255, 3, -32768], "int16")
+
+    remapped, valid = no_remap(values, np.ones(4, bool), lookups["remap"])
+
+    assert remapped.tolist() == [5, 6, 0, 0]
+    assert valid.tolist() == [True, True, False, False]
@@ -0,0 +1,111 @@
+"""Test the NumPy real surface area against the same algorithm done by hand"""
+
+import numpy as np
+import pytest
+import rasterio as rio
+from rasterio.transform import from_origin
+
+from component.scripts.local_surface_area import (
+    export_real_surface_area,
+    get_real_surface_area,
+    iter_real_surface_area,
+)
+
+
+@pytest.fixture
+def dem_file(tmp_path):
+    """Random DEM with a nodata pixel, in a projected grid of 90 meters"""
+
+    rng = np.random.default_rng(0)
+    dem = rng.integers(0, 3000, size=(37, 53)).astype("int16")
+    dem[10, 20] = -32768
+
+    path = tmp_path / "dem.tif"
+    profile = {
+        "driver": "GTiff",
+        "height": dem.shape[0],
+        "width": dem.shape[1],
+        "count": 1,
+        "dtype": "int16",
+        "crs": "EPSG:32618",
+        "transform": from_origin(400000, 700000, 90, 90),
+        "nodata": -32768,
+    }
+    with rio.open(path, "w", **profile) as dst:
+        dst.write(dem, 1)
+
+    return path
+
+
+def test_flat_surface():
+    """A flat surface has the planimetric area"""
+
+    area = get_real_surface_area(np.full((4, 5), 100.0), cellsize=90)
+
+    assert np.isnan(area[0]).all() and np.isnan(area[:, -1]).all()
+    assert area[1:-1, 1:-1] == pytest.approx(np.full((2, 3), 90.0**2))
+
+
+def test_jenness_pixel():
+    """Check one pixel with the eight triangles of Jenness (2004)"""
+
+    window = np.array([[10.0, 12.0, 15.0], [11.0, 14.0, 19.0], [9.0, 13.0, 20.0]])
+    cellsize = 30.0
+    (a, b, c), (d, e, f), (g, h, i) = window
+
+    def half_side(z1, z2, size=cellsize):
+        return np.sqrt(size**2 + (z1 - z2) ** 2) / 2
+
+    def heron(s1, s2, s3):
+        p = (s1 + s2 + s3) / 2
+        return np.sqrt(p * (p - s1) * (p - s2) * (p - s3))
+
+    diagonal = np.sqrt(2) * cellsize
+    ae, ce = half_side(a, e, diagonal), half_side(c, e, diagonal)
+    ge, ie = half_side(g, e, diagonal), half_side(i, e, diagonal)
+    ab, bc, de, ef = half_side(a, b), half_side(b, c), half_side(d, e), half_side(e, f)
+    gh, hi, ad, dg = half_side(g, h), half_side(h, i), half_side(a, d), half_side(d, g)
+    be, eh, cf, fi = half_side(b, e), half_side(e, h), half_side(c, f), half_side(f, i)
+
+    expected = sum(
+        [
+            heron(ae, ab, be),
+            heron(be, bc, ce),
+            heron(ad, de, ae),
+            heron(ce, cf, ef),
+            heron(de, dg, ge),
+            heron(ef, fi, ie),
+            heron(ge, eh, gh),
+            heron(eh, ie, hi),
+        ]
+    )
+
+    assert get_real_surface_area(window, cellsize)[1, 1] == pytest.approx(expected)
+
+
+def test_tiles_match_whole_dem(dem_file, tmp_path):
+    """The tiles and their halos give the same surface as the whole DEM"""
+
+    with rio.open(dem_file) as src:
+        dem = src.read(1, masked=True).astype("float64").filled(np.nan)
+
+    expected = get_real_surface_area(dem, 90)
+
+    # nodata pixels and their neighbors are missing
+    assert np.isnan(expected[9:12, 19:22]).all()
+
+    tiles = np.full(expected.shape, np.nan)
+    for window, area in iter_real_surface_area(dem_file, tile_size=8):
+        rows, cols = window.toslices()
+        tiles[rows, cols] = area
+
+    np.testing.assert_allclose(tiles, expected)
+
+    dst = export_real_surface_area(
+        dem_file, tmp_path / "rsa.tif", tile_size=16, memmap=tmp_path / "rsa.dat"
+    )
+    with rio.open(dst) as src:
+        np.testing.assert_allclose(src.read(1), expected)
+
+    memmap = np.memmap(tmp_path / "rsa.dat", np.float64, "r", shape=expected.shape)
+    np.testing.assert_allclose(memmap, expected)
@@ -0,0 +1,109 @@
+"""Test the parser of the CSV files exported from GEE (scripts.read_from_csv)"""
+
+import json
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from component.scripts.scripts import (
+    SUB_B_CATEGORIES,
+    ResultsCache,
+    parse_gee_cell,
+    read_from_csv,
+    read_long_results,
+)
+from component.types import LONG_COLUMNS, ResultsDict
+
+
+antioquia_default_result: ResultsDict = json.loads(
+    Path("tests/test_output_result/result_antioquia.json").read_text()
+)
+
+
+def to_gee_literal(value) -> str:
+    """Write a value as GEE does when exporting a nested dictionary to CSV"""
+
+    if isinstance(value, list):
+        return "[" + ", ".join(to_gee_literal(v) for v in value) + "]"
+    if isinstance(value, dict):
+        return (
+            "{" + ", ".join(f"{k}={to_gee_literal(v)}" for k, v in value.items()) + "}"
+        )
+
+    return repr(value)
+
+
+def test_parse_gee_cell():
+
+    cell = "[{biobelt=2, groups=[{lc=3, sum=0.75}, {lc=4, sum=1.5E-5}]}]"
+
+    assert parse_gee_cell(cell) == [
+        {"biobelt": 2, "groups": [{"lc": 3, "sum": 0.75}, {"lc": 4, "sum": 1.5e-5}]}
+    ]
+    assert parse_gee_cell("[]") == []
+
+    # The content of the cell is never evaluated
+    with pytest.raises(ValueError):
+        parse_gee_cell("__import__('os').getcwd()")
+
+
+def test_read_from_csv(tmp_path):
+
+    header = ["system:index", "process_id", "sub_a"] + SUB_B_CATEGORIES + [".geo"]
+    lines = [",".join(header)]
+
+    for i, (process_id, result) in enumerate(antioquia_default_result.items()):
+        cells = [str(i), process_id]
+        cells += [
+            f'"{to_gee_literal(result[col])}"' if col in result else ""
+            for col in ["sub_a"] + SUB_B_CATEGORIES
+        ]
+        lines.append(",".join(cells + [""]))
+
+    task_file = tmp_path / "task.csv"
+    task_file.write_text("\n".join(lines))
+
+    assert read_from_csv(task_file, chunksize=1) == antioquia_default_result
+
+
+def write_long_csv(path: Path) -> Path:
+    """Write the results in the long layout, categories sorted as GEE does"""
+
+    rows = [
+        [process_id, category, belt["biobelt"], group["lc"], group["sum"]]
+        for process_id, result in antioquia_default_result.items()
+        for category in sorted(result)
+        for belt in result[category]
+        for group in belt["groups"]
+    ]
+    pd.DataFrame(rows, columns=LONG_COLUMNS).to_csv(path, index=False)
+
+    return path
+
+
+def test_read_long_results(tmp_path):
+    """The long layout gives the same DataFrames as the nested results"""
+
+    task_file = write_long_csv(tmp_path / "task.csv")
+
+    results = read_from_csv(task_file)
+    expected = ResultsCache(antioquia_default_result)
+
+    assert isinstance(results, ResultsCache)
+    assert list(results.keys()) == list(expected.keys())
+
+    for process_id, result in antioquia_default_result.items():
+        for category in result:
+            pd.testing.assert_frame_equal(
+                results.get(process_id, category), expected.get(process_id, category)
+            )
+
+    # The typed table is cached and read back from the Parquet file
+    parquet_file = tmp_path / "task.parquet"
+    assert parquet_file.exists()
+
+    df = read_long_results(task_file)
+    assert df.biobelt.dtype == "int16"
+    assert df.category.dtype == "category"
+    pd.testing.assert_frame_equal(df, read_long_results(task_file, cache=False))
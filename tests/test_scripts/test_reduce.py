@@ -9,7 +9,12 @@ sys.path.append(str(Path(".").resolve()))
 
 import pytest
 from pathlib import Path
-from component.scripts.gee import no_remap, reduce_by_regions, reduce_by_region
+from component.scripts.gee import (
+    no_remap,
+    reduce_by_region,
+    reduce_by_regions,
+    reduce_by_regions_combined,
+)
 from component.scripts.gee_parse_reduce_regions import reduceGroups
 
 from tests.utils import compare_nested_dicts
@@ -137,6 +142,43 @@ def test_reduce_by_regions(test_land_cover, test_aoi, test_biobelt):
     assert compare_nested_dicts(result_regions, expected_result)
 
 
+def test_reduce_by_regions_combined(test_land_cover, test_aoi, test_biobelt):
+    """Reducing several bands in one pass returns the same groups as reducing
+    each band separately, also when bands are masked differently"""
+
+    image_area = ee.Image.pixelArea()
+    land_cover = test_land_cover.first()
+    scale = 1000
+
+    # The remapped band is masked where the raw one is not
+    image = land_cover.rename("raw").addBands(
+        no_remap(land_cover, {0: 0, 12: 1, 15: 1}).rename("remapped")
+    )
+    bands = ["raw", "remapped"]
+
+    result = reduce_by_regions_combined(
+        image_area=image_area,
+        biobelt=test_biobelt,
+        image=image,
+        bands=bands,
+        aoi=test_aoi,
+        scale=scale,
+    ).getInfo()
+
+    assert list(result) == bands
+
+    for band in bands:
+        expected = reduce_by_regions(
+            image_area=image_area,
+            biobelt=test_biobelt,
+            image=image.select(band),
+            aoi=test_aoi,
+            scale=scale,
+        ).getInfo()
+
+        assert compare_nested_dicts(result[band], expected)
+
+
 def test_reduce_groups(test_multipolygon_aoi):
     """reduceGroups must faithfully aggregate the reduceRegions groups it is given.
 
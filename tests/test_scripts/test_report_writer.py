@@ -0,0 +1,102 @@
+"""Test the streaming Excel writer of the reporting tables"""
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+from component.scripts import report_writer
+from component.scripts.report_writer import (
+    get_column_widths,
+    get_store_files,
+    merge_widths,
+    read_report_store,
+    read_store,
+    write_reports,
+    write_store,
+)
+
+
+def get_report() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "Indicator": ["15.4.2", "15.4.2", "15.4.2"],
+            "GeoAreaName": ["Antioquia", "Antioquia", None],
+            "TimePeriod": [2000, 2015, 2018],
+            "OBS_VALUE": [12.345678, np.nan, 3.0],
+        }
+    )
+
+
+def test_get_column_widths():
+    """The widths fit the longest value or the header, missing values are ignored"""
+
+    report = get_report()
+
+    assert get_column_widths(report) == [13, 15, 14, 13]
+    assert merge_widths([10, 20], [15, 5]) == [15, 20]
+
+
+def test_write_reports(tmp_path, monkeypatch):
+    """Sheets are written in order, with their widths and the OBS column aligned
+    to the right, the values read back as written"""
+
+    monkeypatch.setattr(report_writer, "CHUNKSIZE", 2)
+
+    report = get_report()
+    sheets = {"Table1_ER_MTN_TOTL": report, "Table2_ER_MTN_GRNCOV": report.head(0)}
+    output = write_reports(sheets, tmp_path / "report.xlsx")
+
+    workbook = load_workbook(output)
+    assert workbook.sheetnames == list(sheets)
+
+    worksheet = workbook["Table1_ER_MTN_TOTL"]
+    widths = [worksheet.column_dimensions[col].width for col in "ABCD"]
+    assert widths == get_column_widths(report)
+    assert [cell.alignment.horizontal for cell in worksheet["D"]] == ["right"] * 4
+    assert worksheet["A2"].alignment.horizontal is None
+    assert worksheet["C3"].value == 2015
+    assert worksheet["D3"].value is None
+
+    pd.testing.assert_frame_equal(
+        pd.read_excel(output, sheet_name="Table1_ER_MTN_TOTL"), report
+    )
+    assert list(pd.read_excel(output, sheet_name="Table2_ER_MTN_GRNCOV").columns) == (
+        list(report.columns)
+    )
+
+
+def test_write_store(tmp_path):
+    """Tables are partitioned by REF_AREA and TIME_PERIOD, the partitions are
+    read back with filters and the OBS placeholders become nulls"""
+
+    report = pd.DataFrame(
+        {
+            "REF_AREA": ["004", "004", "008"],
+            "TIME_PERIOD": [2000, 2015, 2000],
+            "NATURE": ["C", "N", "C"],
+            "OBS_VALUE": [12.5, "NA", 3.0],
+        }
+    )
+    sheets = {"Table1_ER_MTN_TOTL": report}
+
+    files = get_store_files(sheets, "report")
+    assert sorted(files) == [
+        "Table1_ER_MTN_TOTL/REF_AREA=004/TIME_PERIOD=2000/report.parquet",
+        "Table1_ER_MTN_TOTL/REF_AREA=004/TIME_PERIOD=2015/report.parquet",
+        "Table1_ER_MTN_TOTL/REF_AREA=008/TIME_PERIOD=2000/report.parquet",
+    ]
+
+    folder = write_store(sheets, tmp_path / "parquet", "report")
+    write_store(sheets, folder, "other_report")
+
+    df = read_store(folder, "Table1_ER_MTN_TOTL", [("REF_AREA", "==", "004")])
+    assert len(df) == 4
+    assert set(df.REF_AREA) == {"004"}
+    assert sorted(df.TIME_PERIOD) == ["2000", "2000", "2015", "2015"]
+    assert df.OBS_VALUE.isna().sum() == 2
+    assert df.OBS_VALUE.max() == 12.5
+
+    # A report is read back as it is written in its sheets
+    result = read_report_store(folder, "report")
+    assert list(result) == ["Table1_ER_MTN_TOTL"]
+    pd.testing.assert_frame_equal(result["Table1_ER_MTN_TOTL"], report)
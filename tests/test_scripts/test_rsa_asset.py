@@ -0,0 +1,83 @@
+"""Test the reuse of the real surface area asset with a fake GEE interface"""
+
+import asyncio
+from types import SimpleNamespace
+
+import ee
+
+from component.scripts.gee import get_rsa_asset, get_rsa_asset_id
+
+DEM = "USGS/SRTMGL1_003"
+ASSET_ID = "projects/my-project/assets/rsa_Antioquia_SRTMGL1_003"
+
+
+class FakeGEEInterface:
+    """An assets folder holding the given assets, with the given running tasks"""
+
+    def __init__(self, assets=(), running=()):
+        self.assets = list(assets)
+        self.running = list(running)
+        self.exports = []
+
+    async def get_folder_async(self):
+        return "projects/my-project/assets/"
+
+    async def get_asset_async(self, asset_id, not_exists_ok=False):
+        return {"id": asset_id} if asset_id in self.assets else None
+
+    async def is_running_async(self, name):
+        return name in self.running
+
+    async def get_info_async(self, ee_object, tag=None):
+        return {"crs": "EPSG:4326", "transform": [1, 0, 0, 0, -1, 0]}
+
+    async def export_image_to_asset_async(self, **kwargs):
+        self.exports.append(kwargs)
+        return SimpleNamespace(id="TASK_ID")
+
+
+def get_aoi() -> ee.FeatureCollection:
+    return ee.FeatureCollection(
+        ee.Feature(ee.Geometry.Rectangle([-76.0, 6.0, -75.5, 6.5]))
+    )
+
+
+def test_get_rsa_asset_id():
+    """The asset is named after the AOI and the dem, without invalid characters"""
+
+    asset_id = asyncio.run(
+        get_rsa_asset_id("Antioquia (Colombia)", DEM, FakeGEEInterface())
+    )
+
+    assert asset_id == "projects/my-project/assets/rsa_Antioquia__Colombia__SRTMGL1_003"
+
+
+def test_get_rsa_asset_exists():
+    """An exported asset is returned without starting any export"""
+
+    gee_interface = FakeGEEInterface(assets=[ASSET_ID])
+
+    assert (
+        asyncio.run(get_rsa_asset(DEM, get_aoi(), ASSET_ID, gee_interface)) == ASSET_ID
+    )
+    assert gee_interface.exports == []
+
+
+def test_get_rsa_asset_export():
+    """The first request starts the export and returns None, the next ones wait
+    for the running export"""
+
+    gee_interface = FakeGEEInterface()
+
+    assert asyncio.run(get_rsa_asset(DEM, get_aoi(), ASSET_ID, gee_interface)) is None
+    assert len(gee_interface.exports) == 1
+
+    export = gee_interface.exports[0]
+    assert export["asset_id"] == ASSET_ID
+    assert export["description"] == "rsa_Antioquia_SRTMGL1_003"
+    assert export["crs"] == "EPSG:4326"
+
+    gee_interface = FakeGEEInterface(running=["rsa_Antioquia_SRTMGL1_003"])
+
+    assert asyncio.run(get_rsa_asset(DEM, get_aoi(), ASSET_ID, gee_interface)) is None
+    assert gee_interface.exports == []
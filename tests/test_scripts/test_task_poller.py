@@ -0,0 +1,138 @@
+"""Test the polling of many GEE tasks with a fake GEE interface"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+
+from component.scripts import task_poller
+from component.scripts.task_poller import RateLimiter, get_delay, poll_tasks
+from component.scripts.task_store import TaskStore
+
+
+class FakeGEEInterface:
+    """Tasks going through the given states, one state per check. The checks of
+    "flaky" raise and "unknown" doesn't exist."""
+
+    def __init__(self, states):
+        self.states = states
+        self.checks = {}
+        self.running = self.max_running = 0
+
+    async def get_task_async(self, task_id):
+        self.checks[task_id] = self.checks.get(task_id, 0) + 1
+        self.running += 1
+        self.max_running = max(self.running, self.max_running)
+        await asyncio.sleep(0)
+        self.running -= 1
+
+        if task_id == "flaky":
+            raise ConnectionError("Too many requests")
+
+        if task_id == "unknown":
+            return None
+
+        states = self.states[task_id]
+        state = states[min(self.checks[task_id], len(states)) - 1]
+        error = "Out of memory" if state == "FAILED" else None
+
+        return SimpleNamespace(metadata=SimpleNamespace(state=state), error=error)
+
+
+def test_get_delay(monkeypatch):
+    """The delay grows exponentially up to the maximum, minus the jitter"""
+
+    monkeypatch.setattr(task_poller.random, "random", lambda: 0)
+    assert [get_delay(i, 10, 100) for i in range(5)] == [10, 20, 40, 80, 100]
+
+    monkeypatch.setattr(task_poller.random, "random", lambda: 1)
+    assert get_delay(1, 10, 100, jitter=0.5) == 10
+
+
+def test_poll_tasks(monkeypatch):
+    """Completed tasks are reported once, failed ones are recorded with their
+    error, the state changes are sent to the callback"""
+
+    attempts = []
+
+    def get_delay(attempt, *args):
+        attempts.append(attempt)
+        return 0
+
+    monkeypatch.setattr(task_poller, "get_delay", get_delay)
+
+    gee_interface = FakeGEEInterface(
+        {
+            "a": ["READY", "RUNNING", "RUNNING", "RUNNING", "COMPLETED"],
+            "b": ["RUNNING", "FAILED"],
+            "c": ["COMPLETED"],
+            "d": ["COMPLETED"],
+        }
+    )
+    task_store = TaskStore(":memory:")
+    for task_id in ["a", "b", "c", "d"]:
+        task_store.add(task_id, f"Task_{task_id}")
+
+    changes = []
+    completed = []
+
+    async def on_complete(task_id):
+        if task_id == "d":
+            raise FileNotFoundError("Task_d.csv is not in Drive")
+        completed.append(task_id)
+
+    async def run():
+        return await poll_tasks(
+            ["a", "b", "c", "d", "a", "flaky", "unknown"],
+            gee_interface,
+            on_state=lambda *args: changes.append(args),
+            on_complete=on_complete,
+            task_store=task_store,
+            limiter=RateLimiter(max_concurrent=2, max_rate=0),
+            max_errors=3,
+        )
+
+    results = asyncio.run(run())
+
+    assert completed == ["c", "a"]
+    assert results["a"] == {"state": "COMPLETED", "error": None}
+    assert results["b"] == {"state": "FAILED", "error": "Out of memory"}
+    assert results["d"]["error"] == "Task_d.csv is not in Drive"
+    assert results["unknown"]["state"] == "FAILED"
+    assert "Too many requests" in results["flaky"]["error"]
+
+    assert [change[1] for change in changes if change[0] == "a"] == [
+        "READY",
+        "RUNNING",
+        "COMPLETED",
+    ]
+    assert gee_interface.checks == {
+        "a": 5,
+        "b": 2,
+        "c": 1,
+        "d": 1,
+        "flaky": 3,
+        "unknown": 1,
+    }
+    assert gee_interface.max_running <= 2
+
+    # The backoff restarts when the state changes: READY, RUNNING 3 times
+    assert max(attempts) == 2
+
+    assert [task["id"] for task in task_store.unreported()] == ["a", "c", "d"]
+    assert task_store.get("d")["error"] == "Task_d.csv is not in Drive"
+    assert [task["id"] for task in task_store.failed()] == ["b"]
+
+
+def test_rate_limiter():
+    """The requests are spaced by 1 / max_rate seconds"""
+
+    async def run():
+        limiter = RateLimiter(max_concurrent=10, max_rate=20)
+        start = time.monotonic()
+        for _ in range(3):
+            async with limiter:
+                pass
+
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.1
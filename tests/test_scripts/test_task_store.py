@@ -0,0 +1,107 @@
+"""Test the local SQLite store of the background tasks"""
+
+import json
+import sqlite3
+
+import pytest
+
+from component.scripts.task_store import TaskStore
+
+
+@pytest.fixture
+def task_store(tmp_path):
+    store = TaskStore(tmp_path / "tasks" / "tasks.db")
+    yield store
+    store.close()
+
+
+def write_task_file(path, task_id, aoi):
+    """Write a task file as deferred_calculation.task_process does"""
+
+    data = {
+        "model_state": {
+            "geo_area_name": aoi,
+            "reporting_years_sub_a": {"2000": [2000]},
+            "sub_b_year": {},
+        },
+        "task": {"id": task_id, "name": path.stem},
+    }
+    path.write_text(json.dumps(data))
+
+    return path
+
+
+def test_task_lifecycle(task_store):
+    """Tasks go from pending to completed, reported or failed and retried"""
+
+    for task_id in ["a", "b", "c"]:
+        task_store.add(task_id, f"Task_{task_id}", aoi="Spain", years={"sub_a": [2000]})
+
+    assert [task["id"] for task in task_store.pending()] == ["a", "b", "c"]
+    assert task_store.get("a")["years"] == {"sub_a": [2000]}
+
+    task_store.set_state("a", "RUNNING")
+    task_store.set_state("b", "COMPLETED")
+    task_store.set_state("c", "FAILED", error="Computation timed out.")
+
+    assert [task["id"] for task in task_store.pending()] == ["a"]
+    assert [task["id"] for task in task_store.unreported()] == ["b"]
+    assert task_store.get("b")["completed"] is not None
+
+    task_store.set_result("b", "/tmp/b.csv")
+    task_store.set_reported("b")
+    assert task_store.unreported() == []
+    assert task_store.get("b")["result_path"] == "/tmp/b.csv"
+
+    assert task_store.failed()[0]["error"] == "Computation timed out."
+    task_store.retry("c", "d")
+    assert task_store.failed() == []
+    assert task_store.get("d")["attempts"] == 2
+    assert task_store.get("d")["state"] == "PENDING"
+
+    # A task being cancelled won't complete either
+    task_store.set_state("a", "CANCELLING")
+    assert [task["id"] for task in task_store.failed()] == ["a"]
+    assert task_store.pending() == [task_store.get("d")]
+
+    # The state queries use the index
+    plan = task_store.connection.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM tasks WHERE state IN ('COMPLETED') "
+        "AND reported = 0"
+    ).fetchall()
+    assert "tasks_state" in str([tuple(row) for row in plan])
+
+
+def test_import_task_files(task_store, tmp_path):
+    """JSON task files are imported once, other JSON files are ignored"""
+
+    write_task_file(tmp_path / "Task_Spain.json", "1", "Spain")
+    write_task_file(tmp_path / "Task_Italy.json", "2", "Italy")
+    (tmp_path / "other.json").write_text(json.dumps({"foo": "bar"}))
+
+    imported = task_store.import_task_files(tmp_path)
+    assert sorted(task["aoi"] for task in imported) == ["Italy", "Spain"]
+
+    # Importing again doesn't duplicate nor reset the tasks
+    task_store.set_state("1", "COMPLETED")
+    task_store.import_task_files(tmp_path)
+
+    assert len(task_store.execute("SELECT id FROM tasks")) == 2
+    assert task_store.get("1")["state"] == "COMPLETED"
+    assert task_store.get("2")["model_state"]["geo_area_name"] == "Italy"
+
+
+def test_context_manager(tmp_path):
+    """The store is closed when leaving the with block, even on errors"""
+
+    with pytest.raises(RuntimeError):
+        with TaskStore(tmp_path / "tasks.db") as task_store:
+            write_task_file(tmp_path / "Task_Spain.json", "1", "Spain")
+            task_store.import_task_file(tmp_path / "Task_Spain.json")
+            raise RuntimeError
+
+    with pytest.raises(sqlite3.ProgrammingError):
+        task_store.get("1")
+
+    with TaskStore(tmp_path / "tasks.db") as task_store:
+        assert task_store.get("1")["aoi"] == "Spain"